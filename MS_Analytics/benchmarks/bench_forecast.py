@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.prediction_model import ARIMAModel, FastARModel
+
+# Run from the service directory: python benchmarks/bench_forecast.py
+# BENCH_SIZE, BENCH_HORIZON and BENCH_RUNS set the training length, the
+# forecast horizon and the number of series per shape.
+
+def make_series(kind, size, seed):
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(size)
+
+    if kind == "trend":
+        values = 70 + 0.01 * minutes + rng.normal(0, 0.5, size)
+    elif kind == "random_walk":
+        values = 100 + np.cumsum(rng.normal(0, 0.3, size))
+    else:
+        values = 70 + 3 * np.sin(2 * np.pi * minutes / 240) + rng.normal(0, 0.5, size)
+
+    index = pd.date_range("2025-03-30", periods=size, freq="1min")
+    return pd.Series(values, index=index)
+
+def evaluate(model, train, test):
+    start = time.process_time()
+    fitted = model.fit(train)
+    predicted = np.asarray(model.predict(steps=len(test)), dtype=float) if fitted else None
+    cpu = time.process_time() - start
+
+    if predicted is None:
+        return cpu, float("nan")
+    return cpu, float(np.sqrt(np.mean((predicted - test.to_numpy()) ** 2)))
+
+def main():
+    size = int(os.getenv("BENCH_SIZE", 720))
+    horizon = int(os.getenv("BENCH_HORIZON", 60))
+    runs = int(os.getenv("BENCH_RUNS", 5))
+    warnings.simplefilter("ignore")
+
+    for kind in ["trend", "random_walk", "seasonal"]:
+        results = {"persistence": [], "fast_ar": [], "arima": []}
+
+        for seed in range(runs):
+            series = make_series(kind, size + horizon, seed)
+            train, test = series[:-horizon], series[-horizon:]
+            results["persistence"].append((0.0, float(np.sqrt(np.mean((train.iloc[-1] - test.to_numpy()) ** 2)))))
+            results["fast_ar"].append(evaluate(FastARModel(), train, test))
+            results["arima"].append(evaluate(ARIMAModel(), train, test))
+
+        print(f"{kind} ({size} points, {horizon} step horizon, {runs} runs)")
+        for name, values in results.items():
+            cpu = np.mean([value[0] for value in values])
+            rmse = np.nanmean([value[1] for value in values])
+            print(f"  {name:<11} cpu {cpu * 1000:9.2f} ms   rmse {rmse:7.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import numpy as np
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_processor import preprocess_time_series, records_to_columns, preprocess_columnar, preprocess_records
+
+# Run from the service directory: python benchmarks/bench_preprocess.py
+# BENCH_REPEAT sets how many timed runs each path gets; the best one is shown.
+
+def make_records(hours, interval_seconds):
+    count = int(hours * 3600 / interval_seconds)
+    start = datetime(2025, 3, 30, 0, 0, 0)
+    values = np.random.normal(70, 5, count)
+    return [
+        {"time": (start + timedelta(seconds=i * interval_seconds)).isoformat() + "+00:00", "value": float(v)}
+        for i, v in enumerate(values)
+    ]
+
+def timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    repeat = int(os.getenv("BENCH_REPEAT", 5))
+
+    for hours, interval in [(0.5, 1), (12, 5), (12, 1)]:
+        records = make_records(hours, interval)
+        times, values = records_to_columns(records, "value")
+
+        legacy = preprocess_time_series(records, "value")
+        fast = preprocess_columnar(times, values, "value")
+        assert np.allclose(legacy["value"].to_numpy(), fast["value"].to_numpy(), equal_nan=True)
+
+        legacy_time = timeit(lambda: preprocess_time_series(records, "value"), repeat)
+        records_time = timeit(lambda: preprocess_columnar(*records_to_columns(records, "value"), "value"), repeat)
+        columnar_time = timeit(lambda: preprocess_columnar(times, values, "value"), repeat)
+        preprocess_columnar(times, values, "value", cache_key=("bench", hours))
+        cached_time = timeit(lambda: preprocess_columnar(times, values, "value", cache_key=("bench", hours)), repeat)
+        preprocess_records(records, "value", cache_key=("bench-records", hours))
+        records_cached_time = timeit(lambda: preprocess_records(records, "value", cache_key=("bench-records", hours)), repeat)
+
+        print(f"{len(records):>7} points ({hours}h @ {interval}s)")
+        print(f"  preprocess_time_series      {legacy_time * 1000:9.2f} ms")
+        print(f"  records -> columnar         {records_time * 1000:9.2f} ms")
+        print(f"  columnar (epoch arrays)     {columnar_time * 1000:9.2f} ms")
+        print(f"  columnar (cache hit)        {cached_time * 1000:9.2f} ms")
+        print(f"  records (cache hit)         {records_cached_time * 1000:9.2f} ms")
+
+if __name__ == '__main__':
+    main()
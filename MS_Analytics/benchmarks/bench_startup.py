@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run with the service's interpreter: python benchmarks/bench_startup.py
+# It times the imports done before the server can start, once as main.py does
+# with STARTUP_MODE=background or lazy (heavy libraries loaded later) and once
+# with STARTUP_MODE=eager (loaded up front). Each run is a fresh interpreter, so
+# run it a few times and compare the totals. BENCH_TOP sets how many of the
+# slowest modules are listed.
+
+def import_times(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=SERVICE_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level imports add up to the total
+        if len(name) - len(name.lstrip()) == 1:
+            times.append((name.strip(), int(cumulative_us)))
+    return times
+
+def report(label, statement, top):
+    times = import_times(statement)
+    total = sum(cumulative for _, cumulative in times)
+    print(f"{label}: {total / 1000:.1f} ms")
+    for name, cumulative in sorted(times, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {name:<40} {cumulative / 1000:9.1f} ms")
+
+def main():
+    top = int(os.getenv("BENCH_TOP", 8))
+    report("controller import (lazy)", "import controllers.analytics_controller", top)
+    report(
+        "controller import + warm-up (eager)",
+        "import controllers.analytics_controller; from utils.warmup import import_heavy_modules; import_heavy_modules()",
+        top
+    )
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,13 @@
 import cherrypy
 import json
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import requests
 from services.prediction_service import PredictionService
 from services.anomaly_service import AnomalyService
+from utils.discovery import ServiceDiscovery
 
 load_dotenv()
 
@@ -13,6 +16,12 @@ class AnalyticsController:
         self.prediction_service = PredictionService()
         self.anomaly_service = AnomalyService()
         self.resource_catalog_url = os.getenv("RESOURCE_CATALOG_URL")
+        self.discovery = ServiceDiscovery(
+            self.resource_catalog_url,
+            ttl=float(os.getenv("DISCOVERY_TTL", 30)),
+            stale_ttl=float(os.getenv("DISCOVERY_STALE_TTL", 300)),
+            watch=os.getenv("DISCOVERY_WATCH", "true").lower() in ['true', '1', 'yes']
+        )
         
         self.predict_temperature = self.PredictTemperature(self)
         self.predict_pressure = self.PredictPressure(self)
@@ -21,7 +30,20 @@ class AnalyticsController:
         self.cascading_failures = self.CascadingFailures(self)
         self.trigger_valve = self.TriggerValve(self)
         
-        self._register_with_catalog()
+        self.service_registered = False
+        self.register_thread = threading.Thread(target=self._registration_loop)
+        self.register_thread.daemon = True
+        self.register_thread.start()
+    
+    def _registration_loop(self):
+        retry_count = 0
+        while not self._register_with_catalog():
+            retry_count += 1
+            sleep_time = min(2 ** retry_count, 60)
+            print(f"Registration with Resource Catalog failed. Retrying in {sleep_time} seconds...")
+            time.sleep(sleep_time)
+        
+        self.service_registered = True
     
     def _register_with_catalog(self):
         try:
@@ -40,13 +62,49 @@ class AnalyticsController:
             
             response = requests.post(
                 f"{self.resource_catalog_url}/api/services",
-                json=service_info
+                json=service_info,
+                timeout=5
             )
             
             if response.status_code != 200:
                 print(f"Failed to register with Resource Catalog: {response.text}")
+                return False
+            return True
         except Exception as e:
             print(f"Exception during registration: {e}")
+            return False
+    
+    def _send_valve_command(self, action, automatic, pipeline_id=None):
+        payload = {
+            "command": action.upper(),
+            "pipeline_id": pipeline_id,
+            "reason": "Anomaly or prediction threshold exceeded",
+            "automatic": automatic
+        }
+        
+        for attempt in range(2):
+            # With several Control Center instances, the one owning the pipeline takes the command
+            control_center_info = self.discovery.lookup_instance("control_center", pipeline_id)
+            if not control_center_info:
+                raise Exception("Control Center not found in catalog")
+            
+            command_url = (control_center_info.get("endpoints") or {}).get("command", {}).get("url")
+            if not command_url:
+                raise Exception("Control Center URL not found in catalog")
+            
+            try:
+                valve_response = requests.post(command_url, json=payload, timeout=5)
+            except requests.ConnectionError:
+                # The cached endpoint may be outdated: drop it and resolve once more
+                self.discovery.invalidate("control_center")
+                self.discovery.invalidate(control_center_info.get("service_id"))
+                if attempt == 1:
+                    raise
+                continue
+            
+            if valve_response.status_code != 200:
+                raise Exception(f"Failed to trigger valve: {valve_response.text}")
+            return
     
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -70,28 +128,24 @@ class AnalyticsController:
             self.parent = parent
         
         @cherrypy.tools.json_out()
-        def GET(self, hours=1):
+        def GET(self, hours=1, full=False):
             try:
                 hours = float(hours)
-                predictions = self.parent.prediction_service.predict_temperature(hours_ahead=hours)
+                full = str(full).lower() in ['true', '1', 't', 'y', 'yes']
+                forecast = self.parent.prediction_service.forecast("temperature", hours_ahead=hours, full=full)
                 
-                if not predictions:
+                if not forecast:
                     raise cherrypy.HTTPError(500, "Failed to generate temperature predictions")
                 
-                threshold_exceeded = self.parent.prediction_service.will_exceed_threshold(predictions)
-                
-                if threshold_exceeded:
+                if forecast["threshold_exceeded"]:
+                    alert_data = {key: value for key, value in forecast.items() if key != "predictions"}
                     self.parent.anomaly_service.send_alert(
                         "temperature_prediction",
-                        f"Temperature predicted to exceed threshold in the next {hours} hours",
-                        predictions
+                        f"Temperature predicted to exceed threshold in {forecast['time_to_threshold']} minutes",
+                        alert_data
                     )
                 
-                return {
-                    "predictions": predictions,
-                    "threshold_exceeded": threshold_exceeded,
-                    "hours_ahead": hours
-                }
+                return forecast
                 
             except Exception as e:
                 raise cherrypy.HTTPError(500, f"Error in temperature prediction: {str(e)}")
@@ -102,28 +156,24 @@ class AnalyticsController:
             self.parent = parent
             
         @cherrypy.tools.json_out()
-        def GET(self, hours=1):
+        def GET(self, hours=1, full=False):
             try:
                 hours = float(hours)
-                predictions = self.parent.prediction_service.predict_pressure(hours_ahead=hours)
+                full = str(full).lower() in ['true', '1', 't', 'y', 'yes']
+                forecast = self.parent.prediction_service.forecast("pressure", hours_ahead=hours, full=full)
                 
-                if not predictions:
+                if not forecast:
                     raise cherrypy.HTTPError(500, "Failed to generate pressure predictions")
                 
-                threshold_exceeded = self.parent.prediction_service.will_exceed_threshold(predictions)
-                
-                if threshold_exceeded:
+                if forecast["threshold_exceeded"]:
+                    alert_data = {key: value for key, value in forecast.items() if key != "predictions"}
                     self.parent.anomaly_service.send_alert(
                         "pressure_prediction",
-                        f"Pressure predicted to exceed threshold in the next {hours} hours",
-                        predictions
+                        f"Pressure predicted to exceed threshold in {forecast['time_to_threshold']} minutes",
+                        alert_data
                     )
                 
-                return {
-                    "predictions": predictions,
-                    "threshold_exceeded": threshold_exceeded,
-                    "hours_ahead": hours
-                }
+                return forecast
                 
             except Exception as e:
                 raise cherrypy.HTTPError(500, f"Error in pressure prediction: {str(e)}")
@@ -199,11 +249,18 @@ class AnalyticsController:
                         {"risk_level": "high"}
                     )
                     
-                    self.parent.trigger_valve(action="close", automatic=True)
+                    try:
+                        self.parent._send_valve_command("close", True)
+                        action_taken = True
+                    except Exception as e:
+                        print(f"Failed to close the valve after cascading failure risk: {e}")
+                        action_taken = False
+                else:
+                    action_taken = False
                 
                 return {
                     "cascading_failure_risk": risk_detected,
-                    "automatic_action_taken": risk_detected
+                    "automatic_action_taken": action_taken
                 }
                 
             except Exception as e:
@@ -221,8 +278,10 @@ class AnalyticsController:
                 if hasattr(cherrypy.request, 'json'):
                     data = cherrypy.request.json
                     action = data.get("action", "close")
+                    pipeline_id = data.get("pipeline_id")
                 else:
                     action = "close"
+                    pipeline_id = None
                 
                 automatic = False
                 if hasattr(cherrypy.request, 'json'):
@@ -232,34 +291,13 @@ class AnalyticsController:
                     raise cherrypy.HTTPError(400, "Invalid action. Must be 'open' or 'close'.")
                 
                 try:
-                    response = requests.get(f"{self.parent.resource_catalog_url}/api/services/control_center")
-                    if response.status_code == 200:
-                        control_center_info = response.json()
-                        control_center_url = control_center_info.get("endpoint")
-                        
-                        if not control_center_url:
-                            raise Exception("Control Center URL not found in catalog")
-                        
-                        valve_response = requests.post(
-                            f"{control_center_url}/api/valve",
-                            json={
-                                "action": action,
-                                "reason": "Anomaly or prediction threshold exceeded",
-                                "automatic": automatic
-                            }
-                        )
-                        
-                        if valve_response.status_code != 200:
-                            raise Exception(f"Failed to trigger valve: {valve_response.text}")
-                        
-                        return {
-                            "success": True,
-                            "action": action,
-                            "automatic": automatic,
-                            "message": f"Valve {action} command sent successfully"
-                        }
-                    else:
-                        raise Exception(f"Failed to get Control Center info: {response.text}")
+                    self.parent._send_valve_command(action, automatic, pipeline_id)
+                    return {
+                        "success": True,
+                        "action": action,
+                        "automatic": automatic,
+                        "message": f"Valve {action} command sent successfully"
+                    }
                 except Exception as e:
                     raise cherrypy.HTTPError(500, f"Error communicating with Control Center: {str(e)}")
                     
@@ -267,7 +305,7 @@ class AnalyticsController:
                 raise cherrypy.HTTPError(500, f"Error triggering valve: {str(e)}")
                 
         @cherrypy.tools.json_out()
-        def GET(self, action="close", automatic=False):
+        def GET(self, action="close", automatic=False, pipeline_id=None):
             try:
                 if action not in ["open", "close"]:
                     raise cherrypy.HTTPError(400, "Invalid action. Must be 'open' or 'close'.")
@@ -275,34 +313,13 @@ class AnalyticsController:
                 automatic = str(automatic).lower() in ['true', '1', 't', 'y', 'yes']
                 
                 try:
-                    response = requests.get(f"{self.parent.resource_catalog_url}/api/services/control_center")
-                    if response.status_code == 200:
-                        control_center_info = response.json()
-                        control_center_url = control_center_info.get("endpoint")
-                        
-                        if not control_center_url:
-                            raise Exception("Control Center URL not found in catalog")
-                        
-                        valve_response = requests.post(
-                            f"{control_center_url}/api/valve",
-                            json={
-                                "action": action,
-                                "reason": "Anomaly or prediction threshold exceeded",
-                                "automatic": automatic
-                            }
-                        )
-                        
-                        if valve_response.status_code != 200:
-                            raise Exception(f"Failed to trigger valve: {valve_response.text}")
-                        
-                        return {
-                            "success": True,
-                            "action": action,
-                            "automatic": automatic,
-                            "message": f"Valve {action} command sent successfully"
-                        }
-                    else:
-                        raise Exception(f"Failed to get Control Center info: {response.text}")
+                    self.parent._send_valve_command(action, automatic, pipeline_id)
+                    return {
+                        "success": True,
+                        "action": action,
+                        "automatic": automatic,
+                        "message": f"Valve {action} command sent successfully"
+                    }
                 except Exception as e:
                     raise cherrypy.HTTPError(500, f"Error communicating with Control Center: {str(e)}")
                     
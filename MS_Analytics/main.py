@@ -3,11 +3,13 @@ import os
 import sys
 from dotenv import load_dotenv
 from controllers.analytics_controller import get_app
+from utils.warmup import import_heavy_modules, start_background_warmup
 
 load_dotenv()
 
 def main():
     port = int(os.getenv("SERVICE_PORT", 8083))
+    startup_mode = os.getenv("STARTUP_MODE", "background")
     
     cherrypy.config.update({
         'server.socket_host': '0.0.0.0',
@@ -16,8 +18,15 @@ def main():
         'log.screen': True,
     })
     
+    if startup_mode == "eager":
+        import_heavy_modules()
+    
     app = get_app()
     cherrypy.engine.start()
+    
+    if startup_mode == "background":
+        start_background_warmup()
+    
     cherrypy.engine.block()
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+FORMAT_VERSION = 1
+
+def _checksum(payload):
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def write_artifact(filepath, kind, state, forecaster=None):
+    payload = {
+        "kind": kind,
+        "created_at": datetime.now().isoformat(),
+        "state": state
+    }
+    if forecaster is not None:
+        payload["forecaster"] = forecaster
+    artifact = {
+        "format_version": FORMAT_VERSION,
+        "checksum": _checksum(payload),
+        "payload": payload
+    }
+
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(artifact, f, separators=(',', ':'))
+        os.replace(temp_path, filepath)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def read_payload(filepath):
+    if not os.path.exists(filepath):
+        return None
+
+    try:
+        with open(filepath, 'r') as f:
+            artifact = json.load(f)
+    except Exception as e:
+        print(f"Error reading model artifact {filepath}: {e}")
+        return None
+
+    if artifact.get("format_version") != FORMAT_VERSION:
+        print(f"Unsupported model artifact version in {filepath}: {artifact.get('format_version')}")
+        return None
+
+    payload = artifact.get("payload")
+    if not isinstance(payload, dict) or artifact.get("checksum") != _checksum(payload):
+        print(f"Checksum mismatch for model artifact {filepath}")
+        return None
+
+    return payload
+
+def read_artifact(filepath, kind=None):
+    payload = read_payload(filepath)
+    if payload is None:
+        return None
+
+    if kind is not None and payload.get("kind") != kind:
+        print(f"Model artifact {filepath} has kind {payload.get('kind')}, expected {kind}")
+        return None
+
+    return payload.get("state")
+
+class ModelStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def save(self, name, model, forecaster=None):
+        # forecaster: the setting the model was trained for, which may differ
+        # from its kind when a fast model fell back to ARIMA
+        state = model.get_state()
+        if state is None:
+            return False
+
+        try:
+            with self.lock:
+                write_artifact(self._path(name), model.kind, state, forecaster)
+            return True
+        except Exception as e:
+            print(f"Error saving model {name}: {e}")
+            return False
+
+    def load(self, name):
+        with self.lock:
+            payload = read_payload(self._path(name))
+
+        if payload is None:
+            return None, None, None, None
+
+        try:
+            created_at = datetime.fromisoformat(payload.get("created_at"))
+        except (TypeError, ValueError):
+            created_at = None
+
+        return payload.get("kind"), payload.get("state"), payload.get("forecaster"), created_at
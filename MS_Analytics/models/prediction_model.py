@@ -1,12 +1,41 @@
-import pandas as pd
 import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-import pickle
-import os
+from statistics import NormalDist
+from models.model_store import write_artifact, read_artifact
 
-class ARIMAModel:
+STATE_TAIL_SIZE = 120
+
+class Forecaster:
+    kind = None
+    
+    def __init__(self):
+        self.last_value = None
+    
+    def fit(self, time_series):
+        raise NotImplementedError
+    
+    def is_fitted(self):
+        raise NotImplementedError
+    
+    def predict(self, steps=10):
+        interval = self.predict_interval(steps=steps)
+        if interval is None:
+            return None
+        return interval["mean"]
+    
+    def predict_interval(self, steps=10, alpha=0.05):
+        raise NotImplementedError
+    
+    def get_state(self):
+        raise NotImplementedError
+    
+    def restore_state(self, state):
+        raise NotImplementedError
+
+class ARIMAModel(Forecaster):
+    kind = "arima"
+    
     def __init__(self, p=1, d=1, q=1, seasonal_order=(0, 0, 0, 0)):
+        super().__init__()
         self.p = p
         self.d = d
         self.q = q
@@ -14,7 +43,12 @@ class ARIMAModel:
         self.model = None
         self.fitted_model = None
     
+    def is_fitted(self):
+        return self.fitted_model is not None
+    
     def fit(self, time_series):
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
         try:
             self.model = SARIMAX(
                 time_series, 
@@ -23,6 +57,8 @@ class ARIMAModel:
                 enforce_stationarity=False
             )
             self.fitted_model = self.model.fit(disp=False)
+            observed = time_series.dropna()
+            self.last_value = float(observed.iloc[-1]) if len(observed) else None
             return True
         except Exception as e:
             print(f"Error fitting ARIMA model: {e}")
@@ -35,21 +71,224 @@ class ARIMAModel:
         forecast = self.fitted_model.forecast(steps=steps)
         return forecast
     
-    def save_model(self, filepath):
-        if self.fitted_model is not None:
-            with open(filepath, 'wb') as f:
-                pickle.dump(self.fitted_model, f)
+    def predict_interval(self, steps=10, alpha=0.05):
+        if self.fitted_model is None:
+            return None
+        
+        forecast = self.fitted_model.get_forecast(steps=steps)
+        conf_int = np.asarray(forecast.conf_int(alpha=alpha))
+        return {
+            "mean": np.asarray(forecast.predicted_mean, dtype=float),
+            "lower": conf_int[:, 0],
+            "upper": conf_int[:, 1],
+            "std": np.asarray(forecast.se_mean, dtype=float)
+        }
+    
+    def get_state(self, tail_size=STATE_TAIL_SIZE):
+        if self.fitted_model is None:
+            return None
+        
+        # The Kalman filter only needs recent observations to rebuild the
+        # forecasting state, so the training data itself is not kept.
+        tail_size = max(tail_size, 3 * self.seasonal_order[3])
+        endog = np.asarray(self.fitted_model.model.endog, dtype=float).ravel()[-tail_size:]
+        
+        return {
+            "order": [self.p, self.d, self.q],
+            "seasonal_order": list(self.seasonal_order),
+            "param_names": list(self.fitted_model.model.param_names),
+            "params": [float(value) for value in self.fitted_model.params],
+            "tail": [float(value) if np.isfinite(value) else None for value in endog],
+            "last_value": self.last_value
+        }
+    
+    def restore_state(self, state):
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
+        try:
+            self.p, self.d, self.q = state["order"]
+            self.seasonal_order = tuple(state["seasonal_order"])
+            tail = np.array([np.nan if value is None else value for value in state["tail"]], dtype=float)
+            
+            self.model = SARIMAX(
+                tail,
+                order=(self.p, self.d, self.q),
+                seasonal_order=self.seasonal_order,
+                enforce_stationarity=False
+            )
+            if list(self.model.param_names) != list(state["param_names"]):
+                raise ValueError(f"Parameter mismatch: {state['param_names']}")
+            
+            self.fitted_model = self.model.filter(np.asarray(state["params"], dtype=float))
+            self.last_value = state.get("last_value")
             return True
-        return False
+        except Exception as e:
+            print(f"Error restoring ARIMA model state: {e}")
+            self.model = None
+            self.fitted_model = None
+            return False
+    
+    def save_model(self, filepath):
+        state = self.get_state()
+        if state is None:
+            return False
+        
+        write_artifact(filepath, self.kind, state)
+        return True
     
     def load_model(self, filepath):
-        if os.path.exists(filepath):
-            with open(filepath, 'rb') as f:
-                self.fitted_model = pickle.load(f)
+        state = read_artifact(filepath, self.kind)
+        if state is None:
+            return False
+        
+        return self.restore_state(state)
+
+class FastARModel(Forecaster):
+    kind = "fast_ar"
+    
+    def __init__(self, p=3, d=1):
+        super().__init__()
+        self.p = p
+        self.d = d
+        self.intercept = None
+        self.coefficients = None
+        self.sigma = None
+        self.tail = None
+    
+    def is_fitted(self):
+        return self.coefficients is not None
+    
+    def fit(self, time_series):
+        try:
+            y = np.asarray(time_series, dtype=float)
+            y = y[np.isfinite(y)]
+            z = np.diff(y, n=self.d)
+            
+            if len(z) <= 2 * self.p + 1:
+                raise ValueError(f"Not enough observations ({len(y)}) for AR({self.p}) with d={self.d}")
+            
+            lags = [z[self.p - 1 - i:len(z) - 1 - i] for i in range(self.p)]
+            design = np.column_stack([np.ones(len(z) - self.p)] + lags)
+            target = z[self.p:]
+            
+            solution, _, _, _ = np.linalg.lstsq(design, target, rcond=None)
+            residuals = target - design @ solution
+            
+            self.intercept = float(solution[0])
+            self.coefficients = solution[1:]
+            self.sigma = float(np.sqrt(residuals @ residuals / max(len(target) - self.p - 1, 1)))
+            self.tail = y[-(self.p + self.d):].copy()
+            self.last_value = float(y[-1])
             return True
-        return False
+        except Exception as e:
+            print(f"Error fitting fast AR model: {e}")
+            return False
+    
+    def _psi_weights(self, steps):
+        # MA(infinity) weights of phi(B)(1 - B)^d, used for the forecast variance
+        polynomial = np.concatenate(([1.0], -self.coefficients))
+        for _ in range(self.d):
+            polynomial = np.convolve(polynomial, [1.0, -1.0])
+        ar = -polynomial[1:]
+        
+        psi = np.zeros(steps)
+        psi[0] = 1.0
+        for j in range(1, steps):
+            order = min(j, len(ar))
+            psi[j] = ar[:order] @ psi[j - 1::-1][:order]
+        return psi
+    
+    def predict_interval(self, steps=10, alpha=0.05):
+        if not self.is_fitted():
+            return None
+        
+        history = list(np.diff(self.tail, n=self.d)[-self.p:])
+        forecast = np.empty(steps)
+        for step in range(steps):
+            value = self.intercept + self.coefficients @ history[:-self.p - 1:-1]
+            forecast[step] = value
+            history.append(value)
+        
+        for level in range(self.d, 0, -1):
+            forecast = np.diff(self.tail, n=level - 1)[-1] + np.cumsum(forecast)
+        
+        std = self.sigma * np.sqrt(np.cumsum(self._psi_weights(steps) ** 2))
+        quantile = NormalDist().inv_cdf(1 - alpha / 2)
+        return {
+            "mean": forecast,
+            "lower": forecast - quantile * std,
+            "upper": forecast + quantile * std,
+            "std": std
+        }
+    
+    def validation_error(self, time_series, holdout=30):
+        y = np.asarray(time_series, dtype=float)
+        y = y[np.isfinite(y)]
+        if len(y) <= holdout + 2 * (self.p + self.d) + 10:
+            return None
+        
+        candidate = FastARModel(p=self.p, d=self.d)
+        if not candidate.fit(y[:-holdout]):
+            return None
+        
+        # Relative to the persistence forecast (the last training value held
+        # flat): below 1 the model beats it, above 1 it is worse than no model
+        actual = y[-holdout:]
+        predicted = candidate.predict(steps=holdout)
+        rmse = float(np.sqrt(np.mean((predicted - actual) ** 2)))
+        naive_rmse = float(np.sqrt(np.mean((y[-holdout - 1] - actual) ** 2)))
+        if naive_rmse < 1e-9:
+            return 0.0 if rmse < 1e-9 else float("inf")
+        return rmse / naive_rmse
+    
+    def get_state(self):
+        if not self.is_fitted():
+            return None
+        
+        return {
+            "order": [self.p, self.d],
+            "intercept": self.intercept,
+            "coefficients": [float(value) for value in self.coefficients],
+            "sigma": self.sigma,
+            "tail": [float(value) for value in self.tail],
+            "last_value": self.last_value
+        }
+    
+    def restore_state(self, state):
+        try:
+            self.p, self.d = state["order"]
+            self.intercept = float(state["intercept"])
+            self.coefficients = np.asarray(state["coefficients"], dtype=float)
+            self.sigma = float(state["sigma"])
+            self.tail = np.asarray(state["tail"], dtype=float)
+            self.last_value = state.get("last_value")
+            if len(self.coefficients) != self.p or len(self.tail) != self.p + self.d:
+                raise ValueError("Inconsistent fast AR state")
+            return True
+        except Exception as e:
+            print(f"Error restoring fast AR model state: {e}")
+            self.coefficients = None
+            return False
+
+FORECASTERS = {
+    ARIMAModel.kind: ARIMAModel,
+    FastARModel.kind: FastARModel
+}
+
+# FORECASTER_<SENSOR> setting -> the forecaster kind it trains
+FORECASTER_CHOICES = {
+    "fast": FastARModel.kind,
+    "arima": ARIMAModel.kind
+}
+
+def create_forecaster(kind, **kwargs):
+    if kind not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster: {kind}")
+    return FORECASTERS[kind](**kwargs)
 
 def find_best_arima_params(time_series, p_range=(0, 2), d_range=(0, 2), q_range=(0, 2)):
+    from statsmodels.tsa.arima.model import ARIMA
+    
     best_aic = float("inf")
     best_params = None
     
@@ -1,11 +1,9 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
 import requests
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from utils.data_processor import preprocess_time_series
+from utils.data_processor import preprocess_records
 
 load_dotenv()
 
@@ -38,13 +36,17 @@ class AnomalyService:
             print(f"Exception in _get_recent_data: {e}")
             return None
     
-    def detect_anomalies(self, sensor_type):
-        data = self._get_recent_data(sensor_type)
+    def _preprocess(self, sensor_type, data, minutes):
+        return preprocess_records(data, "value", cache_key=(sensor_type, minutes))
+    
+    def detect_anomalies(self, sensor_type, minutes=30):
+        data = self._get_recent_data(sensor_type, minutes=minutes)
         if not data or len(data) < 10:
             return []
         
-        df = preprocess_time_series(data, "value")
+        df = self._preprocess(sensor_type, data, minutes)
         
+        from sklearn.ensemble import IsolationForest
         model = IsolationForest(contamination=0.05, random_state=42)
         df['anomaly'] = model.fit_predict(df[['value']])
         
@@ -67,16 +69,17 @@ class AnomalyService:
             return value > self.pressure_threshold
         return False
     
-    def detect_cascading_failures(self):
-        temp_data = self._get_recent_data("temperature")
-        pressure_data = self._get_recent_data("pressure")
+    def detect_cascading_failures(self, minutes=30):
+        temp_data = self._get_recent_data("temperature", minutes=minutes)
+        pressure_data = self._get_recent_data("pressure", minutes=minutes)
         
         if not temp_data or not pressure_data:
             return False
         
-        temp_df = preprocess_time_series(temp_data, "value")
-        pressure_df = preprocess_time_series(pressure_data, "value")
+        temp_df = self._preprocess("temperature", temp_data, minutes)
+        pressure_df = self._preprocess("pressure", pressure_data, minutes)
         
+        import pandas as pd
         merged_df = pd.merge(
             temp_df, pressure_df,
             left_index=True, right_index=True,
@@ -121,7 +124,8 @@ class AnomalyService:
                 json={
                     "type": alert_type,
                     "message": message,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": datetime.now().isoformat(),
+                    "data": data if isinstance(data, dict) else None
                 }
             )
         except Exception as e:
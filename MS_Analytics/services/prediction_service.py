@@ -1,11 +1,12 @@
-import pandas as pd
 import numpy as np
 import requests
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from models.prediction_model import ARIMAModel, find_best_arima_params
-from utils.data_processor import preprocess_time_series, check_stationarity, make_stationary
+from statistics import NormalDist
+from models.prediction_model import ARIMAModel, FastARModel, create_forecaster, find_best_arima_params, FORECASTERS, FORECASTER_CHOICES
+from models.model_store import ModelStore
+from utils.data_processor import preprocess_records, check_stationarity, make_stationary
 
 load_dotenv()
 
@@ -16,6 +17,22 @@ class PredictionService:
         self.pressure_model = ARIMAModel()
         self.temperature_threshold = float(os.getenv("TEMPERATURE_THRESHOLD"))
         self.pressure_threshold = float(os.getenv("PRESSURE_THRESHOLD"))
+        self.model_store = ModelStore(os.getenv("MODEL_STORE_DIR", "model_store"))
+        self.forecaster_kinds = {
+            "temperature": os.getenv("FORECASTER_TEMPERATURE", "fast"),
+            "pressure": os.getenv("FORECASTER_PRESSURE", "fast")
+        }
+        for sensor_type, forecaster in self.forecaster_kinds.items():
+            if forecaster not in FORECASTER_CHOICES:
+                raise ValueError(f"Unknown forecaster for {sensor_type}: {forecaster}")
+        # The fast model is kept while its holdout RMSE is at most this multiple
+        # of the persistence forecast's: 1.0 means it must not lose to it, the
+        # default leaves some slack for noise in the short holdout
+        self.fast_model_max_error_ratio = float(os.getenv("FAST_MODEL_MAX_ERROR_RATIO", 1.1))
+        # Models are retrained on the latest window once they are older than
+        # this many seconds, whether fitted here or restored from the store; 0 never expires them
+        self.model_max_age = float(os.getenv("MODEL_MAX_AGE", 21600))
+        self.trained_at = {}
     
     def _get_historical_data(self, sensor_type, hours=12):
         end_time = datetime.now()
@@ -38,33 +55,97 @@ class PredictionService:
             print(f"Exception in _get_historical_data: {e}")
             return None
     
-    def train_models(self):
-        temp_data = self._get_historical_data("temperature")
-        pressure_data = self._get_historical_data("pressure")
+    def _preprocess(self, sensor_type, data, hours):
+        return preprocess_records(data, "value", cache_key=(sensor_type, int(hours * 60)))
+    
+    def _fit_forecaster(self, sensor_type, time_series):
+        if self.forecaster_kinds.get(sensor_type) == "fast":
+            model = FastARModel()
+            error = model.validation_error(time_series)
+            
+            if error is not None and error <= self.fast_model_max_error_ratio and model.fit(time_series):
+                return model
+            
+            print(f"Fast forecaster for {sensor_type} rejected (error vs persistence: {error}), falling back to ARIMA")
+        
+        params = find_best_arima_params(time_series)
+        if not params:
+            return None
+        
+        model = ARIMAModel(p=params[0], d=params[1], q=params[2])
+        if model.fit(time_series):
+            return model
+        return None
+    
+    def _set_model(self, sensor_type, model, trained_at=None):
+        self.trained_at[sensor_type] = trained_at or datetime.now()
+        if sensor_type == "temperature":
+            self.temperature_model = model
+        elif sensor_type == "pressure":
+            self.pressure_model = model
+    
+    def train_models(self, hours=12):
+        temp_data = self._get_historical_data("temperature", hours=hours)
+        pressure_data = self._get_historical_data("pressure", hours=hours)
         
         if temp_data and pressure_data:
-            temp_df = preprocess_time_series(temp_data, "value")
-            pressure_df = preprocess_time_series(pressure_data, "value")
+            temp_df = self._preprocess("temperature", temp_data, hours)
+            pressure_df = self._preprocess("pressure", pressure_data, hours)
             
-            temp_params = find_best_arima_params(temp_df["value"])
-            pressure_params = find_best_arima_params(pressure_df["value"])
+            temperature_model = self._fit_forecaster("temperature", temp_df["value"])
+            pressure_model = self._fit_forecaster("pressure", pressure_df["value"])
             
-            if temp_params:
-                self.temperature_model = ARIMAModel(p=temp_params[0], d=temp_params[1], q=temp_params[2])
-                self.temperature_model.fit(temp_df["value"])
+            if temperature_model:
+                self._set_model("temperature", temperature_model)
+                self.model_store.save("temperature", temperature_model, self.forecaster_kinds["temperature"])
             
-            if pressure_params:
-                self.pressure_model = ARIMAModel(p=pressure_params[0], d=pressure_params[1], q=pressure_params[2])
-                self.pressure_model.fit(pressure_df["value"])
+            if pressure_model:
+                self._set_model("pressure", pressure_model)
+                self.model_store.save("pressure", pressure_model, self.forecaster_kinds["pressure"])
             
             return True
         
         return False
     
+    def _is_stale(self, trained_at):
+        if self.model_max_age <= 0:
+            return False
+        return trained_at is None or (datetime.now() - trained_at).total_seconds() > self.model_max_age
+    
+    def _ensure_model(self, sensor_type):
+        current, _ = self._get_model_and_threshold(sensor_type)
+        if current.is_fitted() and not self._is_stale(self.trained_at.get(sensor_type)):
+            return True
+        
+        kind, state, forecaster, created_at = self.model_store.load(sensor_type)
+        configured = self.forecaster_kinds[sensor_type]
+        # Artifacts from before the setting was recorded only have their kind
+        if forecaster is None and kind in FORECASTERS:
+            forecaster = next(choice for choice, choice_kind in FORECASTER_CHOICES.items() if choice_kind == kind)
+        
+        if state is not None and forecaster != configured:
+            print(
+                f"Stored {sensor_type} model was trained for FORECASTER_{sensor_type.upper()}={forecaster}, "
+                f"now {configured}; retraining"
+            )
+        elif state is not None and self._is_stale(created_at):
+            print(f"Stored {sensor_type} model from {created_at} is older than MODEL_MAX_AGE={self.model_max_age:g}s; retraining")
+        elif state is not None and kind in FORECASTERS:
+            model = create_forecaster(kind)
+            if model.restore_state(state):
+                self._set_model(sensor_type, model, created_at)
+                return True
+        
+        if not self.train_models():
+            # Keep forecasting with an expired model rather than not at all
+            return current.is_fitted()
+        
+        model, _ = self._get_model_and_threshold(sensor_type)
+        return model.is_fitted()
+    
     def predict_temperature(self, hours_ahead=1):
-        if not self.temperature_model.fitted_model:
-            if not self.train_models():
-                return None
+        if not self._ensure_model("temperature"):
+            return None
         
         steps = int(hours_ahead * 60)
         predictions = self.temperature_model.predict(steps=steps)
@@ -80,9 +161,8 @@ class PredictionService:
         return prediction_data
     
     def predict_pressure(self, hours_ahead=1):
-        if not self.pressure_model.fitted_model:
-            if not self.train_models():
-                return None
+        if not self._ensure_model("pressure"):
+            return None
         
         steps = int(hours_ahead * 60)
         predictions = self.pressure_model.predict(steps=steps)
@@ -97,6 +177,70 @@ class PredictionService:
         
         return prediction_data
     
+    def _get_model_and_threshold(self, sensor_type):
+        if sensor_type == "temperature":
+            return self.temperature_model, self.temperature_threshold
+        elif sensor_type == "pressure":
+            return self.pressure_model, self.pressure_threshold
+        raise ValueError(f"Unknown sensor type: {sensor_type}")
+    
+    def forecast(self, sensor_type, hours_ahead=1, full=False, alpha=0.05):
+        if not self._ensure_model(sensor_type):
+            return None
+        model, threshold = self._get_model_and_threshold(sensor_type)
+        
+        steps = max(int(hours_ahead * 60), 1)
+        interval = model.predict_interval(steps=steps, alpha=alpha)
+        if interval is None:
+            return None
+        
+        mean = interval["mean"]
+        std = np.where(np.isfinite(interval["std"]), interval["std"], 0.0)
+        start_time = datetime.now()
+        
+        exceeds = mean > threshold
+        crossing_step = int(np.argmax(exceeds)) if exceeds.any() else None
+        
+        # Per-step probability that the value is above the threshold, assuming
+        # Gaussian forecast errors; the reported figure is the peak over the horizon.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(std > 0, (mean - threshold) / std, 0.0)
+        standard = NormalDist()
+        probabilities = np.array([standard.cdf(score) for score in scores.tolist()])
+        probabilities = np.where(std > 0, probabilities, exceeds.astype(float))
+        
+        summary = {
+            "sensor_type": sensor_type,
+            "hours_ahead": hours_ahead,
+            "threshold": threshold,
+            "current_value": model.last_value,
+            "predicted_value": float(mean[-1]),
+            "predicted_max": float(mean.max()),
+            "confidence_interval": {
+                "level": 1 - alpha,
+                "lower": float(interval["lower"][-1]),
+                "upper": float(interval["upper"][-1])
+            },
+            "threshold_exceeded": crossing_step is not None,
+            "time_to_threshold": crossing_step + 1 if crossing_step is not None else None,
+            "crossing_time": (start_time + timedelta(minutes=crossing_step + 1)).isoformat() if crossing_step is not None else None,
+            "exceedance_probability": float(probabilities.max())
+        }
+        
+        if full:
+            summary["predictions"] = [
+                {
+                    "timestamp": (start_time + timedelta(minutes=i + 1)).isoformat(),
+                    "value": float(mean[i]),
+                    "lower": float(interval["lower"][i]),
+                    "upper": float(interval["upper"][i]),
+                    "exceeds_threshold": bool(exceeds[i])
+                }
+                for i in range(steps)
+            ]
+        
+        return summary
+    
     def will_exceed_threshold(self, prediction_data):
         if not prediction_data:
             return False
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from utils import data_processor
+from utils.data_processor import preprocess_columnar, preprocess_records, preprocess_time_series, records_to_columns
+
+def make_records(count, start="2025-03-30T00:00:00", suffix="Z"):
+    base = np.datetime64(start)
+    return [
+        {"time": f"{base + np.timedelta64(i * 10, 's')}{suffix}", "value": 70.0 + i % 7}
+        for i in range(count)
+    ]
+
+@pytest.mark.parametrize("suffix", ["Z", "+00:00", ""])
+def test_utc_and_naive_strings_parse_to_the_same_epoch(suffix):
+    times, values = records_to_columns(make_records(3, suffix=suffix))
+    assert times.tolist() == [1743292800.0, 1743292810.0, 1743292820.0]
+    assert values.tolist() == [70.0, 71.0, 72.0]
+
+def test_other_offsets_are_converted_to_utc():
+    times, _ = records_to_columns([{"time": "2025-03-30T02:00:00+02:00", "value": 1.0}])
+    assert times.tolist() == [1743292800.0]
+
+def test_epoch_times_and_missing_values():
+    times, values = records_to_columns([{"time": 10, "value": 1.5}, {"time": 20.5, "value": None}])
+    assert times.tolist() == [10.0, 20.5]
+    assert values[0] == 1.5 and np.isnan(values[1])
+
+def test_matches_the_pandas_path():
+    records = make_records(500)
+    legacy = preprocess_time_series(records, "value")
+    fast = preprocess_records(records, "value")
+    assert np.allclose(legacy["value"].to_numpy(), fast["value"].to_numpy(), equal_nan=True)
+
+def test_cache_hit_skips_conversion(monkeypatch):
+    records = make_records(100)
+    first = preprocess_records(records, "value", cache_key=("test", 1))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("timestamps parsed on a cache hit")
+
+    monkeypatch.setattr(data_processor, "_to_epoch_seconds", fail)
+    again = preprocess_records(records, "value", cache_key=("test", 1))
+    assert again.equals(first)
+
+    # A new reading at the end changes the signature
+    monkeypatch.undo()
+    longer = preprocess_records(records + make_records(1, start="2025-03-30T01:00:00"), "value", cache_key=("test", 1))
+    assert len(longer) > len(first)
+
+def test_changed_values_miss_the_cache():
+    records = make_records(100)
+    first = preprocess_records(records, "value", cache_key=("values", 1))
+
+    # Same count and time range, one corrected reading
+    corrected = [dict(record) for record in records]
+    corrected[50]["value"] = 500.0
+    again = preprocess_records(corrected, "value", cache_key=("values", 1))
+    assert again["value"].max() > first["value"].max()
+
+    times, values = records_to_columns(records)
+    preprocess_columnar(times, values, cache_key=("values", 2))
+    values[50] = 500.0
+    assert preprocess_columnar(times, values, cache_key=("values", 2))["value"].max() > first["value"].max()
+
+def test_cached_frames_are_copies():
+    times = np.arange(0, 600, 10, dtype=np.float64)
+    values = np.ones_like(times)
+    preprocess_columnar(times, values, cache_key=("copy", 1))["value"] = 0.0
+    assert (preprocess_columnar(times, values, cache_key=("copy", 1))["value"] == 1.0).all()
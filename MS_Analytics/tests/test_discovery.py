@@ -0,0 +1,82 @@
+import zlib
+
+from utils.discovery import ServiceDiscovery
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {"ETag": etag} if etag else {}
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+class FakeSession:
+    # Answers catalog lookups from a queue and records what was asked
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+def discovery(*responses, ttl=30):
+    service = ServiceDiscovery("http://catalog:8080", ttl=ttl, watch=False)
+    service.session = FakeSession(*responses)
+    return service
+
+def test_lookup_uses_the_catalog_service_route():
+    service = discovery(FakeResponse(200, {"service_id": "control_center"}, '"4"'))
+
+    assert service.lookup("control_center") == {"service_id": "control_center"}
+    assert service.session.requests == [("http://catalog:8080/service/control_center", {})]
+
+def test_fresh_entries_are_served_from_cache():
+    service = discovery(FakeResponse(200, {"service_id": "control_center"}, '"4"'))
+
+    service.lookup("control_center")
+    service.lookup("control_center")
+    assert len(service.session.requests) == 1
+
+def test_expired_entries_are_revalidated_with_their_etag():
+    cached = {"service_id": "control_center"}
+    service = discovery(FakeResponse(200, cached, '"4"'), FakeResponse(304), ttl=0)
+    service.stale_ttl = 0
+
+    service.lookup("control_center")
+    assert service.lookup("control_center") == cached
+    assert service.session.requests[1][1] == {"If-None-Match": '"4"'}
+
+def test_missing_service_drops_the_cache_entry():
+    service = discovery(FakeResponse(200, {"service_id": "control_center"}, '"4"'), FakeResponse(404, {}), ttl=0)
+    service.stale_ttl = 0
+
+    service.lookup("control_center")
+    assert service.lookup("control_center") is None
+    assert "control_center" not in service.cache
+
+def test_change_feed_updates_cached_entries():
+    service = discovery(FakeResponse(200, {"service_id": "control_center", "status": "active"}, '"4"'))
+    service.lookup("control_center")
+
+    service._apply_change({"id": "control_center", "op": "put", "data": {"service_id": "control_center", "status": "moved"}})
+    assert service.lookup("control_center")["status"] == "moved"
+
+    service._apply_change({"id": "control_center", "op": "delete", "data": None})
+    assert "control_center" not in service.cache
+
+def test_partitioned_group_resolves_the_owning_instance():
+    group = {"service_id": "control_center", "metadata": {"partitions": 8, "instance_count": 2, "instance_prefix": "control_center_"}}
+    owner = zlib.crc32(b"line_a") % 8 % 2
+    service = discovery(FakeResponse(200, group, '"4"'), FakeResponse(200, {"service_id": f"control_center_{owner}"}, '"4"'))
+
+    assert service.lookup_instance("control_center", "line_a") == {"service_id": f"control_center_{owner}"}
+    assert service.session.requests[1][0] == f"http://catalog:8080/service/control_center_{owner}"
+
+def test_single_instance_is_returned_as_is():
+    single = {"service_id": "control_center", "metadata": {"endpoint": "http://cc:8082"}}
+    service = discovery(FakeResponse(200, single, '"4"'))
+
+    assert service.lookup_instance("control_center", "line_a") == single
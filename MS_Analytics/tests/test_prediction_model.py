@@ -0,0 +1,160 @@
+import warnings
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.prediction_model import ARIMAModel, FastARModel
+
+def ar_series(size, seed, phi=0.8, drift=0.5):
+    # Integrated AR(1): the differences follow an AR(1) around a drift
+    rng = np.random.default_rng(seed)
+    steps = np.zeros(size)
+    for i in range(1, size):
+        steps[i] = drift + phi * (steps[i - 1] - drift) + rng.normal(0, 0.2)
+    index = pd.date_range("2025-03-30", periods=size, freq="1min")
+    return pd.Series(70 + np.cumsum(steps), index=index)
+
+def rmse(predicted, actual):
+    return float(np.sqrt(np.mean((np.asarray(predicted, dtype=float) - np.asarray(actual, dtype=float)) ** 2)))
+
+def test_validation_error_is_relative_to_persistence():
+    series = ar_series(600, seed=0)
+    assert FastARModel().validation_error(series) < 1.0
+
+def test_flat_series_has_no_error():
+    assert FastARModel().validation_error(np.full(200, 70.0)) == 0.0
+
+def test_short_series_cannot_be_validated():
+    assert FastARModel().validation_error(np.arange(20, dtype=float)) is None
+
+def test_fast_model_is_about_as_accurate_as_arima():
+    errors = {"fast_ar": [], "arima": []}
+    for seed in range(3):
+        series = ar_series(480, seed=seed)
+        train, test = series[:-30], series[-30:]
+        for model in (FastARModel(), ARIMAModel(p=1, d=1, q=0)):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                assert model.fit(train)
+                errors[model.kind].append(rmse(model.predict(steps=len(test)), test))
+    
+    assert np.mean(errors["fast_ar"]) <= 1.25 * np.mean(errors["arima"])
+
+def test_state_round_trip_keeps_the_forecast():
+    model = FastARModel()
+    assert model.fit(ar_series(300, seed=4))
+    
+    restored = FastARModel()
+    assert restored.restore_state(model.get_state())
+    assert np.allclose(restored.predict(steps=15), model.predict(steps=15))
+
+@pytest.fixture
+def prediction_service(monkeypatch, tmp_path):
+    from services.prediction_service import PredictionService
+    
+    monkeypatch.setenv("TEMPERATURE_THRESHOLD", "85")
+    monkeypatch.setenv("PRESSURE_THRESHOLD", "90")
+    monkeypatch.setenv("MODEL_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("FORECASTER_TEMPERATURE", "fast")
+    monkeypatch.setenv("FORECASTER_PRESSURE", "fast")
+    monkeypatch.setenv("MODEL_MAX_AGE", "3600")
+    return PredictionService
+
+def test_unknown_forecaster_is_rejected(prediction_service, monkeypatch):
+    monkeypatch.setenv("FORECASTER_PRESSURE", "holt")
+    with pytest.raises(ValueError):
+        prediction_service()
+
+def test_fast_model_losing_to_persistence_falls_back_to_arima(prediction_service, monkeypatch):
+    import services.prediction_service as module
+    
+    monkeypatch.setenv("FAST_MODEL_MAX_ERROR_RATIO", "0.5")
+    monkeypatch.setattr(module, "find_best_arima_params", lambda series: (1, 1, 0))
+    service = prediction_service()
+    
+    # White noise around a level: persistence is as good as an AR model gets
+    noise = pd.Series(70 + np.random.default_rng(0).normal(0, 1, 400))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert service._fit_forecaster("temperature", noise).kind == ARIMAModel.kind
+        assert service._fit_forecaster("temperature", ar_series(600, seed=0)).kind == FastARModel.kind
+
+def stored_fast_model(service, age=0):
+    import models.model_store as store
+    
+    class SavedAt(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) - timedelta(seconds=age)
+    
+    model = FastARModel()
+    model.fit(ar_series(300, seed=0))
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(store, "datetime", SavedAt)
+        service.model_store.save("temperature", model, "fast")
+
+def test_stored_model_is_loaded_when_the_setting_matches(prediction_service, monkeypatch):
+    service = prediction_service()
+    stored_fast_model(service)
+    monkeypatch.setattr(service, "train_models", lambda: pytest.fail("retrained a matching model"))
+    
+    assert service._ensure_model("temperature")
+    assert service.temperature_model.kind == FastARModel.kind
+
+def test_fresh_stored_model_is_loaded(prediction_service, monkeypatch):
+    service = prediction_service()
+    stored_fast_model(service, age=3000)
+    monkeypatch.setattr(service, "train_models", lambda: pytest.fail("retrained a fresh model"))
+    
+    assert service._ensure_model("temperature")
+    assert not service._is_stale(service.trained_at["temperature"])
+
+def test_stale_stored_model_is_retrained(prediction_service, monkeypatch, capsys):
+    service = prediction_service()
+    stored_fast_model(service, age=4000)
+    trained = []
+    monkeypatch.setattr(service, "train_models", lambda: trained.append(True) or False)
+    
+    assert not service._ensure_model("temperature")
+    assert trained
+    assert "older than MODEL_MAX_AGE=3600s" in capsys.readouterr().out
+
+def test_expired_model_in_memory_is_retrained_and_kept_if_that_fails(prediction_service, monkeypatch):
+    service = prediction_service()
+    stored_fast_model(service)
+    assert service._ensure_model("temperature")
+    
+    service.trained_at["temperature"] -= timedelta(seconds=4000)
+    stored_fast_model(service, age=4000)
+    trained = []
+    monkeypatch.setattr(service, "train_models", lambda: trained.append(True) or False)
+    
+    assert service._ensure_model("temperature")
+    assert trained
+
+def test_stored_model_for_another_setting_is_retrained(prediction_service, monkeypatch, capsys):
+    stored_fast_model(prediction_service())
+    monkeypatch.setenv("FORECASTER_TEMPERATURE", "arima")
+    service = prediction_service()
+    trained = []
+    monkeypatch.setattr(service, "train_models", lambda: trained.append(True) or False)
+    
+    assert not service._ensure_model("temperature")
+    assert trained
+    assert "FORECASTER_TEMPERATURE=fast, now arima" in capsys.readouterr().out
+
+def test_exceedance_probability_follows_the_interval(prediction_service):
+    service = prediction_service()
+    stored_fast_model(service)
+    
+    service.temperature_threshold = 1000.0
+    assert service.forecast("temperature")["exceedance_probability"] < 1e-6
+    
+    service.temperature_threshold = 0.0
+    assert service.forecast("temperature")["exceedance_probability"] == pytest.approx(1.0)
+    
+    summary = service.forecast("temperature")
+    service.temperature_threshold = summary["predicted_max"]
+    assert 0.4 < service.forecast("temperature")["exceedance_probability"] < 0.6
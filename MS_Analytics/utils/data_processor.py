@@ -1,21 +1,159 @@
-import pandas as pd
 import numpy as np
-from statsmodels.tsa.stattools import adfuller
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+RESAMPLE_CACHE_SIZE = 64
+
+_resample_cache = OrderedDict()
+_resample_cache_lock = threading.Lock()
 
 def preprocess_time_series(data, column_name):
+    import pandas as pd
+    
     df = pd.DataFrame(data)
     
     if 'time' in df.columns:
         df['time'] = pd.to_datetime(df['time'])
         df.set_index('time', inplace=True)
     
-    df[column_name].interpolate(method='time', inplace=True)
+    df[column_name] = df[column_name].interpolate(method='time')
+    
+    df = df[[column_name]].resample('1min').mean()
+    
+    return df
+
+def _strip_utc(value):
+    if value.endswith('Z'):
+        return value[:-1]
+    if value.endswith('+00:00'):
+        return value[:-6]
+    return value
+
+def _to_epoch_seconds(raw_times):
+    if raw_times and all(isinstance(value, (int, float)) for value in raw_times):
+        return np.asarray(raw_times, dtype=np.float64)
+    
+    # UTC or naive ISO strings, which is what the connector returns, parse in one
+    # datetime64 conversion; anything with another offset goes through pandas
+    stripped = [_strip_utc(str(value)) for value in raw_times]
+    if not any('+' in value[10:] or '-' in value[10:] for value in stripped):
+        parsed = np.array(stripped, dtype='datetime64[us]')
+        return parsed.astype(np.int64) / 1e6
+    
+    import pandas as pd
+    parsed = pd.to_datetime([str(value) for value in raw_times], utc=True)
+    return ((parsed - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+def _record_values(data, column_name):
+    return np.array([record.get(column_name) for record in data], dtype=np.float64)
+
+def records_to_columns(data, column_name="value"):
+    times = _to_epoch_seconds([record["time"] for record in data])
+    return times, _record_values(data, column_name)
+
+def _values_digest(values):
+    # Hashing the raw bytes takes a few milliseconds for a week of readings, and
+    # catches corrected or backfilled values that keep the same time range
+    return hash(values.tobytes())
+
+def _cached_frame(cache_key, signature):
+    with _resample_cache_lock:
+        cached = _resample_cache.get(cache_key)
+        if cached is None or cached[0] != signature:
+            return None
+        _resample_cache.move_to_end(cache_key)
+        return cached[1].copy()
+
+def _cache_frame(cache_key, signature, df):
+    with _resample_cache_lock:
+        _resample_cache[cache_key] = (signature, df)
+        _resample_cache.move_to_end(cache_key)
+        while len(_resample_cache) > RESAMPLE_CACHE_SIZE:
+            _resample_cache.popitem(last=False)
+
+def preprocess_records(data, column_name="value", cache_key=None, bucket_seconds=60):
+    if cache_key is None or not data:
+        times, values = records_to_columns(data, column_name)
+        return preprocess_columnar(times, values, column_name, bucket_seconds=bucket_seconds)
+    
+    # The cache is checked before the timestamps are parsed, so a hit skips the
+    # expensive part of the conversion
+    values = _record_values(data, column_name)
+    signature = (len(data), data[0]["time"], data[-1]["time"], _values_digest(values), bucket_seconds)
+    cached = _cached_frame(cache_key, signature)
+    if cached is not None:
+        return cached
+    
+    times = _to_epoch_seconds([record["time"] for record in data])
+    df = preprocess_columnar(times, values, column_name, bucket_seconds=bucket_seconds)
+    
+    _cache_frame(cache_key, signature, df)
+    return df.copy()
+
+def preprocess_columnar(times, values, column_name="value", cache_key=None, time_unit="s", bucket_seconds=60):
+    import pandas as pd
+    
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    
+    if time_unit == "ms":
+        times = times / 1000.0
+    elif time_unit != "s":
+        raise ValueError(f"Unsupported time unit: {time_unit}")
+    
+    if times.size == 0:
+        return pd.DataFrame({column_name: []}, index=pd.DatetimeIndex([], tz='UTC'))
     
-    df = df.resample('1min').mean()
+    if cache_key is not None:
+        signature = (times.size, times[0], times[-1], _values_digest(values), bucket_seconds)
+        cached = _cached_frame(cache_key, signature)
+        if cached is not None:
+            return cached
+    
+    if times.size > 1 and np.any(np.diff(times) < 0):
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        values = values[order]
+    
+    # Fill gaps in the raw readings the same way interpolate(method='time') does:
+    # linear in time between known values, leading gaps are left out.
+    finite = np.isfinite(values)
+    if not finite.all():
+        if not finite.any():
+            return pd.DataFrame({column_name: []}, index=pd.DatetimeIndex([], tz='UTC'))
+        
+        values = values.copy()
+        values[~finite] = np.interp(times[~finite], times[finite], values[finite])
+        keep = times >= times[finite][0]
+        times = times[keep]
+        values = values[keep]
+    
+    origin = np.floor(times[0] / bucket_seconds) * bucket_seconds
+    buckets = ((times - origin) // bucket_seconds).astype(np.int64)
+    size = int(buckets[-1]) + 1
+    
+    sums = np.bincount(buckets, weights=values, minlength=size)
+    counts = np.bincount(buckets, minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    
+    index = pd.date_range(
+        start=pd.Timestamp(origin, unit='s', tz='UTC'),
+        periods=size,
+        freq=pd.Timedelta(seconds=bucket_seconds)
+    )
+    df = pd.DataFrame({column_name: means}, index=index)
+    
+    if cache_key is not None:
+        _cache_frame(cache_key, signature, df)
+        return df.copy()
     
     return df
 
 def check_stationarity(time_series):
+    from statsmodels.tsa.stattools import adfuller
+    
     result = adfuller(time_series.dropna())
     is_stationary = result[1] <= 0.05
     return is_stationary
@@ -0,0 +1,162 @@
+import threading
+import time
+import requests
+
+from utils.partitioning import PartitionAssignment
+
+class ServiceDiscovery:
+    def __init__(self, catalog_url, ttl=30, stale_ttl=300, timeout=3, watch=True):
+        self.catalog_url = catalog_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.cache = {}
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+        self.watch_thread = None
+        if watch and catalog_url:
+            self.watch_thread = threading.Thread(target=self._watch_loop)
+            self.watch_thread.daemon = True
+            self.watch_thread.start()
+
+    def lookup(self, name):
+        with self.lock:
+            entry = self.cache.get(name)
+
+        if entry:
+            age = time.monotonic() - entry["fetched_at"]
+            if age < self.ttl:
+                return entry["value"]
+            if age < self.stale_ttl:
+                # Serve the stale entry right away and refresh it off the request path
+                self._refresh_in_background(name)
+                return entry["value"]
+
+        return self._fetch(name)
+
+    def lookup_instance(self, name, key=None):
+        # A service scaled out over partitions registers a group record under its
+        # logical name and one record per instance: resolve the instance owning key
+        service = self.lookup(name)
+        metadata = (service or {}).get("metadata") or {}
+        instance_count = metadata.get("instance_count")
+        if not instance_count:
+            return service
+        
+        index = PartitionAssignment(metadata["partitions"], instance_count).owner_of(key) if key is not None else 0
+        return self.lookup(f"{metadata['instance_prefix']}{index}")
+
+    def invalidate(self, name=None):
+        with self.lock:
+            if name is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(name, None)
+
+    def _refresh_in_background(self, name):
+        with self.lock:
+            if name in self.refreshing:
+                return
+            self.refreshing.add(name)
+
+        def refresh():
+            try:
+                self._fetch(name)
+            finally:
+                with self.lock:
+                    self.refreshing.discard(name)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+    def _fetch(self, name):
+        with self.lock:
+            entry = self.cache.get(name)
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        try:
+            response = self.session.get(
+                f"{self.catalog_url}/service/{name}",
+                headers=headers,
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            # Catalog unreachable: a stale answer beats none
+            print(f"Error looking up {name} in Resource Catalog: {e}")
+            return entry["value"] if entry else None
+
+        if response.status_code == 304 and entry:
+            value = entry["value"]
+        elif response.status_code == 200:
+            value = response.json()
+        else:
+            if response.status_code == 404:
+                self.invalidate(name)
+            print(f"Failed to look up {name} in Resource Catalog: {response.status_code} {response.text}")
+            return None
+
+        with self.lock:
+            self.cache[name] = {
+                "value": value,
+                "etag": response.headers.get("ETag"),
+                "fetched_at": time.monotonic()
+            }
+        return value
+
+    def _apply_change(self, change):
+        data = change.get("data") or {}
+        with self.lock:
+            for name, entry in list(self.cache.items()):
+                value = entry["value"] or {}
+                if change["id"] not in (name, value.get("service_id")) and data.get("name") != name:
+                    continue
+
+                if change["op"] == "delete":
+                    del self.cache[name]
+                else:
+                    self.cache[name] = {"value": data, "etag": None, "fetched_at": time.monotonic()}
+
+    def _watch_loop(self):
+        # Long-poll the catalog change feed so cached entries follow re-registrations immediately
+        watch_session = requests.Session()
+        revision = None
+        failures = 0
+
+        while True:
+            try:
+                params = {"kind": "service", "timeout": 30}
+                if revision is not None:
+                    params["since"] = revision
+
+                response = watch_session.get(
+                    f"{self.catalog_url}/changes",
+                    params=params,
+                    timeout=self.timeout + 30
+                )
+
+                if response.status_code == 410:
+                    # Fell behind the feed's history: start over from scratch
+                    self.invalidate()
+                    revision = response.json().get("revision")
+                elif response.status_code == 200:
+                    data = response.json()
+                    for change in data.get("changes", []):
+                        self._apply_change(change)
+                    revision = data.get("revision")
+                else:
+                    raise Exception(f"Unexpected status {response.status_code}")
+
+                failures = 0
+            except Exception as e:
+                failures += 1
+                sleep_time = min(2 ** failures, 60)
+                if failures == 1:
+                    print(f"Resource Catalog watch failed, retrying with backoff: {e}")
+                time.sleep(sleep_time)
@@ -0,0 +1,43 @@
+import zlib
+
+def partition_for(key, partitions):
+    # crc32 rather than hash(), which is salted per process: every publisher
+    # and every Control Center instance must agree on a pipeline's partition
+    return zlib.crc32(str(key).encode()) % partitions
+
+def partition_topic(topic, key, partitions):
+    # /sensor/temperature -> /sensor/temperature/<partition>, unchanged when partitioning is off
+    if partitions <= 0:
+        return topic
+    return f"{topic}/{partition_for(key, partitions)}"
+
+class PartitionAssignment:
+    # The partitions one Control Center instance owns out of instance_count:
+    # every instance_count-th partition, starting at its index
+    def __init__(self, partitions, instance_count=1, instance_index=0):
+        if partitions <= 0:
+            raise ValueError("partitions must be positive")
+        if instance_count <= 0 or not 0 <= instance_index < instance_count:
+            raise ValueError(f"instance index {instance_index} out of range for {instance_count} instances")
+        if instance_count > partitions:
+            raise ValueError(f"{instance_count} instances need at least as many partitions, got {partitions}")
+
+        self.partitions = partitions
+        self.instance_count = instance_count
+        self.instance_index = instance_index
+        self.owned = [p for p in range(partitions) if p % instance_count == instance_index]
+        self.owned_set = frozenset(self.owned)
+
+    def owner_of(self, key):
+        return partition_for(key, self.partitions) % self.instance_count
+
+    def owns(self, key):
+        return partition_for(key, self.partitions) in self.owned_set
+
+    def to_dict(self):
+        return {
+            "partitions": self.partitions,
+            "instance_count": self.instance_count,
+            "instance_index": self.instance_index,
+            "owned_partitions": self.owned
+        }
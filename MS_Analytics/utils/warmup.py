@@ -0,0 +1,29 @@
+import importlib
+import threading
+import time
+
+HEAVY_MODULES = [
+    "pandas",
+    "scipy.stats",
+    "sklearn.ensemble",
+    "statsmodels.tsa.stattools",
+    "statsmodels.tsa.arima.model",
+    "statsmodels.tsa.statespace.sarimax"
+]
+
+def import_heavy_modules():
+    start_time = time.perf_counter()
+    
+    for module_name in HEAVY_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Failed to import {module_name} during warm-up: {e}")
+    
+    print(f"Analytics libraries loaded in {time.perf_counter() - start_time:.2f}s")
+
+def start_background_warmup():
+    warmup_thread = threading.Thread(target=import_heavy_modules)
+    warmup_thread.daemon = True
+    warmup_thread.start()
+    return warmup_thread
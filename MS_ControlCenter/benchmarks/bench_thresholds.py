@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.simulation_service import SimulationService
+from utils.rule_engine import RuleEngine
+from utils.threshold_utils import ThresholdUtils
+
+# Run from the service directory: python benchmarks/bench_thresholds.py
+# BENCH_ROWS and BENCH_REPEAT set the number of readings and timed runs. The
+# replay is timed once, it takes about a second per million rows.
+
+def timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    # A week of readings at 1 Hz by default
+    rows = int(os.getenv("BENCH_ROWS", 7 * 24 * 3600))
+    repeat = int(os.getenv("BENCH_REPEAT", 3))
+
+    rng = np.random.default_rng(0)
+    pressure = rng.normal(100, 30, rows)
+    temperature = rng.normal(50, 20, rows)
+    utils = ThresholdUtils(pressure_min=30, pressure_max=150, temperature_min=10, temperature_max=80)
+    engine = RuleEngine(utils.to_rules(), hysteresis={"pressure": 5, "temperature": 2})
+    simulation = SimulationService(utils, None, engine, min_dwell=30)
+    series = {"pipeline": {"pressure": pressure, "temperature": temperature, "time": np.arange(rows, dtype=float)}}
+
+    def scalar_loop():
+        pressure_list = pressure.tolist()
+        temperature_list = temperature.tolist()
+        return [
+            (
+                utils.get_valve_action(p, t),
+                utils.is_pressure_critical(p),
+                utils.is_temperature_critical(t)
+            )
+            for p, t in zip(pressure_list, temperature_list)
+        ]
+
+    def batch():
+        return utils.evaluate_batch(pressure, temperature)
+
+    per_row_max = np.full(rows, 150.0)
+    per_row_max[rows // 2:] = 140.0
+
+    def simulate_batch():
+        return simulation.simulate(series, {"pressure_max": per_row_max})
+
+    def simulate_replay():
+        return simulation.simulate(series, mode="replay")
+
+    loop_time = timeit(scalar_loop, 1)
+    batch_time = timeit(batch, repeat)
+    simulate_time = timeit(simulate_batch, repeat)
+    replay_time = timeit(simulate_replay, 1)
+
+    print(f"rows: {rows}")
+    print(f"scalar loop:                  {loop_time * 1000:9.1f} ms")
+    print(f"evaluate_batch:               {batch_time * 1000:9.1f} ms  ({loop_time / batch_time:.0f}x)")
+    print(f"simulate, batch (per-row):    {simulate_time * 1000:9.1f} ms")
+    print(f"simulate, replay:             {replay_time * 1000:9.1f} ms  ({replay_time / simulate_time:.0f}x batch)")
+
+if __name__ == "__main__":
+    main()
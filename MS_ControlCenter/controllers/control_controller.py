@@ -1,9 +1,13 @@
 import cherrypy
 import json
+import requests
+from services.simulation_service import THRESHOLD_FIELDS
 
 class ControlController:
-    def __init__(self, control_service):
+    def __init__(self, control_service, simulation_service=None, config_manager=None):
         self.control_service = control_service
+        self.simulation_service = simulation_service
+        self.config_manager = config_manager
     
     @cherrypy.expose
     @cherrypy.tools.json_in()
@@ -20,7 +24,23 @@ class ControlController:
             if command not in ["OPEN", "CLOSE"]:
                 raise cherrypy.HTTPError(400, "Invalid command. Must be 'OPEN' or 'CLOSE'")
             
-            success = self.control_service.process_manual_command(command)
+            assignment = self.control_service.assignment
+            if assignment is not None:
+                # Only the instance owning the pipeline tracks its valves and receives their acks
+                pipeline_id = data.get("pipeline_id")
+                if not pipeline_id:
+                    raise cherrypy.HTTPError(400, "Missing 'pipeline_id' field, required in scale-out mode")
+                if not self.control_service.owns(pipeline_id):
+                    raise cherrypy.HTTPError(
+                        421,
+                        f"Pipeline {pipeline_id} is handled by instance {assignment.owner_of(pipeline_id)}"
+                    )
+            
+            success = self.control_service.process_manual_command(
+                command,
+                data.get("pipeline_id"),
+                data.get("valve_id")
+            )
             
             if success:
                 return {"status": "success", "message": f"Command {command} sent successfully"}
@@ -31,8 +51,89 @@ class ControlController:
     
     @cherrypy.expose
     @cherrypy.tools.json_out()
-    def status(self):
+    def status(self, pipeline_id=None):
+        if cherrypy.request.method == 'GET':
+            return self.control_service.get_latest_status(pipeline_id)
+        else:
+            raise cherrypy.HTTPError(405, "Method not allowed")
+    
+    @cherrypy.expose
+    @cherrypy.tools.json_in()
+    @cherrypy.tools.json_out()
+    def simulate(self):
+        if cherrypy.request.method != 'POST':
+            raise cherrypy.HTTPError(405, "Method not allowed")
+        if self.simulation_service is None:
+            raise cherrypy.HTTPError(503, "Simulation not available")
+        
+        data = cherrypy.request.json
+        if not isinstance(data, dict):
+            raise cherrypy.HTTPError(400, "Request body must be a JSON object")
+        
+        thresholds = data.get("thresholds") or {}
+        if not isinstance(thresholds, dict):
+            raise cherrypy.HTTPError(400, "'thresholds' must be an object")
+        unknown = set(thresholds) - set(THRESHOLD_FIELDS)
+        if unknown:
+            raise cherrypy.HTTPError(400, f"Unknown thresholds: {', '.join(sorted(unknown))}")
+        
+        inline = data.get("data")
+        per_row = [key for key, value in thresholds.items() if isinstance(value, list)]
+        if per_row and inline is None:
+            raise cherrypy.HTTPError(400, "Per-row thresholds require inline 'data'")
+        
+        include_rows = bool(data.get("include_rows", False))
+        mode = data.get("mode", "batch")
+        try:
+            if inline is not None:
+                if not isinstance(inline, dict):
+                    raise ValueError("'data' must be an object")
+                # A single series, or series keyed by pipeline id
+                series = {"inline": inline} if "pressure" in inline else inline
+                for pipeline_id, values in series.items():
+                    if not isinstance(values, dict) or "pressure" not in values or "temperature" not in values:
+                        raise ValueError(f"Series {pipeline_id} needs 'pressure' and 'temperature' arrays")
+                return self.simulation_service.simulate(series, thresholds, include_rows, mode)
+            
+            return self.simulation_service.simulate_history(
+                data.get("start"),
+                data.get("end"),
+                data.get("pipeline_id"),
+                thresholds,
+                include_rows,
+                mode
+            )
+        except (ValueError, TypeError) as e:
+            raise cherrypy.HTTPError(400, str(e))
+        except requests.RequestException as e:
+            raise cherrypy.HTTPError(502, f"Could not load history from the Time Series DB Connector: {str(e)}")
+    
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def config(self):
+        if cherrypy.request.method != 'GET':
+            raise cherrypy.HTTPError(405, "Method not allowed")
+        if self.config_manager is None:
+            raise cherrypy.HTTPError(503, "Configuration reload not available")
+        return self.config_manager.get_status()
+    
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def reload(self):
+        if cherrypy.request.method != 'POST':
+            raise cherrypy.HTTPError(405, "Method not allowed")
+        if self.config_manager is None:
+            raise cherrypy.HTTPError(503, "Configuration reload not available")
+        
+        reloaded = self.config_manager.reload()
+        status = self.config_manager.get_status()
+        status["reloaded"] = reloaded
+        return status
+    
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def metrics(self):
         if cherrypy.request.method == 'GET':
-            return self.control_service.get_latest_status()
+            return {"latency": self.control_service.latency.snapshot()}
         else:
             raise cherrypy.HTTPError(405, "Method not allowed")
\ No newline at end of file
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 from controllers.control_controller import ControlController
 from services.control_service import ControlService
 from services.mqtt_handler import MQTTHandler
-from utils.threshold_utils import ThresholdUtils
+from services.simulation_service import SimulationService
+from services.config_manager import ConfigManager
+from utils.partitioning import PartitionAssignment
 
 logging.basicConfig(
     level=logging.INFO,
@@ -26,6 +28,7 @@ def get_host_ip():
 def main():
     service_port = int(os.getenv("SERVICE_PORT", 8081))
     catalog_url = os.getenv("CATALOG_URL", "http://localhost:8080")
+    timeseries_url = os.getenv("TIMESERIES_CONNECTOR_URL", "http://localhost:8082")
     
     mqtt_host = os.getenv("MQTT_BROKER_HOST", "localhost")
     mqtt_port = int(os.getenv("MQTT_BROKER_PORT", 1883))
@@ -37,15 +40,65 @@ def main():
     pressure_max = float(os.getenv("PRESSURE_MAX_THRESHOLD", 150))
     temperature_min = float(os.getenv("TEMPERATURE_MIN_THRESHOLD", 10))
     temperature_max = float(os.getenv("TEMPERATURE_MAX_THRESHOLD", 80))
+    hysteresis = {
+        "pressure": float(os.getenv("PRESSURE_HYSTERESIS", 5)),
+        "temperature": float(os.getenv("TEMPERATURE_HYSTERESIS", 2))
+    }
+    min_dwell = float(os.getenv("MIN_DWELL_SECONDS", 30))
+    alert_interval = float(os.getenv("ALERT_MIN_INTERVAL_SECONDS", 300))
+    worker_count = int(os.getenv("WORKER_THREADS", 4))
+    queue_size = int(os.getenv("MESSAGE_QUEUE_SIZE", 10000))
+    ack_timeout = float(os.getenv("COMMAND_ACK_TIMEOUT", 5))
+    max_retries = int(os.getenv("COMMAND_MAX_RETRIES", 3))
+    rules_file = os.getenv("RULES_FILE", "")
+    config_name = os.getenv("CONFIG_NAME", "control_center")
+    config_poll_interval = float(os.getenv("CONFIG_POLL_INTERVAL", 30))
+    
+    # Scale-out mode when the sensor topics are partitioned; must match the publishers' MQTT_PARTITIONS
+    partitions = int(os.getenv("MQTT_PARTITIONS", 0))
+    instance_count = int(os.getenv("INSTANCE_COUNT", 1))
+    instance_index = int(os.getenv("INSTANCE_INDEX", 0))
+    share_group = os.getenv("MQTT_SHARE_GROUP", "control_center")
+    session_expiry = int(os.getenv("MQTT_SESSION_EXPIRY", 300))
+    assignment = None
+    if partitions > 0:
+        assignment = PartitionAssignment(partitions, instance_count, instance_index)
+        # Each instance needs its own session on the broker
+        mqtt_client_id = f"{mqtt_client_id}_{instance_index}"
+        logging.info(
+            f"Scale-out mode: instance {instance_index} of {instance_count}, "
+            f"partitions {assignment.owned} of {partitions}"
+        )
     
-    threshold_utils = ThresholdUtils(
-        pressure_min=pressure_min,
-        pressure_max=pressure_max,
-        temperature_min=temperature_min,
-        temperature_max=temperature_max
+    # Environment thresholds are the defaults; the catalog and the rules file override them at runtime
+    config_manager = ConfigManager(
+        {
+            "pressure_min": pressure_min,
+            "pressure_max": pressure_max,
+            "temperature_min": temperature_min,
+            "temperature_max": temperature_max
+        },
+        hysteresis,
+        rules_file=rules_file or None,
+        catalog_url=catalog_url,
+        config_name=config_name,
+        poll_interval=config_poll_interval
     )
+    config = config_manager.current
     
-    control_service = ControlService(None, threshold_utils, catalog_url)
+    control_service = ControlService(
+        None,
+        config.thresholds,
+        catalog_url,
+        config.rule_engine,
+        min_dwell=min_dwell,
+        alert_interval=alert_interval,
+        workers=worker_count,
+        queue_size=queue_size,
+        ack_timeout=ack_timeout,
+        max_retries=max_retries,
+        assignment=assignment
+    )
     
     host_ip = get_host_ip()
     control_service.update_service_info(host_ip, service_port)
@@ -55,9 +108,13 @@ def main():
             broker_host=mqtt_host,
             broker_port=mqtt_port,
             client_id=mqtt_client_id,
-            on_message_callback=control_service.handle_sensor_data,
+            on_message_callback=control_service.enqueue_sensor_data,
             username=mqtt_username if mqtt_username else None,
-            password=mqtt_password if mqtt_password else None
+            password=mqtt_password if mqtt_password else None,
+            on_ack_callback=control_service.handle_valve_ack,
+            assignment=assignment,
+            share_group=share_group,
+            session_expiry=session_expiry
         )
         
         control_service.mqtt_handler = mqtt_handler
@@ -73,7 +130,12 @@ def main():
         logging.warning("Control Center will run without MQTT capabilities")
         mqtt_handler = None
     
-    control_controller = ControlController(control_service)
+    simulation_service = SimulationService(config.thresholds, timeseries_url, config.rule_engine, min_dwell)
+    config_manager.add_listener(control_service.apply_config)
+    config_manager.add_listener(simulation_service.apply_config)
+    config_manager.start()
+    
+    control_controller = ControlController(control_service, simulation_service, config_manager)
     
     conf = {
         '/': {
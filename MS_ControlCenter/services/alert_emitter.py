@@ -0,0 +1,92 @@
+import logging
+import queue
+import threading
+import time
+import requests
+
+class AlertEmitter:
+    def __init__(self, catalog_url, min_interval=300, max_pending=1000):
+        self.catalog_url = catalog_url
+        self.min_interval = min_interval
+
+        self.last_sent = {}
+        self.suppressed = {}
+        self.lock = threading.Lock()
+
+        # Alerts are posted by a background thread so a slow catalog never
+        # holds up rule evaluation
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.session = requests.Session()
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self.sender_thread = threading.Thread(target=self._sender, name="alert-sender")
+        self.sender_thread.daemon = True
+        self.sender_thread.start()
+
+    def emit(self, key, alert_data):
+        # At most one alert per key every min_interval seconds; the next one
+        # that goes out reports how many were held back in between
+        now = time.monotonic()
+        with self.lock:
+            last = self.last_sent.get(key)
+            if last is not None and now - last < self.min_interval:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+
+            self.last_sent[key] = now
+            suppressed = self.suppressed.pop(key, 0)
+
+        if suppressed:
+            alert_data["suppressed_alerts"] = suppressed
+
+        try:
+            self.pending.put_nowait(alert_data)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            logging.warning("Alert queue full - alert dropped")
+            return False
+        return True
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                "keys": len(self.last_sent),
+                "suppressed_alerts": sum(self.suppressed.values()),
+                "pending": self.pending.qsize(),
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
+
+    def _sender(self):
+        while True:
+            alert_data = self.pending.get()
+            sent = self._send(alert_data)
+            with self.lock:
+                if sent:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def _send(self, alert_data):
+        try:
+            response = self.session.post(
+                f"{self.catalog_url}/alerts",
+                json=alert_data,
+                timeout=5
+            )
+
+            if response.status_code == 200 or response.status_code == 201:
+                logging.info("Alert notification sent successfully")
+                return True
+            else:
+                logging.warning(f"Failed to send alert notification: {response.status_code}")
+
+        except requests.exceptions.ConnectionError:
+            logging.warning("Resource Catalog not available - could not send alert")
+        except Exception as e:
+            logging.warning(f"Error sending alert notification: {str(e)}")
+        return False
@@ -0,0 +1,101 @@
+import threading
+import time
+
+class PendingCommand:
+    __slots__ = (
+        "command_id", "action", "pipeline_id", "valve_id", "trace",
+        "first_sent", "last_sent", "attempts", "timeout"
+    )
+
+    def __init__(self, command_id, action, pipeline_id, valve_id, trace, sent_at, timeout):
+        self.command_id = command_id
+        self.action = action
+        self.pipeline_id = pipeline_id
+        self.valve_id = valve_id
+        self.trace = trace
+        self.first_sent = sent_at
+        self.last_sent = sent_at
+        self.attempts = 1
+        self.timeout = timeout
+
+class CommandTracker:
+    def __init__(self, ack_timeout=5, max_retries=3):
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+
+        self.pending = {}
+        # Latest pending command id per valve, so a newer command supersedes older ones
+        self.by_valve = {}
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "sent": 0,
+            "acked": 0,
+            "failed": 0,
+            "retried": 0,
+            "timed_out": 0,
+            "superseded": 0,
+            "unknown_acks": 0
+        }
+
+    def add(self, command_id, action, pipeline_id, valve_id, trace, sent_at):
+        valve_key = (pipeline_id, valve_id)
+        with self.lock:
+            previous_id = self.by_valve.get(valve_key)
+            if previous_id is not None and self.pending.pop(previous_id, None) is not None:
+                self.stats["superseded"] += 1
+
+            self.pending[command_id] = PendingCommand(
+                command_id, action, pipeline_id, valve_id, trace, sent_at, self.ack_timeout
+            )
+            self.by_valve[valve_key] = command_id
+            self.stats["sent"] += 1
+
+    def acknowledge(self, command_id, success):
+        with self.lock:
+            command = self.pending.pop(command_id, None)
+            if command is None:
+                # Duplicate ack, or for a command that was superseded or timed out
+                self.stats["unknown_acks"] += 1
+                return None
+
+            self._forget_valve(command)
+            self.stats["acked" if success else "failed"] += 1
+            return command
+
+    def collect_due(self, now):
+        # Commands whose ack is overdue: retried with a doubled timeout until
+        # max_retries is reached, then given up on
+        retries = []
+        expired = []
+        with self.lock:
+            for command in list(self.pending.values()):
+                if now - command.last_sent < command.timeout:
+                    continue
+
+                if command.attempts > self.max_retries:
+                    del self.pending[command.command_id]
+                    self._forget_valve(command)
+                    self.stats["timed_out"] += 1
+                    expired.append(command)
+                else:
+                    command.attempts += 1
+                    command.last_sent = now
+                    command.timeout *= 2
+                    self.stats["retried"] += 1
+                    retries.append(command)
+        return retries, expired
+
+    def _forget_valve(self, command):
+        valve_key = (command.pipeline_id, command.valve_id)
+        if self.by_valve.get(valve_key) == command.command_id:
+            del self.by_valve[valve_key]
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self.pending)
+            stats["oldest_pending_s"] = round(
+                time.monotonic() - min(command.first_sent for command in self.pending.values()), 3
+            ) if self.pending else None
+            return stats
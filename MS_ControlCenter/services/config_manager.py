@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+import requests
+from utils.rule_engine import RuleEngine
+from utils.threshold_utils import ThresholdUtils
+
+THRESHOLD_KEYS = ["pressure_min", "pressure_max", "temperature_min", "temperature_max"]
+
+class ControlConfig:
+    __slots__ = ("thresholds", "rule_engine", "version", "source", "loaded_at")
+
+    def __init__(self, thresholds, rule_engine, version, source):
+        self.thresholds = thresholds
+        self.rule_engine = rule_engine
+        self.version = version
+        self.source = source
+        self.loaded_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "thresholds": {key: getattr(self.thresholds, key) for key in THRESHOLD_KEYS},
+            "hysteresis": self.rule_engine.hysteresis,
+            "rule_tables": len(self.rule_engine.tables)
+        }
+
+class ConfigManager:
+    def __init__(self, default_thresholds, default_hysteresis, rules_file=None, catalog_url=None,
+                 config_name="control_center", poll_interval=30, file_check_interval=2):
+        self.default_thresholds = dict(default_thresholds)
+        self.default_hysteresis = dict(default_hysteresis)
+        self.rules_file = rules_file
+        self.catalog_url = catalog_url
+        self.config_name = config_name
+        self.poll_interval = poll_interval
+        self.file_check_interval = file_check_interval
+
+        # Latest document from each source; the catalog one is overridden key by key by the file
+        self.catalog_document = {}
+        self.catalog_etag = None
+        self.file_document = {}
+        self.file_mtime = None
+
+        self.session = requests.Session()
+        self.listeners = []
+        self.version = 0
+        # Serializes reloads; readers never take it and just use self.current
+        self.reload_lock = threading.RLock()
+        self.errors = 0
+
+        self._read_file()
+        self.current = self._build()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def start(self):
+        thread = threading.Thread(target=self._watch_loop, name="config-watcher")
+        thread.daemon = True
+        thread.start()
+
+    def reload(self):
+        # Fetch both sources now and swap in the result if anything changed
+        with self.reload_lock:
+            changed = self._read_file()
+            changed = self._fetch_catalog() or changed
+            if changed:
+                return self._swap()
+            return False
+
+    def _watch_loop(self):
+        last_poll = 0.0
+        while True:
+            time.sleep(self.file_check_interval)
+            try:
+                with self.reload_lock:
+                    changed = self._read_file()
+                    if self.catalog_url and time.monotonic() - last_poll >= self.poll_interval:
+                        last_poll = time.monotonic()
+                        changed = self._fetch_catalog() or changed
+                    if changed:
+                        self._swap()
+            except Exception as e:
+                logging.error(f"Error watching control configuration: {str(e)}")
+
+    def _read_file(self):
+        if not self.rules_file:
+            return False
+        try:
+            mtime = os.stat(self.rules_file).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime == self.file_mtime:
+            return False
+        self.file_mtime = mtime
+
+        if mtime is None:
+            logging.warning(f"Rules file {self.rules_file} not found, using the remaining configuration")
+            self.file_document = {}
+            return True
+
+        try:
+            with open(self.rules_file, "r") as f:
+                self.file_document = json.load(f)
+        except (OSError, ValueError) as e:
+            # Keep the last good document, e.g. while the file is half written
+            self.errors += 1
+            self.file_mtime = None
+            logging.error(f"Could not read rules file {self.rules_file}: {str(e)}")
+            return False
+        return True
+
+    def _fetch_catalog(self):
+        if not self.catalog_url:
+            return False
+
+        headers = {"If-None-Match": self.catalog_etag} if self.catalog_etag else {}
+        try:
+            response = self.session.get(
+                f"{self.catalog_url}/config/{self.config_name}",
+                headers=headers,
+                timeout=5
+            )
+        except requests.RequestException as e:
+            logging.debug(f"Resource Catalog not available for configuration: {str(e)}")
+            return False
+
+        if response.status_code == 304:
+            return False
+        if response.status_code == 404:
+            changed = bool(self.catalog_document)
+            self.catalog_document = {}
+            self.catalog_etag = None
+            return changed
+        if response.status_code != 200:
+            logging.warning(f"Failed to fetch configuration from Resource Catalog: {response.status_code}")
+            return False
+
+        self.catalog_document = response.json().get("config", {})
+        self.catalog_etag = response.headers.get("ETag")
+        return True
+
+    def _build(self):
+        # Raises for an invalid configuration, in which case nothing is swapped
+        thresholds = dict(self.default_thresholds)
+        hysteresis = dict(self.default_hysteresis)
+        rules = {}
+        sources = []
+
+        for name, document in (("catalog", self.catalog_document), ("file", self.file_document)):
+            if not document:
+                continue
+            sources.append(name)
+            thresholds.update(document.get("thresholds", {}))
+            hysteresis.update(document.get("hysteresis", {}))
+            rules.update({key: document[key] for key in ("default", "pipelines", "valves") if key in document})
+
+        unknown = set(thresholds) - set(THRESHOLD_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {', '.join(sorted(unknown))}")
+        threshold_utils = ThresholdUtils(**{key: float(value) for key, value in thresholds.items()})
+        rule_engine = RuleEngine.from_config(rules, threshold_utils.to_rules(), hysteresis)
+
+        self.version += 1
+        return ControlConfig(threshold_utils, rule_engine, self.version, "+".join(sources) or "env")
+
+    def _swap(self):
+        with self.reload_lock:
+            try:
+                config = self._build()
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Invalid control configuration, keeping version {self.current.version}: {str(e)}")
+                return False
+
+            # A single reference assignment: readers see either the old or the new configuration
+            self.current = config
+            logging.info(f"Control configuration version {config.version} loaded from {config.source}")
+
+        for listener in self.listeners:
+            try:
+                listener(config)
+            except Exception as e:
+                logging.error(f"Error applying control configuration: {str(e)}")
+        return True
+
+    def get_status(self):
+        status = self.current.to_dict()
+        status["errors"] = self.errors
+        return status
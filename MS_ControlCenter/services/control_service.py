@@ -3,45 +3,84 @@ import requests
 import json
 import time
 import threading
+import uuid
 from datetime import datetime
+from services.alert_emitter import AlertEmitter
+from services.command_tracker import CommandTracker
+from services.control_state import PipelineState, ValveState
+from services.work_queue import PartitionedWorkQueue
+from utils.latency import LatencyTracker
+from utils.rule_engine import RuleEngine
+from utils.sensor_batch import batch_samples
+
+DEFAULT_PIPELINE = "default"
+DEFAULT_VALVE = "valve"
+# Logical name clients look the Control Center up by, whether it runs as one instance or several
+SERVICE_NAME = "control_center"
 
 class ControlService:
-    def __init__(self, mqtt_handler, threshold_utils, catalog_url):
+    def __init__(self, mqtt_handler, threshold_utils, catalog_url, rule_engine=None,
+                 min_dwell=30, alert_interval=300, workers=4, queue_size=10000,
+                 ack_timeout=5, max_retries=3, assignment=None):
         self.mqtt_handler = mqtt_handler
         self.threshold_utils = threshold_utils
         self.catalog_url = catalog_url
-        self.latest_data = {
-            "temperature": None,
-            "pressure": None,
-            "timestamp": None
+        self.rule_engine = rule_engine or RuleEngine(threshold_utils.to_rules())
+        # Minimum time a valve stays in a state before it may be switched again
+        self.min_dwell = min_dwell
+        self.alert_emitter = AlertEmitter(catalog_url, alert_interval)
+        # In scale-out mode, the partitions of pipelines this instance holds state for
+        self.assignment = assignment
+        self.foreign_messages = 0
+        
+        # Sensor messages are handed off by the MQTT network thread and evaluated by workers
+        self.work_queue = PartitionedWorkQueue(self.handle_sensor_data, workers, queue_size, "control-worker")
+        self.work_queue.start()
+        
+        self.latency = LatencyTracker()
+        
+        # Valve commands waiting for the Pi's ack, retried until confirmed or given up on
+        self.commands = CommandTracker(ack_timeout, max_retries)
+        self.retry_thread = threading.Thread(target=self._command_retry_loop)
+        self.retry_thread.daemon = True
+        self.retry_thread.start()
+        self.topic_metrics = {
+            "/sensor/temperature": "temperature",
+            "/sensor/pressure": "pressure"
         }
+        self.batch_topic = "/sensor/batch"
+        
+        # Control state per pipeline, each with the state of its valves
+        self.pipelines = {}
+        self.latest_pipeline_id = None
+        # Only guards adding pipelines; each pipeline's state has its own lock
+        self.lock = threading.Lock()
         self.service_registered = False
-        self.service_info = {
-            "id": "control_center",
-            "name": "Control Center",
-            "endpoint": None,
-            "port": None
-        }
+        # Catalog records this instance keeps registered, known once update_service_info is called
+        self.registrations = []
+        self.registration_ready = threading.Event()
         
         self.register_thread = threading.Thread(target=self._periodic_registration)
         self.register_thread.daemon = True
         self.register_thread.start()
     
     def _periodic_registration(self):
+        self.registration_ready.wait()
         while True:
-            self._register_with_catalog()
+            for service_info in self.registrations:
+                self._register_with_catalog(service_info)
             time.sleep(60)
     
-    def _register_with_catalog(self):
+    def _register_with_catalog(self, service_info):
         try:
             response = requests.post(
-                f"{self.catalog_url}/services", 
-                json=self.service_info,
+                f"{self.catalog_url}/register_service", 
+                json=service_info,
                 timeout=5  # Add timeout to prevent long waits
             )
             
             if response.status_code == 200 or response.status_code == 201:
-                logging.info("Successfully registered with the Resource Catalog")
+                logging.info(f"Successfully registered {service_info['service_id']} with the Resource Catalog")
                 self.service_registered = True
             else:
                 logging.warning(f"Failed to register with Resource Catalog: {response.status_code}")
@@ -52,78 +91,338 @@ class ControlService:
             logging.warning(f"Error registering with Resource Catalog: {str(e)}")
     
     def update_service_info(self, host, port):
-        self.service_info["endpoint"] = f"http://{host}:{port}"
-        self.service_info["port"] = port
+        endpoint = f"http://{host}:{port}"
+        instance = {
+            "service_id": SERVICE_NAME,
+            "name": SERVICE_NAME,
+            "description": "Control Center",
+            "endpoints": {
+                "command": {"url": f"{endpoint}/api/control/command", "method": "POST"},
+                "status": {"url": f"{endpoint}/api/control/status", "method": "GET"}
+            },
+            "metadata": {"endpoint": endpoint, "port": port}
+        }
+        registrations = [instance]
+        
+        if self.assignment is not None:
+            # Each instance has its own record; the shared one under the logical name
+            # describes the group, so clients can work out which instance owns a pipeline.
+            # Every instance writes the same group record, so it does not matter who wins.
+            instance["service_id"] = f"{SERVICE_NAME}_{self.assignment.instance_index}"
+            instance["metadata"].update(group=SERVICE_NAME, instance_index=self.assignment.instance_index)
+            registrations.append({
+                "service_id": SERVICE_NAME,
+                "name": SERVICE_NAME,
+                "description": "Control Center partition group",
+                "endpoints": {},
+                "metadata": {
+                    "partitions": self.assignment.partitions,
+                    "instance_count": self.assignment.instance_count,
+                    "instance_prefix": f"{SERVICE_NAME}_"
+                }
+            })
+        
+        self.registrations = registrations
+        self.registration_ready.set()
+    
+    def _get_pipeline(self, pipeline_id, valve_id, engine):
+        # Existing pipelines are looked up without the registry lock; callers take
+        # the pipeline's own lock and call _refresh_pipeline before using its state
+        pipeline = self.pipelines.get(pipeline_id)
+        if pipeline is None:
+            with self.lock:
+                pipeline = self.pipelines.get(pipeline_id)
+                if pipeline is None:
+                    # Resolve each valve's rule table once, so messages never search for it
+                    valve_ids = engine.valves_for(pipeline_id, valve_id or DEFAULT_VALVE)
+                    valves = [ValveState(pipeline_id, vid, engine.table_for(pipeline_id, vid)) for vid in valve_ids]
+                    pipeline = PipelineState(pipeline_id, valves, engine)
+                    self.pipelines[pipeline_id] = pipeline
+        return pipeline
+    
+    def _refresh_pipeline(self, pipeline, engine):
+        # The configuration was reloaded: re-resolve the tables, keeping the valves' state
+        if pipeline.engine is engine:
+            return
+        configured = engine.pipeline_valves.get(pipeline.pipeline_id)
+        if configured:
+            pipeline.valves = {
+                vid: pipeline.valves.get(vid) or ValveState(pipeline.pipeline_id, vid, None)
+                for vid in configured
+            }
+        for valve in pipeline.valves.values():
+            valve.table = engine.table_for(pipeline.pipeline_id, valve.valve_id)
+        pipeline.engine = engine
     
-    def handle_sensor_data(self, topic, data):
+    def apply_config(self, config):
+        # Called after a reload. Plain reference swaps: a message being evaluated
+        # keeps the engine it started with, the next one picks up the new tables
+        self.threshold_utils = config.thresholds
+        self.rule_engine = config.rule_engine
+    
+    def _pipeline_key(self, data):
+        return data.get("pipeline_id") or data.get("device_id") or DEFAULT_PIPELINE
+    
+    def owns(self, pipeline_id):
+        return self.assignment is None or self.assignment.owns(pipeline_id)
+    
+    def enqueue_sensor_data(self, topic, data):
+        # Runs on the MQTT network thread, so it only queues the message
+        key = self._pipeline_key(data)
+        if not self.owns(key):
+            # Published on a partition that does not match its pipeline; its owner keeps the state
+            self.foreign_messages += 1
+            return
+        self.work_queue.submit(key, topic, data, time.time())
+    
+    def handle_sensor_data(self, topic, data, received_at=None):
+        if topic == self.batch_topic:
+            # One message with both metrics for a window of samples, evaluated in order
+            samples = [
+                (sample_ts, {"temperature": temperature, "pressure": pressure})
+                for sample_ts, temperature, pressure in batch_samples(data)
+            ]
+        else:
+            metric = self.topic_metrics.get(topic)
+            if metric is None or "value" not in data:
+                return
+            samples = [(data.get("source_ts"), {metric: data["value"]})]
+        if not samples:
+            return
+        
+        # The newest sample's delay; older samples of a batch also waited for the window to close
+        source_ts = samples[-1][0]
+        if received_at is not None:
+            self.latency.observe("control_queue", time.time() - received_at)
+            if source_ts is not None:
+                self.latency.observe("sensor_to_control", received_at - source_ts)
+        trace_id = data.get("trace_id") or uuid.uuid4().hex
+        
+        pipeline_id = self._pipeline_key(data)
+        engine = self.rule_engine
         current_time = datetime.now().isoformat()
+        now = time.monotonic()
+        decisions = []
         
-        if topic == "/sensor/temperature" and "value" in data:
-            self.latest_data["temperature"] = data["value"]
-            self.latest_data["timestamp"] = current_time
-            logging.info(f"Updated temperature: {data['value']}")
+        pipeline = self._get_pipeline(pipeline_id, data.get("valve_id"), engine)
+        with pipeline.lock:
+            self._refresh_pipeline(pipeline, engine)
+            pipeline.timestamp = current_time
+            self.latest_pipeline_id = pipeline_id
+            
+            for sample_ts, updates in samples:
+                pipeline.readings.update(updates)
+                trace = {"trace_id": trace_id, "source_ts": sample_ts, "received_at": received_at}
+                readings = None
+                
+                for valve in pipeline.valves.values():
+                    # A table is only evaluated once every metric it uses has been reported
+                    if not valve.table.metrics <= pipeline.readings.keys():
+                        continue
+                    
+                    action, alert = valve.update(pipeline.readings)
+                    command = None
+                    # Suppressed when the valve is in this state already or switched too recently;
+                    # a later reading retries
+                    if valve.should_send(action, now, self.min_dwell):
+                        command = (action, valve.last_action, valve.last_change, valve.last_command_time)
+                        valve.last_action = action
+                        valve.last_change = now
+                        valve.last_command_time = current_time
+                    
+                    if command or alert:
+                        readings = readings or dict(pipeline.readings)
+                        decisions.append((valve, command, action if alert else None, trace, readings))
+        
+        logging.debug(f"Updated pipeline {pipeline_id} with {len(samples)} readings: {samples[-1][1]}")
         
-        elif topic == "/sensor/pressure" and "value" in data:
-            self.latest_data["pressure"] = data["value"]
-            self.latest_data["timestamp"] = current_time
-            logging.info(f"Updated pressure: {data['value']}")
+        for valve, command, alerted_action, trace, readings in decisions:
+            if command:
+                self._apply_action(valve, command, trace)
+            if alerted_action:
+                self._notify_critical_situation(valve, readings, alerted_action)
+    
+    def _apply_action(self, valve, command, trace):
+        action, previous_action, previous_change, previous_time = command
+        logging.info(f"Sending valve command {action} to {valve.pipeline_id}/{valve.valve_id}")
         
-        if self.latest_data["temperature"] is not None and self.latest_data["pressure"] is not None:
-            self._check_thresholds()
+        if not self._send_command(action, valve.pipeline_id, valve.valve_id, trace):
+            # Not sent: restore the previous state so a later reading retries
+            with self.pipelines[valve.pipeline_id].lock:
+                if valve.last_action == action:
+                    valve.last_action = previous_action
+                    valve.last_change = previous_change
+                    valve.last_command_time = previous_time
     
-    def _check_thresholds(self):
-        temp = self.latest_data["temperature"]
-        pressure = self.latest_data["pressure"]
+    def _send_command(self, action, pipeline_id, valve_id, trace):
+        command_id = uuid.uuid4().hex
+        sent_ts = time.time()
+        command_trace = {"trace_id": trace["trace_id"], "source_ts": trace["source_ts"], "sent_ts": sent_ts}
+        if not self.mqtt_handler.publish_valve_command(action, pipeline_id, valve_id, command_trace, command_id):
+            return False
         
-        action = self.threshold_utils.get_valve_action(pressure, temp)
+        if trace["received_at"] is not None:
+            self.latency.observe("control_processing", sent_ts - trace["received_at"])
+        if trace["source_ts"] is not None:
+            self.latency.observe("sensor_to_command", sent_ts - trace["source_ts"])
         
-        if action:
-            logging.info(f"Sending valve command: {action}")
-            self.mqtt_handler.publish_valve_command(action)
-            
-            if self.threshold_utils.is_pressure_critical(pressure) or self.threshold_utils.is_temperature_critical(temp):
-                self._notify_critical_situation(temp, pressure, action)
+        self.commands.add(command_id, action, pipeline_id, valve_id, command_trace, time.monotonic())
+        self._set_command_status(pipeline_id, valve_id, command_id, "pending")
+        return True
+    
+    def _set_command_status(self, pipeline_id, valve_id, command_id, status, failed_action=None):
+        pipeline = self.pipelines.get(pipeline_id)
+        if pipeline is None:
+            return
+        with pipeline.lock:
+            for valve in pipeline.valves.values():
+                if valve_id is not None and valve.valve_id != valve_id:
+                    continue
+                if status != "pending" and valve.command_id != command_id:
+                    # A newer command has been sent to this valve since
+                    continue
+                valve.command_id = command_id
+                valve.command_status = status
+                if failed_action is not None and valve.last_action == failed_action:
+                    # The valve state is unknown now, so a later reading may send the command again
+                    valve.last_action = None
     
-    def _notify_critical_situation(self, temperature, pressure, action):
+    def _command_retry_loop(self):
+        while True:
+            time.sleep(0.5)
+            try:
+                retries, expired = self.commands.collect_due(time.monotonic())
+                
+                for command in retries:
+                    logging.info(f"No ack for valve command {command.command_id}, retry {command.attempts - 1}")
+                    self.mqtt_handler.publish_valve_command(
+                        command.action, command.pipeline_id, command.valve_id, command.trace, command.command_id
+                    )
+                
+                for command in expired:
+                    logging.warning(
+                        f"Valve command {command.action} to {command.pipeline_id}/{command.valve_id} "
+                        f"not acknowledged after {command.attempts} attempts"
+                    )
+                    self._set_command_status(
+                        command.pipeline_id, command.valve_id, command.command_id, "timeout", command.action
+                    )
+            except Exception as e:
+                logging.error(f"Error retrying valve commands: {str(e)}")
+    
+    def handle_valve_ack(self, topic, data):
+        # Runs on the MQTT network thread; only bookkeeping, no I/O
+        received_at = time.time()
+        success = bool(data.get("success"))
+        command = self.commands.acknowledge(data.get("command_id"), success)
+        if command is None:
+            return
+        
+        if success:
+            self._set_command_status(command.pipeline_id, command.valve_id, command.command_id, "confirmed")
+        else:
+            logging.warning(f"Valve command {command.action} to {command.pipeline_id}/{command.valve_id} rejected")
+            self._set_command_status(
+                command.pipeline_id, command.valve_id, command.command_id, "failed", command.action
+            )
+        
+        self.latency.observe("command_round_trip", received_at - command.trace["sent_ts"])
+        
+        # Both timestamps come from the Pi's clock, so this hop is not affected by clock skew
+        applied_ts = data.get("applied_ts")
+        if applied_ts is not None and data.get("source_ts") is not None:
+            self.latency.observe("control_loop", applied_ts - data["source_ts"])
+        if applied_ts is not None and data.get("sent_ts") is not None:
+            self.latency.observe("command_delivery", applied_ts - data["sent_ts"])
+    
+    def _notify_critical_situation(self, valve, readings, action):
         try:
             alert_data = {
                 "source": "control_center",
                 "type": "critical_values",
-                "temperature": temperature,
-                "pressure": pressure,
+                "pipeline_id": valve.pipeline_id,
+                "valve_id": valve.valve_id,
+                "temperature": readings.get("temperature"),
+                "pressure": readings.get("pressure"),
+                "readings": readings,
                 "action_taken": action,
                 "timestamp": datetime.now().isoformat()
             }
             
-            response = requests.post(
-                f"{self.catalog_url}/alerts",
-                json=alert_data,
-                timeout=5  # Add timeout
-            )
-            
-            if response.status_code == 200 or response.status_code == 201:
-                logging.info("Alert notification sent successfully")
-            else:
-                logging.warning(f"Failed to send alert notification: {response.status_code}")
+            if not self.alert_emitter.emit(f"{valve.pipeline_id}/{valve.valve_id}", alert_data):
+                logging.debug(f"Alert for {valve.pipeline_id}/{valve.valve_id} rate limited")
                 
-        except requests.exceptions.ConnectionError:
-            logging.warning("Resource Catalog not available - could not send alert")
         except Exception as e:
             logging.warning(f"Error sending alert notification: {str(e)}")
     
-    def process_manual_command(self, command):
+    def process_manual_command(self, command, pipeline_id=None, valve_id=None):
         if command not in ["OPEN", "CLOSE"]:
             logging.warning(f"Invalid valve command: {command}")
             return False
         
         logging.info(f"Processing manual valve command: {command}")
-        return self.mqtt_handler.publish_valve_command(command)
+        trace = {"trace_id": uuid.uuid4().hex, "source_ts": None, "received_at": None}
+        if pipeline_id:
+            engine = self.rule_engine
+            pipeline = self._get_pipeline(pipeline_id, valve_id, engine)
+            with pipeline.lock:
+                self._refresh_pipeline(pipeline, engine)
+        success = self._send_command(command, pipeline_id, valve_id, trace)
+        
+        if success and pipeline_id:
+            with pipeline.lock:
+                for valve in pipeline.valves.values():
+                    if valve_id is None or valve.valve_id == valve_id:
+                        valve.last_action = command
+                        valve.last_change = time.monotonic()
+                        valve.last_command_time = datetime.now().isoformat()
+        return success
     
-    def get_latest_status(self):
+    def get_latest_status(self, pipeline_id=None):
+        with self.lock:
+            if pipeline_id is not None:
+                selected = [self.pipelines[pipeline_id]] if pipeline_id in self.pipelines else []
+            else:
+                selected = list(self.pipelines.values())
+            latest = self.pipelines.get(pipeline_id or self.latest_pipeline_id)
+        
+        pipelines = {}
+        for pipeline in selected:
+            with pipeline.lock:
+                pipelines[pipeline.pipeline_id] = pipeline.to_dict()
+        
+        # Keep the single-pipeline fields for existing clients, based on the last updated pipeline
+        latest_data = {
+            "temperature": None,
+            "pressure": None,
+            "timestamp": None,
+            "pipeline_id": None
+        }
+        recommendation = None
+        if latest:
+            with latest.lock:
+                latest_data = {
+                    "temperature": latest.readings.get("temperature"),
+                    "pressure": latest.readings.get("pressure"),
+                    "timestamp": latest.timestamp,
+                    "pipeline_id": latest.pipeline_id
+                }
+                recommendation = next(iter(latest.valves.values())).recommendation
+        
         return {
-            "latest_data": self.latest_data,
-            "valve_recommendation": self.threshold_utils.get_valve_action(
-                self.latest_data["pressure"] if self.latest_data["pressure"] is not None else 0,
-                self.latest_data["temperature"] if self.latest_data["temperature"] is not None else 0
-            )
-        }
\ No newline at end of file
+            "latest_data": latest_data,
+            "valve_recommendation": recommendation,
+            "pipelines": pipelines,
+            "alerts": self.alert_emitter.get_stats(),
+            "backpressure": self.work_queue.get_stats(),
+            "commands": self.commands.get_stats(),
+            "partitioning": self.get_partitioning()
+        }
+    
+    def get_partitioning(self):
+        if self.assignment is None:
+            return None
+        partitioning = self.assignment.to_dict()
+        partitioning["pipelines"] = len(self.pipelines)
+        partitioning["foreign_messages"] = self.foreign_messages
+        return partitioning
\ No newline at end of file
@@ -0,0 +1,78 @@
+import threading
+
+class ValveState:
+    __slots__ = (
+        "pipeline_id", "valve_id", "table", "recommendation", "active_action",
+        "last_action", "last_command_time", "last_change", "suppressed_commands",
+        "command_id", "command_status"
+    )
+
+    def __init__(self, pipeline_id, valve_id, table):
+        self.pipeline_id = pipeline_id
+        self.valve_id = valve_id
+        self.table = table
+        self.recommendation = None
+        # Action whose condition currently holds, kept until it clears its hysteresis band
+        self.active_action = None
+        self.last_action = None
+        self.last_command_time = None
+        self.last_change = None
+        self.suppressed_commands = 0
+        # Last command sent to the valve: pending, confirmed, failed or timeout
+        self.command_id = None
+        self.command_status = None
+
+    def update(self, readings):
+        action, alert = self.table.evaluate(readings)
+        entered = action is not None and action != self.active_action
+
+        # An active action stays until its condition clears the hysteresis band
+        if action is None and self.active_action is not None:
+            if self.table.holds(readings, self.active_action):
+                action = self.active_action
+
+        self.active_action = action
+        self.recommendation = action
+        return action, alert and entered
+
+    def should_send(self, action, now, min_dwell):
+        # Whether a recommended action becomes a command: not while the valve is
+        # already in that state or switched less than min_dwell seconds before now
+        if action is None:
+            return False
+        if action == self.last_action or (self.last_change is not None and now - self.last_change < min_dwell):
+            self.suppressed_commands += 1
+            return False
+        return True
+
+    def to_dict(self):
+        return {
+            "valve_id": self.valve_id,
+            "recommendation": self.recommendation,
+            "last_action": self.last_action,
+            "last_command_time": self.last_command_time,
+            "suppressed_commands": self.suppressed_commands,
+            "command_id": self.command_id,
+            "command_status": self.command_status
+        }
+
+class PipelineState:
+    __slots__ = ("pipeline_id", "readings", "timestamp", "valves", "engine", "lock")
+
+    def __init__(self, pipeline_id, valves, engine=None):
+        self.pipeline_id = pipeline_id
+        self.readings = {}
+        self.timestamp = None
+        self.valves = {valve.valve_id: valve for valve in valves}
+        # Rule engine the valve tables were resolved from
+        self.engine = engine
+        # Guards this pipeline's readings and valves, so pipelines never wait on each other
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            "pipeline_id": self.pipeline_id,
+            "readings": dict(self.readings),
+            "timestamp": self.timestamp,
+            "valves": {valve_id: valve.to_dict() for valve_id, valve in self.valves.items()}
+        }
@@ -1,26 +1,72 @@
 import json
 import paho.mqtt.client as mqtt
 import logging
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from utils.sensor_batch import decode_batch
 
 class MQTTHandler:
-    def __init__(self, broker_host, broker_port, client_id, on_message_callback, username=None, password=None):
+    def __init__(self, broker_host, broker_port, client_id, on_message_callback, username=None, password=None,
+                 on_ack_callback=None, assignment=None, share_group="control_center", session_expiry=300):
         self.broker_host = broker_host
         self.broker_port = broker_port
         self.client_id = client_id
         self.on_message_callback = on_message_callback
+        self.on_ack_callback = on_ack_callback
         self.username = username
         self.password = password
+        # Scale-out mode: only the partitions this instance owns, through MQTT v5 shared subscriptions
+        self.assignment = assignment
+        self.share_group = share_group
+        self.session_expiry = session_expiry
         self.client = None
         self.connected = False
         
-        self.sensor_topics = ["/sensor/temperature", "/sensor/pressure"]
+        self.batch_topic = "/sensor/batch"
+        self.sensor_topics = ["/sensor/temperature", "/sensor/pressure", self.batch_topic]
         self.actuator_topic = "/actuator/valve"
+        self.ack_topic = "/actuator/valve/ack"
+        
+        # Subscription filter and the topic its messages are routed as, and the
+        # same mapping from each concrete (partitioned) topic
+        self.subscriptions = self._build_subscriptions()
+        self.topic_bases = {}
+        for _, topic, base in self.subscriptions:
+            self.topic_bases[topic] = base
         
         self._setup_mqtt_client()
     
+    def _build_subscriptions(self):
+        topics = list(self.sensor_topics)
+        if self.on_ack_callback:
+            topics.append(self.ack_topic)
+        
+        if self.assignment is None:
+            return [(topic, topic, topic) for topic in topics]
+        
+        # Publishers put each pipeline on <topic>/<partition>. Each partition has a
+        # single owner; the shared subscription makes the broker deliver a message
+        # once to the group rather than to every instance, so while two instances
+        # briefly own the same partition, e.g. when the instance count changes,
+        # each reading is still evaluated and acted on once
+        subscriptions = []
+        for partition in self.assignment.owned:
+            for topic in topics:
+                partitioned = f"{topic}/{partition}"
+                subscriptions.append((f"$share/{self.share_group}/{partitioned}", partitioned, topic))
+        return subscriptions
+    
     def _setup_mqtt_client(self):
         # Explicitly set callback_api_version for paho-mqtt 2.0+
-        self.client = mqtt.Client(client_id=self.client_id, callback_api_version=mqtt.CallbackAPIVersion.VERSION1)
+        if self.assignment is None:
+            self.client = mqtt.Client(client_id=self.client_id, callback_api_version=mqtt.CallbackAPIVersion.VERSION1)
+        else:
+            # Shared subscriptions need MQTT v5
+            self.client = mqtt.Client(
+                client_id=self.client_id,
+                protocol=mqtt.MQTTv5,
+                callback_api_version=mqtt.CallbackAPIVersion.VERSION1
+            )
         
         if self.username and self.password:
             self.client.username_pw_set(self.username, self.password)
@@ -29,31 +75,42 @@ class MQTTHandler:
         self.client.on_message = self._on_message
         self.client.on_disconnect = self._on_disconnect
     
-    def _on_connect(self, client, userdata, flags, rc):
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
         if rc == 0:
             self.connected = True
             logging.info("Connected to MQTT Broker")
             
-            for topic in self.sensor_topics:
-                self.client.subscribe(topic)
-                logging.info(f"Subscribed to {topic}")
+            # QoS 1 in scale-out mode, so the broker queues the partition's messages
+            # in the session while its instance restarts
+            qos = 0 if self.assignment is None else 1
+            for subscription, _, _ in self.subscriptions:
+                self.client.subscribe(subscription, qos=qos)
+                logging.info(f"Subscribed to {subscription}")
         else:
             logging.error(f"Failed to connect to MQTT Broker with code {rc}")
     
     def _on_message(self, client, userdata, msg):
         try:
-            payload = json.loads(msg.payload)
+            topic = self.topic_bases.get(msg.topic, msg.topic)
+            if topic == self.batch_topic:
+                # Compact JSON or packed binary, both decoded to the same structure
+                payload = decode_batch(msg.payload)
+            else:
+                payload = json.loads(msg.payload)
             logging.debug(f"Received message on {msg.topic}: {payload}")
             
-            if self.on_message_callback:
-                self.on_message_callback(msg.topic, payload)
+            if topic == self.ack_topic:
+                if self.on_ack_callback:
+                    self.on_ack_callback(topic, payload)
+            elif self.on_message_callback:
+                self.on_message_callback(topic, payload)
                 
         except json.JSONDecodeError:
             logging.error(f"Failed to decode JSON from message: {msg.payload}")
         except Exception as e:
             logging.error(f"Error processing message: {str(e)}")
     
-    def _on_disconnect(self, client, userdata, rc):
+    def _on_disconnect(self, client, userdata, rc, properties=None):
         self.connected = False
         if rc != 0:
             logging.warning(f"Unexpected disconnection from MQTT Broker with code {rc}")
@@ -62,7 +119,13 @@ class MQTTHandler:
     
     def connect(self):
         try:
-            self.client.connect(self.broker_host, self.broker_port, 60)
+            if self.assignment is None:
+                self.client.connect(self.broker_host, self.broker_port, 60)
+            else:
+                # A persistent session per instance: its shared subscriptions survive a restart
+                properties = Properties(PacketTypes.CONNECT)
+                properties.SessionExpiryInterval = self.session_expiry
+                self.client.connect(self.broker_host, self.broker_port, 60, clean_start=False, properties=properties)
             self.client.loop_start()
         except Exception as e:
             logging.error(f"Failed to connect to MQTT Broker: {str(e)}")
@@ -72,13 +135,22 @@ class MQTTHandler:
             self.client.loop_stop()
             self.client.disconnect()
     
-    def publish_valve_command(self, command):
+    def publish_valve_command(self, command, pipeline_id=None, valve_id=None, trace=None, command_id=None):
         if not self.connected:
             logging.warning("Not connected to MQTT Broker. Cannot publish command.")
             return False
         
         try:
-            payload = json.dumps({"command": command})
+            message = {"command": command}
+            if command_id:
+                message["command_id"] = command_id
+            if pipeline_id:
+                message["pipeline_id"] = pipeline_id
+            if valve_id:
+                message["valve_id"] = valve_id
+            if trace:
+                message.update(trace)
+            payload = json.dumps(message)
             result = self.client.publish(self.actuator_topic, payload, qos=1)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
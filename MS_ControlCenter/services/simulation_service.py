@@ -0,0 +1,300 @@
+import logging
+import time
+from datetime import datetime
+import numpy as np
+import requests
+from services.control_service import DEFAULT_VALVE
+from services.control_state import ValveState
+from utils.rule_engine import RuleEngine
+from utils.threshold_utils import ACTION_NAMES, ACTION_CLOSE, ACTION_NONE, ACTION_OPEN, ThresholdUtils
+
+THRESHOLD_FIELDS = ["pressure_min", "pressure_max", "temperature_min", "temperature_max"]
+SIMULATION_MODES = ("batch", "replay")
+REPLAY_COUNTERS = ("rows", "open", "close", "alerts", "commands", "suppressed")
+BATCH_COUNTERS = REPLAY_COUNTERS + ("pressure_critical", "temperature_critical", "critical")
+
+def _forward_fill_index(mask):
+    # Index of the last row at or before each row where mask is set, -1 before the first one
+    index = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(index) if len(index) else index
+
+def align_readings(temperature_records, pressure_records):
+    # As-of join of the two series per pipeline: each reading is paired with the
+    # latest reading of the other metric, as the controller sees them on arrival
+    by_pipeline = {}
+    for metric, records in (("temperature", temperature_records), ("pressure", pressure_records)):
+        for record in records:
+            if record.get("value") is None or record.get("time") is None:
+                continue
+            series = by_pipeline.setdefault(record.get("pipeline_id", "unknown"), ([], [], []))
+            series[0].append(record["time"])
+            series[1].append(metric == "pressure")
+            series[2].append(record["value"])
+
+    aligned = {}
+    for pipeline_id, (times, is_pressure, values) in by_pipeline.items():
+        times = np.array(times)
+        is_pressure = np.array(is_pressure, dtype=bool)
+        values = np.array(values, dtype=float)
+
+        # ISO timestamps from the connector share one format, so they sort as strings
+        order = np.argsort(times, kind="stable")
+        times, is_pressure, values = times[order], is_pressure[order], values[order]
+
+        last_pressure = _forward_fill_index(is_pressure)
+        last_temperature = _forward_fill_index(~is_pressure)
+        complete = (last_pressure >= 0) & (last_temperature >= 0)
+
+        aligned[pipeline_id] = {
+            "time": times[complete],
+            "pressure": values[last_pressure[complete]],
+            "temperature": values[last_temperature[complete]]
+        }
+    return aligned
+
+def _shift(values, fill):
+    # values moved one row down, fill in the first row
+    return np.concatenate(([fill], values[:-1])).astype(values.dtype) if len(values) else values
+
+def _to_seconds(times):
+    # Row times as epoch seconds; UTC ISO strings from the connector are parsed in
+    # one datetime64 conversion, anything with another offset one at a time
+    values = np.asarray(times)
+    if values.dtype.kind in "iuf":
+        return values.astype(float)
+
+    strings = np.char.replace(np.char.replace(values.astype(str), "+00:00", ""), "Z", "")
+    if not len(strings) or (np.char.find(strings, "+") < 0).all() and (np.char.rfind(strings, "-") < 10).all():
+        return strings.astype("datetime64[us]").astype(np.int64) / 1e6
+    return np.array([datetime.fromisoformat(str(value)).timestamp() for value in values])
+
+def apply_hysteresis(actions, holds_open, holds_close):
+    # ValveState.update over whole arrays: a row with an action takes it, a row
+    # without one keeps the last action taken as long as every row since then
+    # still holds it
+    taken = actions != ACTION_NONE
+    last_taken = _forward_fill_index(taken)
+    origin = np.where(last_taken >= 0, actions[np.maximum(last_taken, 0)], ACTION_NONE)
+    open_released = _forward_fill_index(~holds_open) > last_taken
+    close_released = _forward_fill_index(~holds_close) > last_taken
+    released = np.where(origin == ACTION_OPEN, open_released, close_released)
+    return np.where(taken | ~released, origin, ACTION_NONE).astype(np.int8)
+
+def select_commands(state, seconds=None, min_dwell=0):
+    # ValveState.should_send over a whole state array: the rows where a command
+    # would be sent. Loops once per command rather than once per row; seconds
+    # must be ascending
+    positions = {action: np.flatnonzero(state == action) for action in (ACTION_OPEN, ACTION_CLOSE)}
+    commands = []
+    last_action = ACTION_NONE
+    earliest = 0
+    while True:
+        # The first row from earliest on recommending something other than the valve's state
+        candidates = []
+        for action, rows in positions.items():
+            if action != last_action:
+                index = np.searchsorted(rows, earliest)
+                if index < len(rows):
+                    candidates.append(int(rows[index]))
+        if not candidates:
+            return commands
+
+        row = min(candidates)
+        commands.append(row)
+        last_action = state[row]
+        earliest = row + 1
+        if seconds is not None and min_dwell > 0:
+            earliest = max(earliest, int(np.searchsorted(seconds, seconds[row] + min_dwell)))
+
+class SimulationService:
+    def __init__(self, threshold_utils, timeseries_url, rule_engine=None, min_dwell=0):
+        self.threshold_utils = threshold_utils
+        self.timeseries_url = timeseries_url
+        self.rule_engine = rule_engine
+        self.min_dwell = min_dwell
+        self.session = requests.Session()
+
+    def apply_config(self, config):
+        self.threshold_utils = config.thresholds
+        self.rule_engine = config.rule_engine
+
+    def fetch_history(self, measurement, start=None, end=None, pipeline_id=None):
+        params = {"start": start, "end": end, "pipeline_id": pipeline_id}
+        response = self.session.get(
+            f"{self.timeseries_url}/api/v1/data/{measurement}",
+            params={key: value for key, value in params.items() if value},
+            timeout=30
+        )
+        response.raise_for_status()
+
+        body = response.json()
+        if body.get("status") == "error":
+            raise requests.RequestException(body.get("message", "Time series query failed"))
+        return body.get("data", [])
+
+    def _engine_for(self, thresholds):
+        # Overridden thresholds replace the default table derived from them; pipeline tables stay
+        engine = self.rule_engine
+        if engine is None or any(thresholds.get(key) is not None for key in THRESHOLD_FIELDS):
+            merged = ThresholdUtils(**{
+                key: float(getattr(self.threshold_utils, key) if thresholds.get(key) is None else thresholds[key])
+                for key in THRESHOLD_FIELDS
+            })
+            rules = merged.to_rules()
+            engine = engine.with_default_rules(rules) if engine is not None else RuleEngine(rules)
+        return engine
+
+    def replay(self, engine, pipeline_id, pressure, temperature, times=None, include_rows=False):
+        # Feeds the rows one by one through the controller's own valve state machine:
+        # the pipeline's rule tables, hysteresis and, when rows have times, dwell time.
+        # Exact for any rule table, but a Python loop: about a second per million rows
+        valves = [
+            ValveState(pipeline_id, valve_id, engine.table_for(pipeline_id, valve_id))
+            for valve_id in engine.valves_for(pipeline_id, DEFAULT_VALVE)
+        ]
+        seconds = _to_seconds(times).tolist() if times is not None else None
+        min_dwell = self.min_dwell if seconds is not None else 0
+        result = dict.fromkeys(REPLAY_COUNTERS, 0)
+        result["rows"] = len(pressure)
+        command_log = []
+
+        for row, (p, t) in enumerate(zip(pressure.tolist(), temperature.tolist())):
+            readings = {"pressure": p, "temperature": t}
+            now = seconds[row] if seconds is not None else row
+            for valve in valves:
+                if not valve.table.metrics <= readings.keys():
+                    continue
+                action, alert = valve.update(readings)
+                if action == "OPEN":
+                    result["open"] += 1
+                elif action == "CLOSE":
+                    result["close"] += 1
+                if alert:
+                    result["alerts"] += 1
+                if valve.should_send(action, now, min_dwell):
+                    valve.last_action = action
+                    valve.last_change = now
+                    result["commands"] += 1
+                    if include_rows:
+                        entry = {"row": row, "valve_id": valve.valve_id, "action": action}
+                        if times is not None:
+                            entry["time"] = times[row].item() if hasattr(times[row], "item") else times[row]
+                        command_log.append(entry)
+
+        result["suppressed"] = sum(valve.suppressed_commands for valve in valves)
+        if include_rows:
+            result["command_log"] = command_log
+        return result
+
+    def _has_custom_rules(self, pipeline_id):
+        engine = self.rule_engine
+        if engine is None:
+            return False
+        return (
+            engine.valves_for(pipeline_id, DEFAULT_VALVE) != [DEFAULT_VALVE]
+            or engine.table_for(pipeline_id, DEFAULT_VALVE) is not engine.default_table
+        )
+
+    def batch(self, pipeline_id, pressure, temperature, thresholds, times=None, include_rows=False):
+        # The threshold rules, hysteresis and, when rows have times, dwell time
+        # evaluated as whole arrays, per-row thresholds included. Pipelines with
+        # their own rule tables or valves are flagged; replay evaluates those exactly
+        overrides = {key: thresholds.get(key) for key in THRESHOLD_FIELDS}
+        actions, pressure_critical, temperature_critical = self.threshold_utils.evaluate_batch(
+            pressure, temperature, **overrides
+        )
+        hysteresis = self.rule_engine.hysteresis if self.rule_engine is not None else {}
+        holds_open, holds_close = self.threshold_utils.holds_batch(
+            pressure, temperature, float(hysteresis.get("pressure", 0)), float(hysteresis.get("temperature", 0)),
+            **overrides
+        )
+        state = apply_hysteresis(actions, holds_open, holds_close)
+
+        seconds = _to_seconds(times) if times is not None else None
+        if seconds is not None and np.any(np.diff(seconds) < 0):
+            raise ValueError(f"time of {pipeline_id} must be in ascending order")
+        commands = select_commands(state, seconds, self.min_dwell if seconds is not None else 0)
+
+        # An alert is raised when a rule matches while the valve is not already in its action
+        alerts = (actions != ACTION_NONE) & (actions != _shift(state, ACTION_NONE))
+        recommended = int(np.count_nonzero(state))
+        result = {
+            "rows": int(len(state)),
+            "open": int(np.count_nonzero(state == ACTION_OPEN)),
+            "close": int(np.count_nonzero(state == ACTION_CLOSE)),
+            "alerts": int(np.count_nonzero(alerts)),
+            "commands": len(commands),
+            "suppressed": recommended - len(commands),
+            "pressure_critical": int(np.count_nonzero(pressure_critical)),
+            "temperature_critical": int(np.count_nonzero(temperature_critical)),
+            "critical": int(np.count_nonzero(pressure_critical | temperature_critical)),
+            "custom_rules": self._has_custom_rules(pipeline_id)
+        }
+
+        if include_rows:
+            result["actions"] = ACTION_NAMES[state].tolist()
+            command_log = []
+            for row in commands:
+                entry = {"row": row, "valve_id": DEFAULT_VALVE, "action": ACTION_NAMES[state[row]]}
+                if times is not None:
+                    entry["time"] = times[row].item() if hasattr(times[row], "item") else times[row]
+                command_log.append(entry)
+            result["command_log"] = command_log
+        return result
+
+    def simulate(self, series, thresholds=None, include_rows=False, mode="batch"):
+        # series: {pipeline_id: {"pressure": [...], "temperature": [...], "time": [...]}}
+        thresholds = thresholds or {}
+        if mode not in SIMULATION_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SIMULATION_MODES)}")
+        per_row = [key for key in THRESHOLD_FIELDS if np.ndim(thresholds.get(key))]
+        if per_row and mode == "replay":
+            raise ValueError(f"Per-row thresholds ({', '.join(per_row)}) are not supported by the 'replay' mode")
+
+        engine = self._engine_for(thresholds) if mode == "replay" else None
+        results = {}
+        total = dict.fromkeys(REPLAY_COUNTERS if mode == "replay" else BATCH_COUNTERS, 0)
+        started = time.perf_counter()
+
+        for pipeline_id, data in series.items():
+            pressure = np.asarray(data["pressure"], dtype=float)
+            temperature = np.asarray(data["temperature"], dtype=float)
+            if pressure.shape != temperature.shape:
+                raise ValueError(f"pressure and temperature of {pipeline_id} differ in length")
+            times = data.get("time")
+            if times is not None and len(times) != len(pressure):
+                raise ValueError(f"time of {pipeline_id} differs in length from the readings")
+
+            if mode == "replay":
+                result = self.replay(engine, pipeline_id, pressure, temperature, times, include_rows)
+            else:
+                result = self.batch(pipeline_id, pressure, temperature, thresholds, times, include_rows)
+
+            results[pipeline_id] = result
+            for key in total:
+                total[key] += result[key]
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Simulated {total['rows']} rows ({mode}) in {elapsed * 1000:.1f} ms")
+
+        applied = {}
+        for key in THRESHOLD_FIELDS:
+            value = thresholds.get(key)
+            if value is None:
+                applied[key] = getattr(self.threshold_utils, key)
+            else:
+                applied[key] = "per-row" if np.ndim(value) else float(value)
+
+        return {
+            "mode": mode,
+            "thresholds": applied,
+            "total": total,
+            "pipelines": results,
+            "evaluation_ms": round(elapsed * 1000, 3)
+        }
+
+    def simulate_history(self, start=None, end=None, pipeline_id=None, thresholds=None, include_rows=False,
+                         mode="batch"):
+        temperature = self.fetch_history("temperature", start, end, pipeline_id)
+        pressure = self.fetch_history("pressure", start, end, pipeline_id)
+        return self.simulate(align_readings(temperature, pressure), thresholds, include_rows, mode)
@@ -0,0 +1,100 @@
+import logging
+import queue
+import threading
+import time
+import zlib
+
+class PartitionedWorkQueue:
+    def __init__(self, handler, workers=4, max_size=10000, name="worker"):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.name = name
+
+        # One bounded queue and worker per partition: messages with the same key
+        # always land on the same worker, so they are handled in arrival order
+        partition_size = max(1, max_size // self.workers)
+        self.queues = [queue.Queue(maxsize=partition_size) for _ in range(self.workers)]
+        self.threads = []
+
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.high_water = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start(self):
+        for index, work_queue in enumerate(self.queues):
+            thread = threading.Thread(target=self._worker, args=(work_queue,), name=f"{self.name}-{index}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, key, *args):
+        # Never blocks the caller: when a partition is full its oldest message
+        # is dropped, since newer sensor readings supersede it anyway
+        work_queue = self.queues[zlib.crc32(str(key).encode()) % self.workers]
+        item = (time.monotonic(), args)
+        dropped = 0
+
+        while True:
+            try:
+                work_queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    work_queue.get_nowait()
+                    work_queue.task_done()
+                    dropped += 1
+                except queue.Empty:
+                    pass
+
+        depth = work_queue.qsize()
+        with self.lock:
+            self.submitted += 1
+            self.dropped += dropped
+            if depth > self.high_water:
+                self.high_water = depth
+
+        if dropped:
+            logging.warning(f"{self.name} queue full, dropped {dropped} oldest message(s)")
+
+    def _worker(self, work_queue):
+        while True:
+            enqueued_at, args = work_queue.get()
+            wait = time.monotonic() - enqueued_at
+            failed = False
+            try:
+                self.handler(*args)
+            except Exception as e:
+                failed = True
+                logging.error(f"Error processing queued message: {str(e)}")
+            finally:
+                work_queue.task_done()
+
+            with self.lock:
+                self.processed += 1
+                self.total_wait += wait
+                if wait > self.max_wait:
+                    self.max_wait = wait
+                if failed:
+                    self.errors += 1
+
+    def get_stats(self):
+        depths = [work_queue.qsize() for work_queue in self.queues]
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "capacity": sum(work_queue.maxsize for work_queue in self.queues),
+                "depth": sum(depths),
+                "max_partition_depth": max(depths),
+                "high_water": self.high_water,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "avg_wait_ms": round(self.total_wait / self.processed * 1000, 3) if self.processed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
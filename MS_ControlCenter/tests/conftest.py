@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the service's modules the way main.py does, from the service directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeMQTTHandler:
+    # Records valve commands instead of publishing them
+    def __init__(self):
+        self.commands = []
+        self.succeed = True
+
+    def publish_valve_command(self, command, pipeline_id=None, valve_id=None, trace=None, command_id=None):
+        self.commands.append((command, pipeline_id, valve_id, command_id))
+        return self.succeed
+
+@pytest.fixture
+def thresholds():
+    from utils.threshold_utils import ThresholdUtils
+    return ThresholdUtils(pressure_min=30, pressure_max=150, temperature_min=10, temperature_max=80)
+
+@pytest.fixture
+def control_service(thresholds):
+    from services.control_service import ControlService
+
+    # Nothing listens on the discard port, so catalog calls fail fast
+    service = ControlService(FakeMQTTHandler(), thresholds, "http://127.0.0.1:9", min_dwell=0)
+    return service
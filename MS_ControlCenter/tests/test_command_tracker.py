@@ -0,0 +1,63 @@
+from services.command_tracker import CommandTracker
+
+def track(tracker, command_id="c1", valve_id="main", sent_at=0.0):
+    tracker.add(command_id, "CLOSE", "pipeline_1", valve_id, {}, sent_at)
+
+def test_unacked_command_is_retried_with_doubling_timeouts():
+    tracker = CommandTracker(ack_timeout=5, max_retries=3)
+    track(tracker)
+    
+    assert tracker.collect_due(4.9) == ([], [])
+    
+    retry_times = []
+    now = 0.0
+    for timeout in (5, 10, 20):
+        now += timeout
+        retries, expired = tracker.collect_due(now)
+        assert [command.command_id for command in retries] == ["c1"]
+        assert expired == []
+        retry_times.append(now)
+    
+    assert retry_times == [5.0, 15.0, 35.0]
+    assert tracker.collect_due(now + 39.9) == ([], [])
+    
+    retries, expired = tracker.collect_due(now + 40)
+    assert retries == [] and [command.attempts for command in expired] == [4]
+    stats = tracker.get_stats()
+    assert (stats["retried"], stats["timed_out"], stats["pending"]) == (3, 1, 0)
+
+def test_ack_stops_the_retries():
+    tracker = CommandTracker(ack_timeout=5, max_retries=3)
+    track(tracker)
+    
+    assert tracker.acknowledge("c1", True).command_id == "c1"
+    assert tracker.collect_due(100.0) == ([], [])
+    assert tracker.get_stats()["acked"] == 1
+
+def test_failed_and_duplicate_acks_are_counted():
+    tracker = CommandTracker()
+    track(tracker)
+    
+    tracker.acknowledge("c1", False)
+    assert tracker.acknowledge("c1", True) is None
+    stats = tracker.get_stats()
+    assert (stats["failed"], stats["acked"], stats["unknown_acks"]) == (1, 0, 1)
+
+def test_newer_command_for_a_valve_supersedes_the_pending_one():
+    tracker = CommandTracker(ack_timeout=5)
+    track(tracker, "c1", sent_at=0.0)
+    track(tracker, "c2", sent_at=1.0)
+    track(tracker, "c3", valve_id="bypass", sent_at=1.0)
+    
+    assert tracker.acknowledge("c1", True) is None
+    retries, _ = tracker.collect_due(6.0)
+    assert sorted(command.command_id for command in retries) == ["c2", "c3"]
+    assert tracker.get_stats()["superseded"] == 1
+
+def test_ack_of_a_superseded_command_keeps_the_newer_one_tracked():
+    tracker = CommandTracker(ack_timeout=5)
+    track(tracker, "c1")
+    tracker.acknowledge("c1", True)
+    track(tracker, "c2")
+    
+    assert tracker.by_valve[("pipeline_1", "main")] == "c2"
@@ -0,0 +1,39 @@
+import threading
+
+def reading(pipeline_id, metric, value):
+    return "/sensor/" + metric, {"value": value, "pipeline_id": pipeline_id}
+
+def feed(service, pipeline_id, pressure, temperature=50):
+    service.handle_sensor_data(*reading(pipeline_id, "temperature", temperature))
+    service.handle_sensor_data(*reading(pipeline_id, "pressure", pressure))
+
+def test_commands_are_addressed_to_the_pipeline(control_service):
+    feed(control_service, "line_a", 200)
+
+    assert control_service.mqtt_handler.commands[0][:3] == ("OPEN", "line_a", "valve")
+
+def test_pipelines_keep_separate_state(control_service):
+    feed(control_service, "line_a", 200)
+    feed(control_service, "line_b", 100)
+
+    status = control_service.get_latest_status()["pipelines"]
+    assert status["line_a"]["valves"]["valve"]["last_action"] == "OPEN"
+    assert status["line_b"]["valves"]["valve"]["last_action"] is None
+
+def test_a_busy_pipeline_does_not_block_another(control_service):
+    feed(control_service, "line_a", 100)
+    busy = control_service.pipelines["line_a"]
+
+    done = threading.Event()
+
+    def other_pipeline():
+        feed(control_service, "line_b", 200)
+        done.set()
+
+    with busy.lock:
+        thread = threading.Thread(target=other_pipeline)
+        thread.start()
+        assert done.wait(2), "line_b waited for line_a's lock"
+    thread.join()
+
+    assert control_service.pipelines["line_b"].lock is not busy.lock
@@ -0,0 +1,54 @@
+import pytest
+
+from utils.latency import BUCKET_BOUNDS, LatencyHistogram, LatencyTracker
+
+def test_buckets_grow_by_ten_percent():
+    ratios = [upper / lower for lower, upper in zip(BUCKET_BOUNDS, BUCKET_BOUNDS[1:-1])]
+    assert all(ratio == pytest.approx(1.1) for ratio in ratios)
+    assert BUCKET_BOUNDS[-1] == 120.0
+
+@pytest.mark.parametrize("fraction", [0.5, 0.95, 0.99])
+def test_percentiles_are_within_a_bucket(fraction):
+    histogram = LatencyHistogram()
+    samples = [i / 1000 for i in range(1, 1001)]
+    for seconds in samples:
+        histogram.record(seconds)
+    
+    exact = samples[int(fraction * len(samples)) - 1]
+    assert exact <= histogram.percentile(fraction) <= exact * 1.1
+
+def test_percentile_never_exceeds_the_max():
+    histogram = LatencyHistogram()
+    histogram.record(0.0105)
+    assert histogram.percentile(0.99) == 0.0105
+
+def test_values_beyond_the_last_bucket_report_the_max():
+    histogram = LatencyHistogram()
+    histogram.record(300.0)
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(0.5) == 300.0
+
+def test_negative_durations_are_clamped():
+    histogram = LatencyHistogram()
+    histogram.record(-0.5)
+    assert (histogram.clamped, histogram.count, histogram.max) == (1, 1, 0.0)
+    assert histogram.to_dict()["p50_ms"] == 0.0
+
+def test_empty_histogram_has_no_percentiles():
+    stats = LatencyHistogram().to_dict()
+    assert stats["count"] == 0
+    assert stats["mean_ms"] is None and stats["p99_ms"] is None
+
+def test_tracker_keeps_hops_apart_until_reset():
+    tracker = LatencyTracker()
+    tracker.observe("broker", 0.002)
+    tracker.observe("broker", 0.004)
+    tracker.observe("control", 0.010)
+    
+    snapshot = tracker.snapshot()
+    assert snapshot["broker"]["count"] == 2
+    assert snapshot["broker"]["mean_ms"] == 3.0
+    assert snapshot["control"]["max_ms"] == 10.0
+    
+    tracker.reset()
+    assert tracker.snapshot() == {}
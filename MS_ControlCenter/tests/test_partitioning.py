@@ -0,0 +1,27 @@
+import pytest
+
+from utils.partitioning import PartitionAssignment, partition_for, partition_topic
+
+def test_partition_is_the_same_in_every_process():
+    # crc32, not the per-process salted hash(): publishers and instances must agree
+    assert partition_for("pipeline_1", 8) == 4
+    assert partition_for("pipeline_2", 8) == 6
+
+def test_topic_gets_the_partition_suffix():
+    assert partition_topic("/sensor/temperature", "pipeline_1", 8) == "/sensor/temperature/4"
+    assert partition_topic("/sensor/temperature", "pipeline_1", 0) == "/sensor/temperature"
+
+@pytest.mark.parametrize("partitions, instance_count", [(8, 1), (8, 3), (16, 4), (5, 5)])
+def test_every_partition_has_exactly_one_owner(partitions, instance_count):
+    assignments = [PartitionAssignment(partitions, instance_count, index) for index in range(instance_count)]
+    owned = sorted(partition for assignment in assignments for partition in assignment.owned)
+    assert owned == list(range(partitions))
+    
+    for key in (f"pipeline_{i}" for i in range(50)):
+        owners = [assignment.instance_index for assignment in assignments if assignment.owns(key)]
+        assert owners == [assignments[0].owner_of(key)]
+
+@pytest.mark.parametrize("partitions, instance_count, instance_index", [(0, 1, 0), (8, 0, 0), (8, 2, 2), (8, 2, -1), (2, 3, 0)])
+def test_invalid_assignments_are_rejected(partitions, instance_count, instance_index):
+    with pytest.raises(ValueError):
+        PartitionAssignment(partitions, instance_count, instance_index)
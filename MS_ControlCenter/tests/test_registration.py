@@ -0,0 +1,24 @@
+from utils.partitioning import PartitionAssignment
+
+def registered(service):
+    return {info["service_id"]: info for info in service.registrations}
+
+def test_single_instance_registers_under_the_logical_name(control_service):
+    control_service.update_service_info("10.0.0.5", 8082)
+
+    [info] = control_service.registrations
+    assert info["service_id"] == "control_center"
+    assert info["endpoints"]["command"]["url"] == "http://10.0.0.5:8082/api/control/command"
+    assert info["metadata"]["endpoint"] == "http://10.0.0.5:8082"
+
+def test_scaled_out_instance_registers_itself_and_the_group(control_service):
+    control_service.assignment = PartitionAssignment(8, instance_count=2, instance_index=1)
+    control_service.update_service_info("10.0.0.6", 8082)
+
+    records = registered(control_service)
+    assert records["control_center_1"]["name"] == "control_center"
+    assert records["control_center_1"]["metadata"]["instance_index"] == 1
+    assert records["control_center"]["endpoints"] == {}
+    assert records["control_center"]["metadata"] == {
+        "partitions": 8, "instance_count": 2, "instance_prefix": "control_center_"
+    }
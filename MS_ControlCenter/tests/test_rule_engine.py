@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from utils.rule_engine import RuleEngine, compile_rules
+
+PRESSURE_RULES = [
+    {"action": "OPEN", "any": [{"metric": "pressure", "op": ">", "value": 150}]},
+    {"action": "CLOSE", "all": [
+        {"metric": "pressure", "op": "<", "value": 30},
+        {"metric": "temperature", "op": "<", "value": 80}
+    ], "alert": False}
+]
+
+def test_first_matching_rule_wins():
+    table = compile_rules(PRESSURE_RULES)
+
+    assert table.metrics == {"pressure", "temperature"}
+    assert table.evaluate({"pressure": 160, "temperature": 20}) == ("OPEN", True)
+    assert table.evaluate({"pressure": 20, "temperature": 20}) == ("CLOSE", False)
+    assert table.evaluate({"pressure": 100, "temperature": 20}) == (None, False)
+
+def test_active_action_holds_within_the_hysteresis_band():
+    table = compile_rules(PRESSURE_RULES, {"pressure": 5})
+
+    assert table.holds({"pressure": 147, "temperature": 20}, "OPEN")
+    assert not table.holds({"pressure": 144, "temperature": 20}, "OPEN")
+    assert table.holds({"pressure": 33, "temperature": 20}, "CLOSE")
+    assert not table.holds({"pressure": 36, "temperature": 20}, "CLOSE")
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf, "150", True])
+def test_non_finite_or_non_numeric_values_are_rejected(value):
+    rules = [{"action": "OPEN", "any": [{"metric": "pressure", "op": ">", "value": value}]}]
+
+    with pytest.raises(ValueError, match="finite number"):
+        compile_rules(rules)
+
+@pytest.mark.parametrize("band", [math.nan, math.inf, -1, "5"])
+def test_invalid_hysteresis_is_rejected(band):
+    with pytest.raises(ValueError, match="Hysteresis for pressure"):
+        compile_rules(PRESSURE_RULES, {"pressure": band})
+
+def test_nan_threshold_rejects_the_whole_engine(thresholds):
+    thresholds.pressure_max = math.nan
+
+    with pytest.raises(ValueError):
+        RuleEngine(thresholds.to_rules())
+
+@pytest.mark.parametrize("rule", [
+    {"action": "VENT", "any": [{"metric": "pressure", "op": ">", "value": 1}]},
+    {"action": "OPEN"},
+    {"action": "OPEN", "any": []},
+    {"action": "OPEN", "any": [{"metric": "pressure", "op": "=>", "value": 1}]},
+    {"action": "OPEN", "any": [{"op": ">", "value": 1}]}
+])
+def test_malformed_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        compile_rules([rule])
+
+def test_valve_specific_table_wins_over_pipeline_table():
+    engine = RuleEngine(
+        PRESSURE_RULES,
+        {
+            "line_a": [{"action": "OPEN", "any": [{"metric": "pressure", "op": ">", "value": 100}]}],
+            "line_a/bypass": [{"action": "CLOSE", "any": [{"metric": "pressure", "op": ">", "value": 100}]}]
+        },
+        {"line_a": ["main", "bypass"]}
+    )
+
+    assert engine.table_for("line_a", "main").evaluate({"pressure": 120})[0] == "OPEN"
+    assert engine.table_for("line_a", "bypass").evaluate({"pressure": 120})[0] == "CLOSE"
+    assert engine.table_for("line_b", "valve") is engine.default_table
+    assert engine.valves_for("line_a", "valve") == ["main", "bypass"]
+    assert engine.valves_for("line_b", "valve") == ["valve"]
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from services.simulation_service import SimulationService
+from utils.rule_engine import RuleEngine
+
+PRESSURE = [100, 151, 148, 146, 144, 100, 151]
+
+@pytest.fixture
+def simulation(thresholds):
+    engine = RuleEngine(thresholds.to_rules(), hysteresis={"pressure": 5})
+    return SimulationService(thresholds, "http://127.0.0.1:9", engine, min_dwell=10)
+
+def series(**extra):
+    return {"line_a": dict({"pressure": PRESSURE, "temperature": [50] * len(PRESSURE)}, **extra)}
+
+def test_replay_applies_hysteresis(simulation):
+    result = simulation.simulate(series(), mode="replay")["pipelines"]["line_a"]
+
+    # 148 and 146 stay inside the 5 psi band, 144 releases the OPEN;
+    # the second 151 repeats the valve's state and is suppressed
+    assert result["open"] == 4
+    assert (result["commands"], result["suppressed"]) == (1, 3)
+
+def test_replay_applies_dwell_time_on_row_times(simulation):
+    data = {"line_a": {"pressure": [151, 20, 20], "temperature": [50, 5, 5], "time": [0, 1, 2]}}
+    result = simulation.simulate(data, include_rows=True, mode="replay")["pipelines"]["line_a"]
+
+    assert result["commands"] == 1
+    assert result["command_log"] == [{"row": 0, "valve_id": "valve", "action": "OPEN", "time": 0}]
+
+    data["line_a"]["time"] = [0, 1, 11]
+    result = simulation.simulate(data, include_rows=True, mode="replay")["pipelines"]["line_a"]
+    assert [entry["action"] for entry in result["command_log"]] == ["OPEN", "CLOSE"]
+
+def test_replay_uses_reloaded_rule_tables(simulation, thresholds):
+    class Config:
+        pass
+    config = Config()
+    config.thresholds = thresholds
+    config.rule_engine = RuleEngine(
+        thresholds.to_rules(),
+        {"line_a": [{"action": "CLOSE", "all": [{"metric": "pressure", "op": ">", "value": 140}]}]}
+    )
+    simulation.apply_config(config)
+
+    result = simulation.simulate(series(), mode="replay")["pipelines"]["line_a"]
+    assert (result["open"], result["close"]) == (0, 5)
+
+def test_threshold_overrides_keep_pipeline_tables(simulation):
+    result = simulation.simulate(series(), {"pressure_max": 145}, mode="replay")["pipelines"]["line_a"]
+
+    assert result["open"] == 5
+    assert simulation.simulate(series(), {"pressure_max": 145}, mode="replay")["thresholds"]["pressure_max"] == 145.0
+
+def test_batch_is_the_default_and_applies_hysteresis(simulation):
+    result = simulation.simulate(series())
+
+    assert result["mode"] == "batch"
+    line = result["pipelines"]["line_a"]
+    # Both 151s raise an alert: the OPEN was released in between
+    assert (line["open"], line["commands"], line["suppressed"], line["alerts"]) == (4, 1, 3, 2)
+    assert line["custom_rules"] is False
+
+@pytest.mark.parametrize("hysteresis, min_dwell", [({}, 0), ({"pressure": 5, "temperature": 3}, 0), ({"pressure": 5}, 30)])
+def test_batch_matches_replay(thresholds, hysteresis, min_dwell):
+    engine = RuleEngine(thresholds.to_rules(), hysteresis=hysteresis)
+    simulation = SimulationService(thresholds, "http://127.0.0.1:9", engine, min_dwell=min_dwell)
+    rng = np.random.default_rng(7)
+    rows = 5000
+    data = {"line_a": {
+        "pressure": rng.normal(90, 50, rows).tolist(),
+        "temperature": rng.normal(45, 30, rows).tolist(),
+        "time": np.cumsum(rng.integers(1, 5, rows)).tolist()
+    }}
+
+    batch = simulation.simulate(data, include_rows=True)["pipelines"]["line_a"]
+    replay = simulation.simulate(data, include_rows=True, mode="replay")["pipelines"]["line_a"]
+
+    for key in ("open", "close", "alerts", "commands", "suppressed", "command_log"):
+        assert batch[key] == replay[key], key
+    assert batch["commands"] > 20
+
+def test_batch_parses_iso_times_for_the_dwell(simulation):
+    data = {"line_a": {
+        "pressure": [151, 20, 20],
+        "temperature": [50, 5, 5],
+        "time": ["2025-03-30T00:00:00Z", "2025-03-30T00:00:01+00:00", "2025-03-30T00:00:11Z"]
+    }}
+    result = simulation.simulate(data, include_rows=True)["pipelines"]["line_a"]
+    assert [(entry["row"], entry["action"]) for entry in result["command_log"]] == [(0, "OPEN"), (2, "CLOSE")]
+
+def test_batch_rejects_unordered_times(simulation):
+    with pytest.raises(ValueError):
+        simulation.simulate({"line_a": {"pressure": [1, 2], "temperature": [1, 2], "time": [5, 1]}})
+
+def test_batch_flags_pipelines_with_their_own_rules(thresholds):
+    engine = RuleEngine(
+        thresholds.to_rules(),
+        {"line_a": [{"action": "CLOSE", "all": [{"metric": "pressure", "op": ">", "value": 140}]}]}
+    )
+    simulation = SimulationService(thresholds, "http://127.0.0.1:9", engine)
+    result = simulation.simulate(dict(series(), line_b=series()["line_a"]))["pipelines"]
+
+    assert (result["line_a"]["custom_rules"], result["line_b"]["custom_rules"]) == (True, False)
+
+def test_per_row_thresholds_run_in_batch_only(simulation):
+    per_row = {"pressure_max": [160] * 3 + [140] * (len(PRESSURE) - 3)}
+    result = simulation.simulate(series(), per_row)
+
+    assert result["thresholds"]["pressure_max"] == "per-row"
+    assert result["pipelines"]["line_a"]["open"] == 3
+    with pytest.raises(ValueError):
+        simulation.simulate(series(), per_row, mode="replay")
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+
+# See "Vendored modules" in the top-level README.md
+ROOT = Path(__file__).resolve().parents[2]
+
+VENDORED = {
+    "sensor_batch.py": [
+        "MS_RaspberryPiConnector/utils", "MS_ControlCenter/utils", "MS_TimeSeriesDBConnector/utils", "MessageBroker"
+    ],
+    "latency.py": ["MS_RaspberryPiConnector/utils", "MS_ControlCenter/utils"],
+    "partitioning.py": ["MS_RaspberryPiConnector/utils", "MS_ControlCenter/utils", "MS_Analytics/utils"]
+}
+
+@pytest.mark.parametrize("module", sorted(VENDORED))
+def test_copies_are_identical(module):
+    copies = [ROOT / directory / module for directory in VENDORED[module]]
+    missing = [str(copy) for copy in copies if not copy.exists()]
+    if missing:
+        pytest.skip(f"not a full checkout, missing {', '.join(missing)}")
+
+    contents = {copy.relative_to(ROOT).as_posix(): copy.read_bytes() for copy in copies}
+    reference = contents[f"MS_ControlCenter/utils/{module}"]
+    assert [path for path, content in contents.items() if content != reference] == []
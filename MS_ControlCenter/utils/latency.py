@@ -0,0 +1,83 @@
+import bisect
+import threading
+
+def _bucket_bounds(lowest=0.0001, highest=120.0, growth=1.1):
+    # Geometric bucket upper bounds in seconds: every bucket is 10% wider than
+    # the previous one, so percentiles are accurate to within 10%
+    bounds = []
+    bound = lowest
+    while bound < highest:
+        bounds.append(bound)
+        bound *= growth
+    bounds.append(highest)
+    return bounds
+
+BUCKET_BOUNDS = _bucket_bounds()
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max", "clamped")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Negative durations, e.g. from clock skew between hosts, recorded as 0
+        self.clamped = 0
+
+    def record(self, seconds):
+        if seconds < 0:
+            self.clamped += 1
+            seconds = 0.0
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index >= len(BUCKET_BOUNDS):
+                    return self.max
+                return min(BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+    def to_dict(self):
+        def ms(seconds):
+            return round(seconds * 1000, 3) if seconds is not None else None
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(0.50)),
+            "p95_ms": ms(self.percentile(0.95)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max),
+            "clamped": self.clamped
+        }
+
+class LatencyTracker:
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, hop, seconds):
+        with self.lock:
+            histogram = self.histograms.get(hop)
+            if histogram is None:
+                histogram = self.histograms[hop] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {hop: histogram.to_dict() for hop, histogram in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
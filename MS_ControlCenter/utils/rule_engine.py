@@ -0,0 +1,134 @@
+import json
+import logging
+import math
+
+OPERATORS = {">", ">=", "<", "<=", "==", "!="}
+
+# Direction a threshold moves by to release a condition that is already active
+RELEASE_DIRECTION = {">": -1, ">=": -1, "<": 1, "<=": 1, "==": 0, "!=": 0}
+
+class RuleTable:
+    __slots__ = ("rules", "metrics", "evaluate", "holds")
+
+    def __init__(self, rules, metrics, evaluate, holds):
+        self.rules = rules
+        self.metrics = metrics
+        self.evaluate = evaluate
+        self.holds = holds
+
+def _compile_condition(condition, hysteresis):
+    metric = condition.get("metric")
+    op = condition.get("op")
+    value = condition.get("value")
+
+    if not isinstance(metric, str) or not metric:
+        raise ValueError(f"Condition needs a metric name: {condition}")
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator {op!r} in condition {condition}")
+    # The values are written into generated source, where nan and inf would not even be names
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"Condition value must be a finite number: {condition}")
+
+    band = condition.get("hysteresis", hysteresis.get(metric, 0))
+    if isinstance(band, bool) or not isinstance(band, (int, float)) or not math.isfinite(band) or band < 0:
+        raise ValueError(f"Hysteresis for {metric} must be a finite, non-negative number, got {band!r}")
+    band = float(band)
+    release = float(value) + RELEASE_DIRECTION[op] * band
+    return metric, f"r[{metric!r}] {op} {float(value)!r}", f"r[{metric!r}] {op} {release!r}"
+
+def compile_rules(rules, hysteresis=None):
+    # Rules are checked in order and the first match wins, e.g.
+    # {"action": "OPEN", "any": [{"metric": "pressure", "op": ">", "value": 150}], "alert": true}
+    # The whole table is generated as one Python function so a message costs
+    # a single call with no per-rule interpretation. holds(r, action) tells
+    # whether an active action still applies with its thresholds relaxed by
+    # the metric's hysteresis band.
+    hysteresis = hysteresis or {}
+    metrics = set()
+    lines = ["def evaluate(r):"]
+    hold_lines = ["def holds(r, action):"]
+
+    for rule in rules:
+        action = rule.get("action")
+        if action not in ("OPEN", "CLOSE"):
+            raise ValueError(f"Rule action must be OPEN or CLOSE: {rule}")
+
+        if "all" in rule:
+            conditions, joiner = rule["all"], " and "
+        elif "any" in rule:
+            conditions, joiner = rule["any"], " or "
+        else:
+            raise ValueError(f"Rule needs an 'all' or 'any' list of conditions: {rule}")
+
+        if not conditions:
+            raise ValueError(f"Rule has no conditions: {rule}")
+
+        expressions = []
+        releases = []
+        for condition in conditions:
+            metric, expression, release = _compile_condition(condition, hysteresis)
+            metrics.add(metric)
+            expressions.append(expression)
+            releases.append(release)
+
+        alert = bool(rule.get("alert", True))
+        lines.append(f"    if {joiner.join(expressions)}:")
+        lines.append(f"        return {action!r}, {alert!r}")
+        hold_lines.append(f"    if action == {action!r} and ({joiner.join(releases)}):")
+        hold_lines.append("        return True")
+
+    lines.append("    return None, False")
+    hold_lines.append("    return False")
+
+    namespace = {}
+    exec(compile("\n".join(lines + hold_lines), "<valve rules>", "exec"), namespace)
+    return RuleTable(list(rules), frozenset(metrics), namespace["evaluate"], namespace["holds"])
+
+class RuleEngine:
+    def __init__(self, default_rules, pipeline_rules=None, pipeline_valves=None, hysteresis=None):
+        self.hysteresis = dict(hysteresis or {})
+        self.default_table = compile_rules(default_rules, self.hysteresis)
+
+        # Keys are "pipeline" or "pipeline/valve"; a valve-specific table wins
+        self.tables = {}
+        for key, rules in (pipeline_rules or {}).items():
+            self.tables[key] = compile_rules(rules, self.hysteresis)
+
+        self.pipeline_valves = {
+            pipeline_id: list(valves) for pipeline_id, valves in (pipeline_valves or {}).items()
+        }
+
+    def table_for(self, pipeline_id, valve_id):
+        table = self.tables.get(f"{pipeline_id}/{valve_id}")
+        if table is None:
+            table = self.tables.get(pipeline_id, self.default_table)
+        return table
+
+    def valves_for(self, pipeline_id, default_valve):
+        return self.pipeline_valves.get(pipeline_id, [default_valve])
+
+    def with_default_rules(self, default_rules):
+        # The same pipeline tables, valves and hysteresis around another default table
+        engine = RuleEngine(default_rules, None, self.pipeline_valves, self.hysteresis)
+        engine.tables = self.tables
+        return engine
+
+    @classmethod
+    def from_config(cls, config, default_rules, hysteresis=None):
+        # {"default": [...], "pipelines": {"pipeline_a": [...], "pipeline_a/valve_2": [...]},
+        #  "valves": {"pipeline_a": ["valve_1", "valve_2"]}, "hysteresis": {"pressure": 5}}
+        return cls(
+            config.get("default", default_rules),
+            config.get("pipelines"),
+            config.get("valves"),
+            dict(hysteresis or {}, **config.get("hysteresis", {}))
+        )
+
+    @classmethod
+    def from_file(cls, path, default_rules, hysteresis=None):
+        with open(path, "r") as f:
+            config = json.load(f)
+
+        engine = cls.from_config(config, default_rules, hysteresis)
+        logging.info(f"Loaded {len(engine.tables)} pipeline rule tables from {path}")
+        return engine
@@ -0,0 +1,104 @@
+import json
+import struct
+import uuid
+
+BATCH_FORMATS = ("json", "binary")
+
+# Binary layout, little endian: magic, version, sample count, sample interval (ms),
+# first sample time (epoch ms), trace id (uuid bytes), device id length and pipeline
+# id length, then the device id and pipeline id (utf-8) and count float32
+# temperatures followed by count float32 pressures. Version 1 had no pipeline id.
+BATCH_MAGIC = 0xB7
+BATCH_VERSION = 2
+_HEADER = struct.Struct("<BBHIq16sBB")
+_HEADER_V1 = struct.Struct("<BBHIq16sB")
+
+def encode_batch(batch, batch_format="json"):
+    # batch: {"device_id", "pipeline_id", "t0_ms", "interval_ms", "trace_id", "temperature": [...], "pressure": [...]}
+    temperature = batch["temperature"]
+    pressure = batch["pressure"]
+    if len(temperature) != len(pressure):
+        raise ValueError("temperature and pressure differ in length")
+    pipeline_id = batch.get("pipeline_id")
+
+    if batch_format == "json":
+        data = {
+            "d": batch["device_id"],
+            "t": batch["t0_ms"],
+            "i": batch["interval_ms"],
+            "id": batch["trace_id"],
+            "T": [round(value, 3) for value in temperature],
+            "P": [round(value, 3) for value in pressure]
+        }
+        if pipeline_id is not None:
+            data["p"] = pipeline_id
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    if batch_format == "binary":
+        device_id = batch["device_id"].encode()
+        pipeline = (pipeline_id or "").encode()
+        if len(device_id) > 255 or len(pipeline) > 255:
+            raise ValueError("device and pipeline ids are limited to 255 bytes")
+        count = len(temperature)
+        return b"".join((
+            _HEADER.pack(
+                BATCH_MAGIC, BATCH_VERSION, count, batch["interval_ms"], batch["t0_ms"],
+                uuid.UUID(hex=batch["trace_id"]).bytes, len(device_id), len(pipeline)
+            ),
+            device_id,
+            pipeline,
+            struct.pack(f"<{count}f{count}f", *temperature, *pressure)
+        ))
+
+    raise ValueError(f"Unknown batch format: {batch_format}")
+
+def decode_batch(payload):
+    # Either encoding; binary payloads are told apart by their first byte
+    if payload[:1] == bytes((BATCH_MAGIC,)):
+        version = payload[1]
+        if version == BATCH_VERSION:
+            magic, version, count, interval_ms, t0_ms, trace_id, device_length, pipeline_length = _HEADER.unpack_from(payload)
+            offset = _HEADER.size
+        elif version == 1:
+            magic, version, count, interval_ms, t0_ms, trace_id, device_length = _HEADER_V1.unpack_from(payload)
+            pipeline_length = 0
+            offset = _HEADER_V1.size
+        else:
+            raise ValueError(f"Unsupported batch version {version}")
+        device_id = payload[offset:offset + device_length].decode()
+        offset += device_length
+        pipeline_id = payload[offset:offset + pipeline_length].decode() or None
+        offset += pipeline_length
+        # float32 keeps about 7 significant digits; round like the JSON encoding does
+        values = [round(value, 3) for value in struct.unpack_from(f"<{count}f{count}f", payload, offset)]
+        return {
+            "device_id": device_id,
+            "pipeline_id": pipeline_id,
+            "t0_ms": t0_ms,
+            "interval_ms": interval_ms,
+            "trace_id": uuid.UUID(bytes=trace_id).hex,
+            "temperature": values[:count],
+            "pressure": values[count:]
+        }
+
+    data = json.loads(payload)
+    if len(data["T"]) != len(data["P"]):
+        raise ValueError("temperature and pressure differ in length")
+    return {
+        "device_id": data["d"],
+        "pipeline_id": data.get("p"),
+        "t0_ms": data["t"],
+        "interval_ms": data["i"],
+        "trace_id": data.get("id"),
+        "temperature": data["T"],
+        "pressure": data["P"]
+    }
+
+def batch_samples(batch):
+    # (epoch seconds, temperature, pressure) for every sample of a decoded batch
+    t0_ms = batch["t0_ms"]
+    interval_ms = batch["interval_ms"]
+    return [
+        ((t0_ms + index * interval_ms) / 1000.0, temperature, pressure)
+        for index, (temperature, pressure) in enumerate(zip(batch["temperature"], batch["pressure"]))
+    ]
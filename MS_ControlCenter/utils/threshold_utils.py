@@ -1,3 +1,11 @@
+import numpy as np
+
+# Action codes used by the batch API; ACTION_NAMES maps them back to commands
+ACTION_NONE = 0
+ACTION_OPEN = 1
+ACTION_CLOSE = 2
+ACTION_NAMES = np.array([None, "OPEN", "CLOSE"], dtype=object)
+
 class ThresholdUtils:
     def __init__(self, pressure_min, pressure_max, temperature_min, temperature_max):
         self.pressure_min = pressure_min
@@ -16,4 +24,62 @@ class ThresholdUtils:
             return "OPEN"
         elif pressure < self.pressure_min and temperature < self.temperature_min:
             return "CLOSE"
-        return None
\ No newline at end of file
+        return None
+    
+    def evaluate_batch(self, pressure, temperature, pressure_min=None, pressure_max=None,
+                       temperature_min=None, temperature_max=None):
+        # Vectorized get_valve_action / is_*_critical over whole arrays. Each
+        # threshold is a scalar or a per-row array and defaults to the configured one
+        pressure = np.asarray(pressure, dtype=float)
+        temperature = np.asarray(temperature, dtype=float)
+        p_min, p_max, t_min, t_max = self._resolve_batch(pressure_min, pressure_max, temperature_min, temperature_max)
+        
+        below_pressure = pressure < p_min
+        above_pressure = pressure > p_max
+        below_temperature = temperature < t_min
+        above_temperature = temperature > t_max
+        
+        actions = np.full(np.broadcast(pressure, temperature).shape, ACTION_NONE, dtype=np.int8)
+        actions[below_pressure & below_temperature] = ACTION_CLOSE
+        actions[above_pressure | above_temperature] = ACTION_OPEN
+        
+        return actions, below_pressure | above_pressure, below_temperature | above_temperature
+    
+    def holds_batch(self, pressure, temperature, pressure_band=0.0, temperature_band=0.0, pressure_min=None,
+                    pressure_max=None, temperature_min=None, temperature_max=None):
+        # Vectorized holds() of the to_rules() table: whether an active OPEN or
+        # CLOSE still applies with its thresholds relaxed by the hysteresis bands
+        pressure = np.asarray(pressure, dtype=float)
+        temperature = np.asarray(temperature, dtype=float)
+        p_min, p_max, t_min, t_max = self._resolve_batch(pressure_min, pressure_max, temperature_min, temperature_max)
+        
+        holds_open = (pressure > p_max - pressure_band) | (temperature > t_max - temperature_band)
+        holds_close = (pressure < p_min + pressure_band) & (temperature < t_min + temperature_band)
+        return holds_open, holds_close
+    
+    def _resolve_batch(self, pressure_min, pressure_max, temperature_min, temperature_max):
+        return (
+            self.pressure_min if pressure_min is None else np.asarray(pressure_min, dtype=float),
+            self.pressure_max if pressure_max is None else np.asarray(pressure_max, dtype=float),
+            self.temperature_min if temperature_min is None else np.asarray(temperature_min, dtype=float),
+            self.temperature_max if temperature_max is None else np.asarray(temperature_max, dtype=float)
+        )
+    
+    def to_rules(self):
+        # The rule engine equivalent of get_valve_action
+        return [
+            {
+                "action": "OPEN",
+                "any": [
+                    {"metric": "pressure", "op": ">", "value": self.pressure_max},
+                    {"metric": "temperature", "op": ">", "value": self.temperature_max}
+                ]
+            },
+            {
+                "action": "CLOSE",
+                "all": [
+                    {"metric": "pressure", "op": "<", "value": self.pressure_min},
+                    {"metric": "temperature", "op": "<", "value": self.temperature_min}
+                ]
+            }
+        ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gaussian import generate_gaussian_value
+from utils.sensor_batch import decode_batch, encode_batch
+
+DEVICE_ID = "raspberry_pi_connector"
+
+def legacy_messages(temperatures, pressures):
+    # Two messages per sample, as published without SENSOR_BATCH_FORMAT
+    messages = []
+    for temperature, pressure in zip(temperatures, pressures):
+        timestamp = datetime.datetime.now().isoformat()
+        trace = {"trace_id": uuid.uuid4().hex, "source_ts": time.time()}
+        for value, unit in ((temperature, "Celsius"), (pressure, "PSI")):
+            payload = {"value": value, "unit": unit, "timestamp": timestamp, "device_id": DEVICE_ID}
+            payload.update(trace)
+            messages.append(json.dumps(payload).encode())
+    return messages
+
+def main():
+    # Samples per message, e.g. a 5 s publish interval sampled at 1 Hz
+    samples = int(os.getenv("BENCH_SAMPLES", 5))
+    windows = int(os.getenv("BENCH_WINDOWS", 1000))
+
+    results = {"legacy": [0, 0], "json": [0, 0], "binary": [0, 0]}
+    for _ in range(windows):
+        temperatures = [generate_gaussian_value(70, 5, min_val=0) for _ in range(samples)]
+        pressures = [generate_gaussian_value(100, 10, min_val=0) for _ in range(samples)]
+
+        for message in legacy_messages(temperatures, pressures):
+            results["legacy"][0] += 1
+            results["legacy"][1] += len(message)
+
+        batch = {
+            "device_id": DEVICE_ID,
+            "t0_ms": int(time.time() * 1000),
+            "interval_ms": 1000,
+            "trace_id": uuid.uuid4().hex,
+            "temperature": temperatures,
+            "pressure": pressures
+        }
+        for batch_format in ("json", "binary"):
+            payload = encode_batch(batch, batch_format)
+            assert len(decode_batch(payload)["temperature"]) == samples
+            results[batch_format][0] += 1
+            results[batch_format][1] += len(payload)
+
+    total = samples * windows
+    legacy_bytes = results["legacy"][1]
+    print(f"samples: {total} ({samples} per batch)")
+    for name, (messages, size) in results.items():
+        print(f"{name:7s} messages/sample: {messages / total:5.2f}  bytes/sample: {size / total:7.1f}  "
+              f"({legacy_bytes / size:.1f}x fewer bytes than legacy)")
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from services.actuator_service import ActuatorService
 from services.mqtt_service import MQTTService
 from services.sensor_service import SensorService
 from services.rest_api import RaspberryPiAPI
+from utils.latency import LatencyTracker
 
 def setup_logging():
     logging.basicConfig(
@@ -31,9 +32,10 @@ def main():
     
     catalog_manager = CatalogManager()
     actuator_service = ActuatorService(catalog_manager)
-    mqtt_service = MQTTService(actuator_service)
+    latency_tracker = LatencyTracker()
+    mqtt_service = MQTTService(actuator_service, latency_tracker)
     sensor_service = SensorService(mqtt_service, catalog_manager)
-    rest_api = RaspberryPiAPI(sensor_service, actuator_service)
+    rest_api = RaspberryPiAPI(sensor_service, actuator_service, latency_tracker, mqtt_service)
     
     def graceful_shutdown(sig, frame):
         logging.info("Shutting down Raspberry Pi Connector...")
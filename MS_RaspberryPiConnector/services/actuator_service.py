@@ -2,6 +2,9 @@ import os
 import logging
 import datetime
 
+# Valve states by accepted command; the Control Center sends OPEN / CLOSE
+VALVE_COMMANDS = {"open": "open", "close": "closed", "closed": "closed"}
+
 class ActuatorService:
     def __init__(self, catalog_manager):
         self.catalog_manager = catalog_manager
@@ -10,11 +13,11 @@ class ActuatorService:
         logging.info(f"Actuator service initialized with valve state: {self.valve_state}")
 
     def set_valve_state(self, state):
-        if state.lower() not in ["open", "closed"]:
+        if state.lower() not in VALVE_COMMANDS:
             logging.warning(f"Invalid valve state requested: {state}. Must be 'open' or 'closed'.")
             return False
         
-        self.valve_state = state.lower()
+        self.valve_state = VALVE_COMMANDS[state.lower()]
         self.state_change_timestamp = datetime.datetime.now().isoformat()
         
         self._update_catalog_status()
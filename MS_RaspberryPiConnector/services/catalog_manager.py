@@ -88,7 +88,7 @@ class CatalogManager:
                 return False
                 
             url = f"{self.catalog_url}/api/catalog/status/{self.service_id}/sensors"
-            response = requests.put(url, json=status)
+            response = requests.put(url, json=status, timeout=3)
             
             if response.status_code != 200:
                 logging.warning(f"Failed to update sensor status: {response.status_code} - {response.text}")
@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+import time
+import logging
+
+class MessageBuffer:
+    # Encoded sensor messages that could not be published, kept in SQLite so they
+    # survive a restart of the Pi. The payloads are stored as published, with the
+    # timestamps they were taken at.
+    def __init__(self, path="sensor_buffer.db", max_messages=100000):
+        self.path = path
+        self.max_messages = max_messages
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL keeps appends cheap on SD cards; NORMAL only risks the last writes on power loss
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, payload BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self.count = self.connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        self.stats = {"buffered": 0, "drained": 0, "dropped": 0}
+        if self.count:
+            logging.info(f"{self.count} buffered messages from a previous run waiting to be sent")
+
+    def append(self, topic, payload):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO messages (topic, payload, created) VALUES (?, ?, ?)",
+                (topic, payload, time.time())
+            )
+            self.count += 1
+            self.stats["buffered"] += 1
+
+            if self.count > self.max_messages:
+                # Full: the oldest readings go first
+                excess = self.count - self.max_messages
+                self.connection.execute(
+                    "DELETE FROM messages WHERE id IN (SELECT id FROM messages ORDER BY id LIMIT ?)",
+                    (excess,)
+                )
+                self.count -= excess
+                self.stats["dropped"] += excess
+
+    def peek(self, limit):
+        # The oldest messages, left in the buffer until remove() confirms them
+        with self.lock:
+            return self.connection.execute(
+                "SELECT id, topic, payload FROM messages ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+    def remove(self, ids):
+        if not ids:
+            return
+        with self.lock:
+            removed = self.connection.execute(
+                f"DELETE FROM messages WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).rowcount
+            self.count -= removed
+            self.stats["drained"] += removed
+
+    def __len__(self):
+        return self.count
+
+    def get_stats(self):
+        with self.lock:
+            oldest = self.connection.execute("SELECT MIN(created) FROM messages").fetchone()[0]
+            stats = dict(self.stats)
+            stats["pending"] = self.count
+            stats["oldest_age_s"] = round(time.time() - oldest, 3) if oldest is not None else None
+            return stats
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
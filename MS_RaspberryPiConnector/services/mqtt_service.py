@@ -3,17 +3,61 @@ import paho.mqtt.client as mqtt
 import os
 import time
 import logging
+import threading
+from collections import OrderedDict, deque
+from services.message_buffer import MessageBuffer
+from utils.latency import LatencyTracker
+from utils.partitioning import partition_topic
+from utils.sensor_batch import encode_batch
+
+# Buffered readings are replayed on <topic>/backfill: the Time Series DB Connector
+# stores them with their original timestamps, the Control Center never acts on them
+BACKFILL_SUFFIX = "backfill"
 
 class MQTTService:
-    def __init__(self, actuator_service):
+    def __init__(self, actuator_service, latency_tracker=None):
         self.client = None
         self.broker_host = os.getenv("MQTT_BROKER_HOST", "localhost")
         self.broker_port = int(os.getenv("MQTT_BROKER_PORT", 1883))
         self.client_id = os.getenv("MQTT_CLIENT_ID", "raspberry_pi_connector")
+        # The pipeline and valve this Pi drives; commands addressed to others are ignored
+        self.pipeline_id = os.getenv("PIPELINE_ID") or self.client_id
+        self.valve_id = os.getenv("VALVE_ID", "valve")
         self.topic_temperature = os.getenv("MQTT_TOPIC_TEMPERATURE", "/sensor/temperature")
         self.topic_pressure = os.getenv("MQTT_TOPIC_PRESSURE", "/sensor/pressure")
+        self.topic_sensor_batch = os.getenv("MQTT_TOPIC_SENSOR_BATCH", "/sensor/batch")
         self.topic_valve = os.getenv("MQTT_TOPIC_VALVE", "/actuator/valve")
+        self.topic_valve_ack = os.getenv("MQTT_TOPIC_VALVE_ACK", "/actuator/valve/ack")
+        # With partitions, readings and acks go to <topic>/<partition of this pipeline>,
+        # so they reach the one Control Center instance that owns the pipeline
+        self.partitions = int(os.getenv("MQTT_PARTITIONS", 0))
+        self.topic_temperature = partition_topic(self.topic_temperature, self.pipeline_id, self.partitions)
+        self.topic_pressure = partition_topic(self.topic_pressure, self.pipeline_id, self.partitions)
+        self.topic_sensor_batch = partition_topic(self.topic_sensor_batch, self.pipeline_id, self.partitions)
+        self.topic_valve_ack = partition_topic(self.topic_valve_ack, self.pipeline_id, self.partitions)
         self.actuator_service = actuator_service
+        self.latency = latency_tracker or LatencyTracker()
+        # Acks of recently applied commands by command id, to recognise QoS 1 redeliveries and retries
+        self.recent_commands = OrderedDict()
+        self.recent_commands_size = int(os.getenv("COMMAND_ID_CACHE_SIZE", 256))
+        # Readings taken while the broker is unreachable are kept on disk and sent later
+        self.buffer = MessageBuffer(
+            os.getenv("BUFFER_FILE", "sensor_buffer.db"),
+            int(os.getenv("BUFFER_MAX_MESSAGES", 100000))
+        )
+        self.drain_rate = float(os.getenv("BUFFER_DRAIN_RATE", 20))
+        # Live readings count as delivered only once the broker acknowledged them;
+        # those without a PUBACK after ack_timeout seconds are moved to the buffer
+        self.ack_timeout = float(os.getenv("PUBLISH_ACK_TIMEOUT", 30))
+        self.inflight = deque()
+        self.inflight_lock = threading.Lock()
+        self.delivery = {"delivered": 0, "requeued": 0}
+        self.reconnect_min_delay = int(os.getenv("MQTT_RECONNECT_MIN_DELAY", 1))
+        self.reconnect_max_delay = int(os.getenv("MQTT_RECONNECT_MAX_DELAY", 120))
+        self.connected = False
+        self.running = False
+        self.drain_event = threading.Event()
+        self.drain_thread = None
         self.setup_client()
 
     def setup_client(self):
@@ -32,22 +76,37 @@ class MQTTService:
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.client.on_disconnect = self.on_disconnect
+        # The network thread reconnects on its own, waiting between attempts from
+        # the min delay doubling up to the max, so no callback ever blocks
+        self.client.reconnect_delay_set(self.reconnect_min_delay, self.reconnect_max_delay)
 
     def connect(self):
         try:
-            self.client.connect(self.broker_host, self.broker_port, 60)
+            # Asynchronous, so the Pi starts and buffers readings even while the broker is unreachable
+            self.client.connect_async(self.broker_host, self.broker_port, 60)
             self.client.loop_start()
-            logging.info(f"Connected to MQTT broker at {self.broker_host}:{self.broker_port}")
-            return True
+            logging.info(f"Connecting to MQTT broker at {self.broker_host}:{self.broker_port}")
         except Exception as e:
             logging.error(f"Failed to connect to MQTT broker: {e}")
             return False
 
+        if self.drain_thread is None:
+            self.running = True
+            self.drain_thread = threading.Thread(target=self._drain_buffer, name="mqtt-buffer-drain")
+            self.drain_thread.daemon = True
+            self.drain_thread.start()
+        return True
+
     def disconnect(self):
+        self.running = False
+        self.drain_event.set()
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
             logging.info("Disconnected from MQTT broker")
+        # Readings the broker has not acknowledged yet are kept for the next run
+        self._settle_inflight(flush=True)
+        self.buffer.close()
 
     def on_connect(self, client, userdata, flags, rc, properties=None):
         """
@@ -56,20 +115,26 @@ class MQTTService:
         """
         if rc == 0:
             logging.info("Connected to MQTT broker")
+            self.connected = True
             self.client.subscribe(self.topic_valve)
             logging.info(f"Subscribed to {self.topic_valve}")
+            if len(self.buffer):
+                logging.info(f"Sending {len(self.buffer)} buffered messages")
+                self.drain_event.set()
         else:
             logging.error(f"Failed to connect to MQTT broker with result code {rc}")
             
-    def on_disconnect(self, client, userdata, rc, properties=None):
+    def on_disconnect(self, client, userdata, *args):
         """
         Callback for when the client disconnects from the broker.
-        The properties parameter is used with MQTT v5 only (Python 3.13+).
+        Called with (rc) by the version 1 callback API and with
+        (flags, reason_code, properties) by version 2 (Python 3.13+).
         """
+        rc = args[0] if len(args) == 1 else args[1]
+        self.connected = False
         if rc != 0:
-            logging.warning(f"Unexpected disconnection from MQTT broker with result code {rc}")
-            time.sleep(5)
-            self.connect()
+            # Readings are buffered until the network thread has reconnected
+            logging.warning(f"Unexpected disconnection from MQTT broker with result code {rc}, reconnecting")
 
     def on_message(self, client, userdata, msg, properties=None):
         """
@@ -82,36 +147,190 @@ class MQTTService:
             
             if topic == self.topic_valve:
                 if "command" in payload:
-                    command = payload["command"]
-                    self.actuator_service.set_valve_state(command)
-                    logging.info(f"Received valve command: {command}")
+                    self._handle_valve_command(payload)
         except Exception as e:
             logging.error(f"Error processing MQTT message: {e}")
 
-    def publish_temperature(self, temperature, timestamp):
+    def _is_local_command(self, payload):
+        # Commands without a pipeline or valve id are meant for every Pi
+        pipeline_id = payload.get("pipeline_id")
+        valve_id = payload.get("valve_id")
+        return pipeline_id in (None, self.pipeline_id) and valve_id in (None, self.valve_id)
+
+    def _handle_valve_command(self, payload):
+        if not self._is_local_command(payload):
+            logging.debug(f"Ignoring valve command for {payload.get('pipeline_id')}/{payload.get('valve_id')}")
+            return
+
+        command_id = payload.get("command_id")
+        if command_id is not None and command_id in self.recent_commands:
+            # Already applied: acknowledge again with the original outcome instead of re-applying
+            logging.info(f"Duplicate valve command {command_id} ignored")
+            ack = dict(self.recent_commands[command_id])
+            ack["duplicate"] = True
+            self.publish(self.topic_valve_ack, ack)
+            return
+
+        received_ts = time.time()
+        command = payload["command"]
+        success = self.actuator_service.set_valve_state(command)
+        logging.info(f"Received valve command: {command}")
+        ack = self._acknowledge(payload, success, received_ts)
+
+        if command_id is not None:
+            self.recent_commands[command_id] = ack
+            while len(self.recent_commands) > self.recent_commands_size:
+                self.recent_commands.popitem(last=False)
+
+    def _acknowledge(self, command, success, received_ts):
+        # Record the command's hops and echo its trace back to the Control Center
+        applied_ts = time.time()
+        self.latency.observe("command_apply", applied_ts - received_ts)
+        if command.get("sent_ts") is not None:
+            self.latency.observe("command_delivery", received_ts - command["sent_ts"])
+        if command.get("source_ts") is not None:
+            self.latency.observe("control_loop", applied_ts - command["source_ts"])
+
+        ack = {
+            "command_id": command.get("command_id"),
+            "trace_id": command.get("trace_id"),
+            "command": command["command"],
+            "success": success,
+            "state": self.actuator_service.get_valve_state()["state"],
+            "source_ts": command.get("source_ts"),
+            "sent_ts": command.get("sent_ts"),
+            "applied_ts": applied_ts,
+            "device_id": self.client_id,
+            "pipeline_id": self.pipeline_id,
+            "valve_id": self.valve_id
+        }
+        self.publish(self.topic_valve_ack, ack)
+        return ack
+
+    def publish_temperature(self, temperature, timestamp, trace=None):
         payload = {
             "value": temperature,
             "unit": "Celsius",
             "timestamp": timestamp,
-            "device_id": self.client_id
+            "device_id": self.client_id,
+            "pipeline_id": self.pipeline_id
         }
-        self.publish(self.topic_temperature, payload)
+        if trace:
+            payload.update(trace)
+        self.publish_reading(self.topic_temperature, payload)
 
-    def publish_pressure(self, pressure, timestamp):
+    def publish_pressure(self, pressure, timestamp, trace=None):
         payload = {
             "value": pressure,
             "unit": "PSI",
             "timestamp": timestamp,
-            "device_id": self.client_id
+            "device_id": self.client_id,
+            "pipeline_id": self.pipeline_id
         }
-        self.publish(self.topic_pressure, payload)
+        if trace:
+            payload.update(trace)
+        self.publish_reading(self.topic_pressure, payload)
+
+    def publish_sensor_batch(self, batch, batch_format):
+        # Both metrics for a whole window in one message
+        self.publish_reading(self.topic_sensor_batch, batch, encode_batch(batch, batch_format))
+
+    def publish_reading(self, topic, payload, encoded=None):
+        encoded = json.dumps(payload) if encoded is None else encoded
+        info = self.publish_raw(topic, encoded, payload) if self.connected else None
+        if info is None:
+            self.buffer.append(topic, encoded)
+            logging.debug(f"Could not publish, buffered message for {topic}")
+            return
+        with self.inflight_lock:
+            self.inflight.append((info, topic, encoded, time.monotonic()))
+
+    def _settle_inflight(self, flush=False):
+        # Counts acknowledged live readings as delivered and buffers the ones whose
+        # PUBACK is overdue, or all unacknowledged ones when flushing on shutdown
+        now = time.monotonic()
+        expired = []
+        with self.inflight_lock:
+            pending = deque()
+            for entry in self.inflight:
+                info, topic, encoded, sent_at = entry
+                try:
+                    published, failed = info.is_published(), False
+                except (RuntimeError, ValueError):
+                    published, failed = False, True
+                if published:
+                    self.delivery["delivered"] += 1
+                elif failed or flush or now - sent_at >= self.ack_timeout:
+                    expired.append((topic, encoded))
+                else:
+                    pending.append(entry)
+            self.inflight = pending
+            self.delivery["requeued"] += len(expired)
+
+        for topic, encoded in expired:
+            self.buffer.append(topic, encoded)
+        if expired:
+            logging.warning(f"{len(expired)} readings not acknowledged by the broker, buffered for replay")
+
+    def get_delivery_stats(self):
+        with self.inflight_lock:
+            stats = dict(self.delivery)
+            stats["in_flight"] = len(self.inflight)
+        stats.update(self.buffer.get_stats())
+        return stats
+
+    def _drain_buffer(self):
+        # Replays buffered messages oldest first, at most drain_rate per second so a
+        # long outage does not saturate the uplink. A message leaves the buffer once
+        # the broker has acknowledged it; one sent again after a disconnect rewrites
+        # the same time series point, so duplicates are harmless
+        while self.running:
+            self._settle_inflight()
+            if not self.connected or not len(self.buffer):
+                self.drain_event.wait(1)
+                self.drain_event.clear()
+                continue
+
+            started = time.monotonic()
+            sent = self._drain_once()
+            time.sleep(max(0.0, sent / self.drain_rate - (time.monotonic() - started)))
+
+    def _drain_once(self):
+        # One batch of the replay; returns how many messages it tried to send
+        chunk = self.buffer.peek(max(1, int(self.drain_rate)))
+        sent = []
+        for message_id, topic, payload in chunk:
+            info = self.client.publish(f"{topic}/{BACKFILL_SUFFIX}", payload, qos=1)
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                break
+            sent.append((message_id, info))
+
+        confirmed = []
+        for message_id, info in sent:
+            try:
+                info.wait_for_publish(timeout=10)
+            except (RuntimeError, ValueError):
+                break
+            if not info.is_published():
+                break
+            confirmed.append(message_id)
+        self.buffer.remove(confirmed)
+
+        if confirmed and not len(self.buffer):
+            logging.info("All buffered messages sent")
+        return len(chunk)
 
     def publish(self, topic, payload):
+        self.publish_raw(topic, json.dumps(payload), payload)
+
+    def publish_raw(self, topic, encoded, payload=None):
         try:
-            result = self.client.publish(topic, json.dumps(payload), qos=1)
+            result = self.client.publish(topic, encoded, qos=1)
             if result.rc != mqtt.MQTT_ERR_SUCCESS:
                 logging.error(f"Failed to publish to {topic}: {mqtt.error_string(result.rc)}")
-            else:
-                logging.debug(f"Published to {topic}: {payload}")
+                return None
+            logging.debug(f"Published to {topic}: {payload}")
+            return result
         except Exception as e:
-            logging.error(f"Error publishing to MQTT: {e}")
\ No newline at end of file
+            logging.error(f"Error publishing to MQTT: {e}")
+            return None
\ No newline at end of file
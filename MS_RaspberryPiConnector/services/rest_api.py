@@ -4,9 +4,11 @@ import os
 import logging
 
 class RaspberryPiAPI:
-    def __init__(self, sensor_service, actuator_service):
+    def __init__(self, sensor_service, actuator_service, latency_tracker=None, mqtt_service=None):
         self.sensor_service = sensor_service
         self.actuator_service = actuator_service
+        self.latency_tracker = latency_tracker
+        self.mqtt_service = mqtt_service
         self.port = int(os.getenv("SERVICE_PORT", 8081))
 
     def start(self):
@@ -24,6 +26,8 @@ class RaspberryPiAPI:
         
         cherrypy.tree.mount(SensorResource(self.sensor_service), '/api/sensors', config)
         cherrypy.tree.mount(ActuatorResource(self.actuator_service), '/api/actuator', config)
+        if self.latency_tracker:
+            cherrypy.tree.mount(MetricsResource(self.latency_tracker, self.mqtt_service), '/api/metrics', config)
         
         cherrypy.engine.start()
         logging.info(f"REST API started on port {self.port}")
@@ -43,6 +47,19 @@ class SensorResource:
         return json.dumps(readings)
 
 
+class MetricsResource:
+    def __init__(self, latency_tracker, mqtt_service=None):
+        self.latency_tracker = latency_tracker
+        self.mqtt_service = mqtt_service
+    
+    @cherrypy.expose
+    def index(self):
+        metrics = {"latency": self.latency_tracker.snapshot()}
+        if self.mqtt_service is not None:
+            metrics["buffer"] = self.mqtt_service.get_delivery_stats()
+        return json.dumps(metrics)
+
+
 class ActuatorResource:
     def __init__(self, actuator_service):
         self.actuator_service = actuator_service
@@ -3,7 +3,9 @@ import os
 import logging
 import datetime
 import threading
+import uuid
 from utils.gaussian import generate_gaussian_value
+from utils.sensor_batch import BATCH_FORMATS
 
 class SensorService:
     def __init__(self, mqtt_service, catalog_manager):
@@ -14,22 +16,44 @@ class SensorService:
         self.pressure_mean = float(os.getenv("PRESSURE_MEAN", 100))
         self.pressure_std = float(os.getenv("PRESSURE_STD", 10))
         self.publish_interval = int(os.getenv("SENSOR_PUBLISH_INTERVAL", 5))
+        # With a batch format, readings are sampled every SENSOR_SAMPLE_INTERVAL and
+        # sent as one combined message per publish interval instead of two per sample
+        self.batch_format = os.getenv("SENSOR_BATCH_FORMAT", "").lower() or None
+        if self.batch_format is not None and self.batch_format not in BATCH_FORMATS:
+            raise ValueError(f"SENSOR_BATCH_FORMAT must be one of {', '.join(BATCH_FORMATS)}")
+        self.sample_interval = float(os.getenv("SENSOR_SAMPLE_INTERVAL", 1))
+        # The catalog only shows the latest readings, so it is updated on its own, slower cadence
+        self.status_interval = float(os.getenv("CATALOG_STATUS_INTERVAL", 60))
         self.running = False
         self.publish_thread = None
+        self.status_thread = None
         self.last_temperature = None
         self.last_pressure = None
+        self.last_timestamp = None
 
     def start(self):
         self.running = True
-        self.publish_thread = threading.Thread(target=self._publish_sensor_data)
+        if self.batch_format:
+            self.publish_thread = threading.Thread(target=self._publish_sensor_batches)
+        else:
+            self.publish_thread = threading.Thread(target=self._publish_sensor_data)
         self.publish_thread.daemon = True
         self.publish_thread.start()
-        logging.info(f"Sensor service started with publish interval: {self.publish_interval} seconds")
+        self.status_thread = threading.Thread(target=self._update_catalog_status)
+        self.status_thread.daemon = True
+        self.status_thread.start()
+        if self.batch_format:
+            logging.info(f"Sensor service started, sampling every {self.sample_interval} seconds and publishing "
+                         f"{self.batch_format} batches every {self.publish_interval} seconds")
+        else:
+            logging.info(f"Sensor service started with publish interval: {self.publish_interval} seconds")
 
     def stop(self):
         self.running = False
         if self.publish_thread:
             self.publish_thread.join(timeout=5)
+        if self.status_thread:
+            self.status_thread.join(timeout=1)
         logging.info("Sensor service stopped")
 
     def update_config(self, config):
@@ -52,6 +76,7 @@ class SensorService:
             self.temperature_mean, self.temperature_std, min_val=0)
         self.last_pressure = generate_gaussian_value(
             self.pressure_mean, self.pressure_std, min_val=0)
+        self.last_timestamp = datetime.datetime.now().isoformat()
         
         return self.last_temperature, self.last_pressure
 
@@ -60,21 +85,67 @@ class SensorService:
             try:
                 temperature, pressure = self._generate_sensor_readings()
                 timestamp = datetime.datetime.now().isoformat()
+                # Carried through the control loop to measure its latency end to end
+                trace = {"trace_id": uuid.uuid4().hex, "source_ts": time.time()}
                 
-                self.mqtt_service.publish_temperature(temperature, timestamp)
-                self.mqtt_service.publish_pressure(pressure, timestamp)
-                
-                self.catalog_manager.update_sensor_status({
-                    "temperature": temperature,
-                    "pressure": pressure,
-                    "timestamp": timestamp
-                })
+                self.mqtt_service.publish_temperature(temperature, timestamp, trace)
+                self.mqtt_service.publish_pressure(pressure, timestamp, trace)
                 
                 time.sleep(self.publish_interval)
             except Exception as e:
                 logging.error(f"Error in sensor data publishing: {e}")
                 time.sleep(5)  # Retry after a short delay
 
+    def _publish_sensor_batches(self):
+        next_sample = time.monotonic()
+        while self.running:
+            try:
+                window_end = time.monotonic() + self.publish_interval
+                t0_ms = None
+                temperatures = []
+                pressures = []
+                
+                # Sample on a fixed schedule, so the receivers can rebuild each sample's time from t0 and the interval
+                while self.running and next_sample < window_end:
+                    delay = next_sample - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    temperature, pressure = self._generate_sensor_readings()
+                    if t0_ms is None:
+                        t0_ms = int(time.time() * 1000)
+                    temperatures.append(temperature)
+                    pressures.append(pressure)
+                    next_sample += self.sample_interval
+                
+                if temperatures:
+                    self.mqtt_service.publish_sensor_batch({
+                        "device_id": self.mqtt_service.client_id,
+                        "pipeline_id": self.mqtt_service.pipeline_id,
+                        "t0_ms": t0_ms,
+                        "interval_ms": int(self.sample_interval * 1000),
+                        "trace_id": uuid.uuid4().hex,
+                        "temperature": temperatures,
+                        "pressure": pressures
+                    }, self.batch_format)
+                
+                # Skip the samples missed while falling behind instead of catching up in a burst
+                next_sample = max(next_sample, time.monotonic())
+            except Exception as e:
+                logging.error(f"Error in sensor batch publishing: {e}")
+                time.sleep(5)  # Retry after a short delay
+                next_sample = time.monotonic()
+
+    def _update_catalog_status(self):
+        while self.running:
+            time.sleep(self.status_interval)
+            if self.last_timestamp is None:
+                continue
+            self.catalog_manager.update_sensor_status({
+                "temperature": self.last_temperature,
+                "pressure": self.last_pressure,
+                "timestamp": self.last_timestamp
+            })
+
     def get_sensor_readings(self):
         return {
             "temperature": self.last_temperature,
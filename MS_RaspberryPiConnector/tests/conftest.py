@@ -0,0 +1,59 @@
+import os
+import sys
+
+import paho.mqtt.client as mqtt
+import pytest
+
+# Tests import the service's modules the way main.py does, from the service directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeMessageInfo:
+    def __init__(self, mid, rc=mqtt.MQTT_ERR_SUCCESS, published=True):
+        self.mid = mid
+        self.rc = rc
+        self.published = published
+
+    def wait_for_publish(self, timeout=None):
+        pass
+
+    def is_published(self):
+        return self.published
+
+class FakeClient:
+    # Records publishes instead of talking to a broker
+    def __init__(self):
+        self.published = []
+        self.rc = mqtt.MQTT_ERR_SUCCESS
+        self.acknowledged = True
+
+    def publish(self, topic, payload, qos=0):
+        self.published.append((topic, payload))
+        return FakeMessageInfo(len(self.published), self.rc, self.acknowledged)
+
+    def subscribe(self, topic, qos=0):
+        pass
+
+class FakeActuator:
+    def __init__(self):
+        self.commands = []
+
+    def set_valve_state(self, state):
+        self.commands.append(state)
+        return True
+
+    def get_valve_state(self):
+        return {"state": self.commands[-1].lower() if self.commands else "closed"}
+
+@pytest.fixture
+def mqtt_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("BUFFER_FILE", str(tmp_path / "buffer.db"))
+    monkeypatch.setenv("MQTT_CLIENT_ID", "pi-1")
+    monkeypatch.setenv("PIPELINE_ID", "pipeline-1")
+    monkeypatch.setenv("VALVE_ID", "valve")
+    from services.mqtt_service import MQTTService
+
+    service = MQTTService(FakeActuator())
+    service.client = FakeClient()
+    service.connected = True
+    yield service
+    service.buffer.close()
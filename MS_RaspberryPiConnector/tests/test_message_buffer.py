@@ -0,0 +1,38 @@
+from services.message_buffer import MessageBuffer
+
+def test_messages_are_returned_oldest_first_until_removed(tmp_path):
+    buffer = MessageBuffer(str(tmp_path / "buffer.db"))
+    buffer.append("/sensor/temperature", '{"value": 1}')
+    buffer.append("/sensor/pressure", b'{"value": 2}')
+
+    chunk = buffer.peek(10)
+    assert [(topic, payload) for _, topic, payload in chunk] == [
+        ("/sensor/temperature", b'{"value": 1}'),
+        ("/sensor/pressure", b'{"value": 2}')
+    ]
+    assert len(buffer) == 2
+
+    buffer.remove([chunk[0][0]])
+    assert [topic for _, topic, _ in buffer.peek(10)] == ["/sensor/pressure"]
+    assert buffer.get_stats()["drained"] == 1
+    buffer.close()
+
+def test_full_buffer_drops_the_oldest_messages(tmp_path):
+    buffer = MessageBuffer(str(tmp_path / "buffer.db"), max_messages=2)
+    for value in range(3):
+        buffer.append("/sensor/temperature", str(value))
+
+    assert [payload for _, _, payload in buffer.peek(10)] == [b"1", b"2"]
+    assert buffer.get_stats()["dropped"] == 1
+    buffer.close()
+
+def test_messages_survive_a_restart(tmp_path):
+    path = str(tmp_path / "buffer.db")
+    buffer = MessageBuffer(path)
+    buffer.append("/sensor/temperature", "1")
+    buffer.close()
+
+    reopened = MessageBuffer(path)
+    assert len(reopened) == 1
+    assert reopened.get_stats()["pending"] == 1
+    reopened.close()
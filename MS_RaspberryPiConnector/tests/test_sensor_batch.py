@@ -0,0 +1,52 @@
+import struct
+import uuid
+
+import pytest
+
+from utils.sensor_batch import BATCH_MAGIC, batch_samples, decode_batch, encode_batch
+
+BATCH = {
+    "device_id": "pi-1",
+    "pipeline_id": "pipeline-1",
+    "t0_ms": 1760886000000,
+    "interval_ms": 1000,
+    "trace_id": uuid.uuid4().hex,
+    "temperature": [70.125, 71.5, 69.875],
+    "pressure": [101.25, 99.5, 150.75]
+}
+
+@pytest.mark.parametrize("batch_format", ["json", "binary"])
+def test_round_trip(batch_format):
+    assert decode_batch(encode_batch(BATCH, batch_format)) == BATCH
+
+@pytest.mark.parametrize("batch_format", ["json", "binary"])
+def test_round_trip_without_pipeline(batch_format):
+    batch = dict(BATCH, pipeline_id=None)
+
+    assert decode_batch(encode_batch(batch, batch_format))["pipeline_id"] is None
+
+def test_binary_values_are_rounded_like_json():
+    batch = dict(BATCH, temperature=[70.123456], pressure=[101.987654])
+
+    decoded = decode_batch(encode_batch(batch, "binary"))
+    assert (decoded["temperature"], decoded["pressure"]) == ([70.123], [101.988])
+
+def test_version_1_binary_batches_still_decode():
+    device_id = b"pi-1"
+    payload = b"".join((
+        struct.pack("<BBHIq16sB", BATCH_MAGIC, 1, 1, 1000, 1760886000000, uuid.UUID(BATCH["trace_id"]).bytes, len(device_id)),
+        device_id,
+        struct.pack("<1f1f", 70.5, 101.25)
+    ))
+
+    decoded = decode_batch(payload)
+    assert decoded["device_id"] == "pi-1"
+    assert decoded["pipeline_id"] is None
+    assert (decoded["temperature"], decoded["pressure"]) == ([70.5], [101.25])
+
+def test_mismatched_series_are_rejected():
+    with pytest.raises(ValueError):
+        encode_batch(dict(BATCH, pressure=[1.0]), "json")
+
+def test_samples_are_spaced_by_the_interval():
+    assert [sample[0] for sample in batch_samples(BATCH)] == [1760886000.0, 1760886001.0, 1760886002.0]
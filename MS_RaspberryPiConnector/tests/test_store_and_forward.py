@@ -0,0 +1,67 @@
+import paho.mqtt.client as mqtt
+
+from services.mqtt_service import BACKFILL_SUFFIX
+
+def buffered(service):
+    return [(topic, payload) for _, topic, payload in service.buffer.peek(100)]
+
+def test_readings_are_buffered_while_offline(mqtt_service):
+    mqtt_service.connected = False
+    mqtt_service.publish_reading("/sensor/temperature", {"value": 70})
+
+    assert mqtt_service.client.published == []
+    assert buffered(mqtt_service) == [("/sensor/temperature", b'{"value": 70}')]
+
+def test_failed_publish_falls_back_to_the_buffer(mqtt_service):
+    mqtt_service.client.rc = mqtt.MQTT_ERR_NO_CONN
+    mqtt_service.publish_reading("/sensor/temperature", {"value": 70})
+
+    assert buffered(mqtt_service) == [("/sensor/temperature", b'{"value": 70}')]
+    assert mqtt_service.get_delivery_stats()["in_flight"] == 0
+
+def test_reading_counts_as_delivered_only_after_its_puback(mqtt_service):
+    mqtt_service.client.acknowledged = False
+    mqtt_service.publish_reading("/sensor/temperature", {"value": 70})
+
+    mqtt_service._settle_inflight()
+    assert mqtt_service.get_delivery_stats()["delivered"] == 0
+    assert mqtt_service.get_delivery_stats()["in_flight"] == 1
+
+    mqtt_service.inflight[0][0].published = True
+    mqtt_service._settle_inflight()
+    stats = mqtt_service.get_delivery_stats()
+    assert (stats["delivered"], stats["in_flight"], stats["pending"]) == (1, 0, 0)
+
+def test_unacknowledged_reading_is_buffered_after_the_timeout(mqtt_service):
+    mqtt_service.client.acknowledged = False
+    mqtt_service.ack_timeout = 0
+    mqtt_service.publish_reading("/sensor/temperature", {"value": 70})
+
+    mqtt_service._settle_inflight()
+    assert buffered(mqtt_service) == [("/sensor/temperature", b'{"value": 70}')]
+    assert mqtt_service.get_delivery_stats()["requeued"] == 1
+
+def test_unacknowledged_readings_are_kept_on_shutdown(mqtt_service):
+    mqtt_service.client.acknowledged = False
+    mqtt_service.publish_reading("/sensor/temperature", {"value": 70})
+
+    mqtt_service._settle_inflight(flush=True)
+    assert len(mqtt_service.buffer) == 1
+
+def test_replay_publishes_on_backfill_topics_and_removes_acknowledged(mqtt_service):
+    mqtt_service.buffer.append("/sensor/temperature", '{"value": 1}')
+    mqtt_service.buffer.append("/sensor/pressure", '{"value": 2}')
+
+    assert mqtt_service._drain_once() == 2
+    assert mqtt_service.client.published == [
+        (f"/sensor/temperature/{BACKFILL_SUFFIX}", b'{"value": 1}'),
+        (f"/sensor/pressure/{BACKFILL_SUFFIX}", b'{"value": 2}')
+    ]
+    assert len(mqtt_service.buffer) == 0
+
+def test_replay_keeps_messages_the_broker_did_not_acknowledge(mqtt_service):
+    mqtt_service.buffer.append("/sensor/temperature", '{"value": 1}')
+    mqtt_service.client.acknowledged = False
+
+    mqtt_service._drain_once()
+    assert len(mqtt_service.buffer) == 1
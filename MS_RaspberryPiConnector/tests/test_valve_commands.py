@@ -0,0 +1,52 @@
+import json
+
+def acks(service):
+    return [json.loads(payload) for topic, payload in service.client.published if topic == service.topic_valve_ack]
+
+def test_command_for_this_pipeline_is_applied_and_acknowledged(mqtt_service):
+    mqtt_service._handle_valve_command(
+        {"command": "OPEN", "command_id": "c1", "pipeline_id": "pipeline-1", "valve_id": "valve"}
+    )
+
+    assert mqtt_service.actuator_service.commands == ["OPEN"]
+    [ack] = acks(mqtt_service)
+    assert ack["command_id"] == "c1"
+    assert ack["success"] is True
+    assert ack["pipeline_id"] == "pipeline-1"
+
+def test_command_for_another_pipeline_is_ignored(mqtt_service):
+    mqtt_service._handle_valve_command({"command": "OPEN", "command_id": "c1", "pipeline_id": "pipeline-2"})
+
+    assert mqtt_service.actuator_service.commands == []
+    assert acks(mqtt_service) == []
+    assert "c1" not in mqtt_service.recent_commands
+
+def test_command_for_another_valve_is_ignored(mqtt_service):
+    mqtt_service._handle_valve_command(
+        {"command": "CLOSE", "command_id": "c1", "pipeline_id": "pipeline-1", "valve_id": "bypass"}
+    )
+
+    assert mqtt_service.actuator_service.commands == []
+    assert acks(mqtt_service) == []
+
+def test_command_without_address_applies_to_every_pi(mqtt_service):
+    mqtt_service._handle_valve_command({"command": "CLOSE"})
+
+    assert mqtt_service.actuator_service.commands == ["CLOSE"]
+
+def test_duplicate_command_is_acknowledged_again_without_reapplying(mqtt_service):
+    command = {"command": "OPEN", "command_id": "c1", "pipeline_id": "pipeline-1"}
+    mqtt_service._handle_valve_command(command)
+    mqtt_service._handle_valve_command(command)
+
+    assert mqtt_service.actuator_service.commands == ["OPEN"]
+    first, second = acks(mqtt_service)
+    assert "duplicate" not in first
+    assert second["duplicate"] is True
+
+def test_readings_carry_the_pipeline_id(mqtt_service):
+    mqtt_service.publish_temperature(70.5, "2026-01-01T00:00:00", None)
+
+    topic, payload = mqtt_service.client.published[-1]
+    assert topic == mqtt_service.topic_temperature
+    assert json.loads(payload)["pipeline_id"] == "pipeline-1"
@@ -0,0 +1,114 @@
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.registry_service import RegistryService
+
+# Run from the service directory: python benchmarks/bench_registry.py
+# BENCH_DEVICES, BENCH_SERVICES, BENCH_REPEAT and BENCH_SHARDS change the registry
+# size, the number of timed runs and the device shard count. Updates are timed as
+# the mean of many calls, and should not grow with the registry size.
+
+def make_device(i):
+    return {
+        "device_id": f"device_{i:06d}",
+        "name": f"Sensor {i}",
+        "device_type": "pressure" if i % 2 else "temperature",
+        "measurements": {"pressure": 50.0 + i % 40, "temperature": 20.0 + i % 15},
+        "location": {"zone": f"zone_{i % 10}", "section": f"section_{i % 50}"},
+        "associated_services": ["analytics", "control_center"] if i % 3 == 0 else ["analytics"]
+    }
+
+def make_device_record(device):
+    return dict(device, status="active", timestamp=int(time.time()), last_updated="2025-03-30T00:00:00")
+
+def timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def mean_time(func, calls):
+    # One untimed pass first, the first updates after a load pay for a full collection
+    for i in range(calls):
+        func(i)
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls
+
+def main():
+    count = int(os.getenv("BENCH_DEVICES", 100000))
+    service_count = int(os.getenv("BENCH_SERVICES", 1000))
+    repeat = int(os.getenv("BENCH_REPEAT", 5))
+
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as directory:
+        # Start from a snapshot so the registry is built the way it is at startup
+        storage_file = os.path.join(directory, "registry.json")
+        devices = {device["device_id"]: make_device_record(device) for device in map(make_device, range(count))}
+        with open(storage_file, "w") as f:
+            json.dump({"services": {}, "devices": devices, "revision": 0}, f)
+        del devices
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        # Snapshots are only flushed on close, so the updates below time the registry
+        # itself rather than the persister writing the whole file
+        registry = RegistryService(
+            storage_file,
+            persistence_mode="snapshot",
+            snapshot_flush_interval=3600,
+            snapshot_max_pending=10 ** 9,
+            device_shards=int(os.getenv("BENCH_SHARDS", 64))
+        )
+        load_time = time.perf_counter() - start
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        print(f"{count} devices")
+        print(f"  load            {load_time:8.2f} s (traced)")
+        print(f"  registry memory {used / 2 ** 20:8.1f} MiB ({used / count:.0f} B/device)")
+
+        dict_time = timeit(lambda: json.dumps(registry.get_all_devices()), repeat)
+        print(f"  full list (dict + json.dumps)  {dict_time * 1000:8.1f} ms")
+
+        if hasattr(registry, "get_devices_json"):
+            assert json.loads(registry.get_devices_json()) == registry.get_all_devices()
+            fragment_time = timeit(registry.get_devices_json, repeat)
+            print(f"  full list (cached fragments)   {fragment_time * 1000:8.1f} ms")
+
+        for i in range(service_count):
+            registry.register_service({"service_id": f"service_{i:04d}", "name": f"Service {i}"})
+
+        calls = repeat * 1000
+        update_time = mean_time(lambda i: registry.update_device_measurements(f"device_{i % count:06d}", {"pressure": 60.0}), calls)
+        print(f"  measurement update             {update_time * 1e6:8.1f} us")
+
+        register_time = mean_time(lambda i: registry.register_device(make_device(i % count)), calls)
+        print(f"  device re-registration         {register_time * 1e6:8.1f} us")
+
+        def add_and_delete(i):
+            registry.register_device(make_device(count + i))
+            registry.delete_device(f"device_{count + i:06d}")
+
+        churn_time = mean_time(add_and_delete, calls)
+        print(f"  device add + delete            {churn_time * 1e6:8.1f} us")
+
+        service_time = mean_time(lambda i: registry.register_service({"service_id": f"service_{i % service_count:04d}", "name": f"Service {i}"}), calls)
+        print(f"  service update ({service_count} services)  {service_time * 1e6:8.1f} us")
+
+        registry.close()
+
+if __name__ == '__main__':
+    main()
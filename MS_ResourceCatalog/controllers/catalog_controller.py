@@ -1,29 +1,99 @@
 import json
-from typing import Dict, Any, Optional, Union, List, cast
+from typing import Dict, Any, Iterator, Optional, Sequence, Tuple, Union, List, cast
 
 import cherrypy
+from services.config_store import ConfigStore
 from services.registry_service import RegistryService
+from models.service import ServiceDict
+from models.device import DeviceDict
+
+# Upper bound for long-poll and stream waits so a watcher can't hold a server thread forever
+MAX_WATCH_TIMEOUT = 55.0
+MAX_BULK_UPDATES = 1000
+MAX_PAGE_SIZE = 5000
 
 class CatalogController:
-    def __init__(self):
-        self.registry_service = RegistryService()
+    def __init__(self, registry_service: Optional[RegistryService] = None, config_store: Optional[ConfigStore] = None):
+        self.registry_service = registry_service or RegistryService()
+        self.config_store = config_store or ConfigStore()
+
+    @staticmethod
+    def _check_etag(revision: int) -> None:
+        """Tag the response with a revision and answer 304 if the client already has it."""
+        etag = f'"{revision}"'
+        cherrypy.response.headers['ETag'] = etag
+        if_none_match = cherrypy.request.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            raise cherrypy.HTTPRedirect([], 304)
 
     @cherrypy.expose
     def index(self) -> str:
         """Root endpoint that returns basic API information."""
         return "Resource Catalog API is running. Use the documented endpoints to interact with the catalog."
 
+    @staticmethod
+    def _parse_listing(
+        fields: Optional[str],
+        limit: Optional[str],
+        allowed_fields: Sequence[str]
+    ) -> Tuple[Optional[List[str]], Optional[int]]:
+        """Validate the projection and page size of a list request."""
+        field_list = None
+        if fields:
+            field_list = [field.strip() for field in fields.split(',') if field.strip()]
+            unknown = [field for field in field_list if field not in allowed_fields]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        
+        page_size = None
+        if limit is not None:
+            try:
+                page_size = int(limit)
+            except ValueError:
+                raise ValueError("limit must be an integer")
+            if page_size < 1 or page_size > MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        return field_list, page_size
+
+    @staticmethod
+    def _stream_listing(chunks: Iterator[bytes], next_cursor: Optional[str]) -> Iterator[bytes]:
+        """Stream a list response, advertising the next page cursor in a header."""
+        if next_cursor is not None:
+            cherrypy.response.headers['X-Next-Cursor'] = next_cursor
+        cherrypy.response.stream = True
+        return chunks
+
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def services(self) -> Dict[str, Any]:
-        """Get all registered services."""
-        return self.registry_service.get_all_services()
+    def services(
+        self,
+        *,
+        fields: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[str] = None
+    ) -> Union[bytes, Iterator[bytes]]:
+        """Get registered services, optionally paged (after, limit) and projected (fields=a,b).
+        
+        The options are query parameters only, so /services/<id> is a 404
+        instead of binding the ID to one of them; use /service/<id>.
+        """
+        try:
+            field_list, page_size = self._parse_listing(fields, limit, list(ServiceDict.__annotations__))
+        except ValueError as e:
+            cherrypy.response.status = 400
+            return json.dumps({"error": str(e)}).encode('utf-8')
+        
+        # Read the revision first so the ETag never claims more than the body contains
+        self._check_etag(self.registry_service.services_revision)
+        chunks, next_cursor = self.registry_service.list_services(fields=field_list, after=after or None, limit=page_size)
+        return self._stream_listing(chunks, next_cursor)
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
     def service(self, service_id: Optional[str] = None) -> Dict[str, Any]:
         """Get a specific service by ID."""
         if service_id:
+            # Any service change moves the revision, so an unchanged ETag means this one is unchanged too
+            self._check_etag(self.registry_service.services_revision)
             result = self.registry_service.get_service(service_id)
             if result:
                 return result
@@ -98,13 +168,102 @@ class CatalogController:
             return {"error": str(e)}
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def devices(self, device_type: Optional[str] = None) -> Dict[str, Any]:
-        """Get all devices, optionally filtered by type."""
-        if device_type:
-            return self.registry_service.get_devices_by_type(device_type)
-        else:
-            return self.registry_service.get_all_devices()
+    def devices(
+        self,
+        *,
+        device_type: Optional[str] = None,
+        status: Optional[str] = None,
+        service: Optional[str] = None,
+        zone: Optional[str] = None,
+        section: Optional[str] = None,
+        fields: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[str] = None
+    ) -> Union[bytes, Iterator[bytes]]:
+        """Get devices, optionally filtered by type, status, associated service or location.
+        
+        Results can be paged in device ID order with limit and after (the
+        X-Next-Cursor header holds the next after value) and projected with
+        fields=device_id,status. The body is streamed.
+        """
+        try:
+            field_list, page_size = self._parse_listing(fields, limit, list(DeviceDict.__annotations__))
+        except ValueError as e:
+            cherrypy.response.status = 400
+            return json.dumps({"error": str(e)}).encode('utf-8')
+        
+        self._check_etag(self.registry_service.devices_revision)
+        # Assembled from each device's cached JSON instead of re-encoding the whole registry
+        chunks, next_cursor = self.registry_service.list_devices(
+            device_type=device_type or None,
+            status=status or None,
+            service=service or None,
+            zone=zone or None,
+            section=section or None,
+            fields=field_list,
+            after=after or None,
+            limit=page_size
+        )
+        return self._stream_listing(chunks, next_cursor)
+
+    @cherrypy.expose
+    def changes(self, since: Optional[str] = None, timeout: str = '30', kind: Optional[str] = None) -> Union[bytes, Iterator[bytes]]:
+        """Get registry changes after a revision.
+        
+        Without since, only the current revision is returned so a client can
+        load the full registry and start watching from there. The request
+        long-polls up to timeout seconds for the next change; with
+        Accept: text/event-stream the changes are streamed as server-sent
+        events instead. Answers 410 when since is older than the retained
+        history, in which case the client has to reload everything.
+        """
+        # EventSource sends the last id it saw when reconnecting
+        since = since or cherrypy.request.headers.get('Last-Event-ID')
+        try:
+            wait = min(max(float(timeout), 0.0), MAX_WATCH_TIMEOUT)
+            revision = int(since) if since is not None else None
+        except ValueError:
+            cherrypy.response.status = 400
+            return json.dumps({"error": "since must be an integer revision and timeout a number"}).encode('utf-8')
+        
+        if kind not in (None, 'service', 'device'):
+            cherrypy.response.status = 400
+            return json.dumps({"error": "kind must be 'service' or 'device'"}).encode('utf-8')
+        
+        if revision is None:
+            return json.dumps({"revision": self.registry_service.revision, "changes": []}).encode('utf-8')
+        
+        if 'text/event-stream' in cherrypy.request.headers.get('Accept', ''):
+            cherrypy.response.headers['Content-Type'] = 'text/event-stream'
+            cherrypy.response.headers['Cache-Control'] = 'no-cache'
+            cherrypy.response.stream = True
+            return self._stream_changes(revision, wait, kind)
+        
+        current, changes = self.registry_service.get_changes(revision, timeout=wait, kind=kind)
+        if changes is None:
+            cherrypy.response.status = 410
+            return json.dumps({"error": f"Revision {revision} is no longer available", "revision": current}).encode('utf-8')
+        return json.dumps({"revision": current, "changes": changes}).encode('utf-8')
+    
+    changes._cp_config = {'tools.gzip.on': False}
+
+    def _stream_changes(self, revision: int, duration: float, kind: Optional[str]) -> Iterator[bytes]:
+        """Yield server-sent events until duration seconds have passed; clients reconnect with Last-Event-ID."""
+        remaining = duration
+        while remaining > 0:
+            wait = min(remaining, 15.0)
+            remaining -= wait
+            current, changes = self.registry_service.get_changes(revision, timeout=wait, kind=kind)
+            if changes is None:
+                yield f"event: reset\ndata: {json.dumps({'revision': current})}\n\n".encode('utf-8')
+                return
+            
+            for change in changes:
+                yield f"id: {change['revision']}\ndata: {json.dumps(change)}\n\n".encode('utf-8')
+            if not changes:
+                # Comment line keeps proxies from closing an idle stream
+                yield b": keep-alive\n\n"
+            revision = current
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -195,6 +354,39 @@ class CatalogController:
             cherrypy.response.status = 400
             return {"error": str(e)}
 
+    @cherrypy.expose
+    @cherrypy.tools.json_in()
+    @cherrypy.tools.json_out()
+    def bulk_update_devices(self) -> Dict[str, Any]:
+        """Update measurements and/or status of many devices in one request.
+        
+        Accepts a list of {device_id, measurements, status} objects (or
+        {"updates": [...]}) and returns a result per item.
+        """
+        try:
+            data = cherrypy.request.json
+        except (AttributeError, ValueError):
+            cherrypy.response.status = 400
+            return {"error": "Invalid JSON data"}
+        
+        updates = data.get("updates") if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not updates:
+            cherrypy.response.status = 400
+            return {"error": "A non-empty list of updates is required"}
+        
+        if len(updates) > MAX_BULK_UPDATES:
+            cherrypy.response.status = 413
+            return {"error": f"At most {MAX_BULK_UPDATES} updates are accepted per request"}
+        
+        try:
+            results = self.registry_service.bulk_update_devices(updates)
+        except Exception as e:
+            cherrypy.response.status = 400
+            return {"error": str(e)}
+        
+        succeeded = sum(1 for result in results if result['success'])
+        return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
     @cherrypy.expose
     @cherrypy.tools.json_in()
     @cherrypy.tools.json_out()
@@ -234,4 +426,41 @@ class CatalogController:
                 return {"error": f"Device with ID {device_id} not found"}
         except Exception as e:
             cherrypy.response.status = 400
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def config(self, name: Optional[str] = None) -> Dict[str, Any]:
+        """Get a configuration document; answers 304 if the client's ETag is current."""
+        if not name:
+            cherrypy.response.status = 400
+            return {"error": "Configuration name is required"}
+        
+        document = self.config_store.get(name)
+        if document is None:
+            cherrypy.response.status = 404
+            return {"error": f"Configuration {name} not found"}
+        
+        self._check_etag(document['revision'])
+        return document
+
+    @cherrypy.expose
+    @cherrypy.tools.json_in()
+    @cherrypy.tools.json_out()
+    def update_config(self, name: str) -> Dict[str, Any]:
+        """Replace a configuration document, bumping its revision."""
+        try:
+            data = cherrypy.request.json
+        except (AttributeError, ValueError):
+            cherrypy.response.status = 400
+            return {"error": "Invalid JSON data"}
+        
+        if not isinstance(data, dict) or not isinstance(data.get('config'), dict):
+            cherrypy.response.status = 400
+            return {"error": "Body must be an object with a 'config' object"}
+        
+        try:
+            return self.config_store.put(name, data['config'])
+        except OSError as e:
+            cherrypy.response.status = 500
+            return {"error": f"Could not store configuration: {e}"}
\ No newline at end of file
@@ -16,6 +16,8 @@ import cherrypy
 from dotenv import load_dotenv
 
 from controllers.catalog_controller import CatalogController
+from services.config_store import ConfigStore
+from services.registry_service import RegistryService
 
 # Update version requirement to include Python 3.13
 if sys.version_info < (3, 11):
@@ -39,7 +41,15 @@ load_dotenv()
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', '8080'))
 STORAGE_FILE = os.getenv('STORAGE_FILE', 'registry_data.json')
+CONFIG_STORAGE_FILE = os.getenv('CONFIG_STORAGE_FILE', 'config_data.json')
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+PERSISTENCE_MODE = os.getenv('PERSISTENCE_MODE', 'journal')
+JOURNAL_COMMIT_INTERVAL_MS = int(os.getenv('JOURNAL_COMMIT_INTERVAL_MS', '50'))
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv('JOURNAL_COMPACT_THRESHOLD', '10000'))
+SNAPSHOT_FLUSH_INTERVAL_MS = int(os.getenv('SNAPSHOT_FLUSH_INTERVAL_MS', '500'))
+SNAPSHOT_MAX_PENDING = int(os.getenv('SNAPSHOT_MAX_PENDING', '1000'))
+DEVICE_SHARDS = int(os.getenv('DEVICE_SHARDS', '64'))
+ENTRY_TIMEOUT_SECONDS = int(os.getenv('ENTRY_TIMEOUT_SECONDS', '900'))
 
 # Set log level based on environment variable
 numeric_level = getattr(logging, LOG_LEVEL.upper(), None)
@@ -49,14 +59,15 @@ if isinstance(numeric_level, int):
 def main() -> None:
     """Main entry point for the application."""
     logger.info(f"Starting Resource Catalog service with Python {sys.version}")
-    logger.info(f"Using storage file: {STORAGE_FILE}")
+    logger.info(f"Using storage file: {STORAGE_FILE} ({PERSISTENCE_MODE} persistence)")
     
     # Server configuration
     conf: Dict[str, Any] = {
         'global': {
             'server.socket_host': HOST,
             'server.socket_port': PORT,
-            'server.thread_pool': 10,
+            # Long-polling watchers of /changes each hold a thread while they wait
+            'server.thread_pool': 30,
             'engine.autoreload.on': False,
             'log.screen': True,
             'log.access_file': 'access.log',
@@ -73,9 +84,23 @@ def main() -> None:
     }
 
     # Create and mount controller
-    catalog_controller = CatalogController()
+    registry_service = RegistryService(
+        storage_file=STORAGE_FILE,
+        persistence_mode=PERSISTENCE_MODE,
+        journal_commit_interval=JOURNAL_COMMIT_INTERVAL_MS / 1000.0,
+        journal_compact_threshold=JOURNAL_COMPACT_THRESHOLD,
+        snapshot_flush_interval=SNAPSHOT_FLUSH_INTERVAL_MS / 1000.0,
+        snapshot_max_pending=SNAPSHOT_MAX_PENDING,
+        device_shards=DEVICE_SHARDS,
+        entry_timeout=ENTRY_TIMEOUT_SECONDS
+    )
+    registry_service.add_listener(log_registry_event)
+    catalog_controller = CatalogController(registry_service, ConfigStore(CONFIG_STORAGE_FILE))
     cherrypy.tree.mount(catalog_controller, '/', conf)
     
+    # Flush pending journal entries and snapshots when the engine stops
+    cherrypy.engine.subscribe('stop', registry_service.close)
+    
     # Configure error handling
     cherrypy.config.update({'error_page.default': error_page})
     
@@ -90,6 +115,13 @@ def main() -> None:
         logger.info("Shutting down Resource Catalog service...")
         cherrypy.engine.stop()
 
+def log_registry_event(event: Dict[str, Any]) -> None:
+    """Log status transitions emitted by the registry."""
+    if event['event'] == 'device_status':
+        logger.info(f"Device {event['device_id']} {event['previous_status']} -> {event['status']} ({event['reason']})")
+    elif event['event'] == 'service_expired':
+        logger.info(f"Service {event['service_id']} expired")
+
 def error_page(status: int, message: str, traceback: str, version: str) -> str:
     """Custom error page handler."""
     response = {
@@ -1,4 +1,6 @@
 from __future__ import annotations
+import json
+import sys
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any, TypedDict, Union
@@ -25,7 +27,15 @@ class DeviceDict(TypedDict):
     timestamp: int
     last_updated: str
 
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
 class Device:
+    __slots__ = (
+        'device_id', 'name', 'device_type', 'measurements', 'location', 'status',
+        'associated_services', 'timestamp', 'last_updated', '_dict', '_fragment'
+    )
+
     def __init__(
         self, 
         device_id: str, 
@@ -46,19 +56,37 @@ class Device:
         self.timestamp: int = int(time.time())
         self.last_updated: str = datetime.now().isoformat()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Any field change invalidates the cached serialized forms
+        object.__setattr__(self, name, value)
+        if name[0] != '_':
+            object.__setattr__(self, '_dict', None)
+            object.__setattr__(self, '_fragment', None)
+
     def to_dict(self) -> DeviceDict:
-        """Convert device object to dictionary representation."""
-        return {
-            "device_id": self.device_id,
-            "name": self.name,
-            "device_type": self.device_type,
-            "measurements": self.measurements,
-            "location": self.location,
-            "status": self.status,
-            "associated_services": self.associated_services,
-            "timestamp": self.timestamp,
-            "last_updated": self.last_updated
-        }
+        """Convert device object to dictionary representation.
+        
+        The dict is cached until the device changes and must not be modified.
+        """
+        if self._dict is None:
+            self._dict = {
+                "device_id": self.device_id,
+                "name": self.name,
+                "device_type": self.device_type,
+                "measurements": self.measurements,
+                "location": self.location,
+                "status": self.status,
+                "associated_services": self.associated_services,
+                "timestamp": self.timestamp,
+                "last_updated": self.last_updated
+            }
+        return self._dict
+
+    def to_json_fragment(self) -> str:
+        """Return the cached '"device_id": {...}' JSON member used to assemble list responses."""
+        if self._fragment is None:
+            self._fragment = json.dumps({self.device_id: self.to_dict()})[1:-1]
+        return self._fragment
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> Device:
@@ -66,11 +94,13 @@ class Device:
         device = cls(
             device_id=data.get("device_id", ""),
             name=data.get("name", ""),
-            device_type=data.get("device_type", ""),
+            # Interned so the many devices sharing a type, status, zone or
+            # service share one string
+            device_type=_intern(data.get("device_type", "")),
             measurements=data.get("measurements", {}),
-            location=data.get("location", {}),
-            status=data.get("status", "active"),
-            associated_services=data.get("associated_services", [])
+            location={key: _intern(value) for key, value in data.get("location", {}).items()},
+            status=_intern(data.get("status", "active")),
+            associated_services=[_intern(service) for service in data.get("associated_services", [])]
         )
         device.timestamp = data.get("timestamp", int(time.time()))
         device.last_updated = data.get("last_updated", datetime.now().isoformat())
@@ -78,7 +108,8 @@ class Device:
 
     def update_measurements(self, measurements: Dict[str, Any]) -> None:
         """Update device measurements and timestamp."""
-        self.measurements.update(measurements)
+        # Replace rather than mutate so previously serialized dicts stay unchanged
+        self.measurements = {**self.measurements, **measurements}
         self.last_updated = datetime.now().isoformat()
         self.timestamp = int(time.time())
 
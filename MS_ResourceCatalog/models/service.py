@@ -1,7 +1,8 @@
 from __future__ import annotations
+import json
 import time
 from datetime import datetime
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, Optional, TypedDict
 
 class EndpointDict(TypedDict, total=False):
     url: str
@@ -14,38 +15,66 @@ class ServiceDict(TypedDict):
     name: str
     description: str
     endpoints: Dict[str, EndpointDict]
+    metadata: Dict[str, Any]
     status: str
     timestamp: int
     last_updated: str
 
 class Service:
+    __slots__ = (
+        'service_id', 'name', 'description', 'endpoints', 'metadata', 'status',
+        'timestamp', 'last_updated', '_dict', '_fragment'
+    )
+
     def __init__(
         self, 
         service_id: str, 
         name: str, 
         description: str, 
         endpoints: Dict[str, Any], 
-        status: str = "active"
+        status: str = "active",
+        metadata: Optional[Dict[str, Any]] = None
     ):
         self.service_id: str = service_id
         self.name: str = name
         self.description: str = description
         self.endpoints: Dict[str, Any] = endpoints
+        # Free-form details for clients, e.g. the partition an instance of a scaled-out service owns
+        self.metadata: Dict[str, Any] = metadata or {}
         self.status: str = status
         self.timestamp: int = int(time.time())
         self.last_updated: str = datetime.now().isoformat()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Any field change invalidates the cached serialized forms
+        object.__setattr__(self, name, value)
+        if name[0] != '_':
+            object.__setattr__(self, '_dict', None)
+            object.__setattr__(self, '_fragment', None)
+
     def to_dict(self) -> ServiceDict:
-        """Convert service object to dictionary representation."""
-        return {
-            "service_id": self.service_id,
-            "name": self.name,
-            "description": self.description,
-            "endpoints": self.endpoints,
-            "status": self.status,
-            "timestamp": self.timestamp,
-            "last_updated": self.last_updated
-        }
+        """Convert service object to dictionary representation.
+        
+        The dict is cached until the service changes and must not be modified.
+        """
+        if self._dict is None:
+            self._dict = {
+                "service_id": self.service_id,
+                "name": self.name,
+                "description": self.description,
+                "endpoints": self.endpoints,
+                "metadata": self.metadata,
+                "status": self.status,
+                "timestamp": self.timestamp,
+                "last_updated": self.last_updated
+            }
+        return self._dict
+
+    def to_json_fragment(self) -> str:
+        """Return the cached '"service_id": {...}' JSON member used to assemble list responses."""
+        if self._fragment is None:
+            self._fragment = json.dumps({self.service_id: self.to_dict()})[1:-1]
+        return self._fragment
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> Service:
@@ -55,7 +84,8 @@ class Service:
             name=data.get("name", ""),
             description=data.get("description", ""),
             endpoints=data.get("endpoints", {}),
-            status=data.get("status", "active")
+            status=data.get("status", "active"),
+            metadata=data.get("metadata")
         )
         service.timestamp = data.get("timestamp", int(time.time()))
         service.last_updated = data.get("last_updated", datetime.now().isoformat())
@@ -4,5 +4,10 @@ Contains business logic for managing catalog resources.
 """
 
 from services.registry_service import RegistryService
+from services.journal import RegistryJournal
+from services.snapshot_persister import SnapshotPersister
+from services.device_index import DeviceIndex
+from services.expiry_scheduler import ExpiryScheduler
+from services.change_feed import ChangeFeed
 
-__all__ = ['RegistryService']
\ No newline at end of file
+__all__ = ['RegistryService', 'RegistryJournal', 'SnapshotPersister', 'DeviceIndex', 'ExpiryScheduler', 'ChangeFeed']
\ No newline at end of file
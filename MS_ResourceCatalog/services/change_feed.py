@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# {'revision', 'kind': 'service' | 'device', 'id', 'op': 'put' | 'delete', 'data'}
+Change = Dict[str, Any]
+
+class ChangeFeed:
+    """Bounded, revision-ordered log of recent registry changes for watchers."""
+
+    def __init__(self, revision: int = 0, max_changes: int = 10000):
+        self.changes: Deque[Change] = deque(maxlen=max_changes)
+        self.revision: int = revision
+        self.condition = threading.Condition()
+
+    def append(self, change: Change) -> None:
+        """Add a change and wake up waiting watchers. Changes must arrive in revision order."""
+        with self.condition:
+            self.changes.append(change)
+            self.revision = change['revision']
+            self.condition.notify_all()
+
+    def oldest_revision(self) -> int:
+        """Lowest revision a watcher can resume from without a full reload."""
+        with self.condition:
+            if self.changes:
+                return self.changes[0]['revision'] - 1
+            return self.revision
+
+    def since(self, revision: int, timeout: float = 0, kind: Optional[str] = None) -> Tuple[int, Optional[List[Change]]]:
+        """Return the current revision and the changes after it, or None if no longer retained."""
+        with self.condition:
+            if timeout > 0:
+                self.condition.wait_for(lambda: self.revision > revision, timeout)
+
+            if revision > self.revision:
+                # Newer than anything we know of, e.g. from before a restart with a lost journal
+                return self.revision, None
+            if self.changes and revision < self.changes[0]['revision'] - 1:
+                return self.revision, None
+            if not self.changes and revision < self.revision:
+                return self.revision, None
+
+            # Changes are revision ordered, so scan back from the newest one
+            changes: List[Change] = []
+            for change in reversed(self.changes):
+                if change['revision'] <= revision:
+                    break
+                if kind is None or change['kind'] == kind:
+                    changes.append(change)
+            changes.reverse()
+            return self.revision, changes
@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger('ConfigStore')
+
+class ConfigStore:
+    """Named, versioned JSON configuration documents such as control thresholds."""
+
+    def __init__(self, storage_file: str = 'config_data.json'):
+        self.storage_file: str = storage_file
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load the stored documents, starting empty if there are none."""
+        if not os.path.exists(self.storage_file):
+            return
+        try:
+            with open(self.storage_file, 'r') as f:
+                self.documents = json.load(f)
+            logger.info(f"Loaded {len(self.documents)} configuration documents from {self.storage_file}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load configuration documents from {self.storage_file}: {e}")
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a document with its revision, or None if it does not exist."""
+        with self.lock:
+            document = self.documents.get(name)
+            return json.loads(json.dumps(document)) if document else None
+
+    def put(self, name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace a document's content and return it with its new revision."""
+        with self.lock:
+            previous = self.documents.get(name)
+            document = {
+                'name': name,
+                'config': config,
+                'revision': previous['revision'] + 1 if previous else 1,
+                'last_updated': datetime.now().isoformat()
+            }
+            documents = dict(self.documents)
+            documents[name] = document
+            self._write_atomic(json.dumps(documents, indent=2))
+            self.documents = documents
+            return json.loads(json.dumps(document))
+
+    def _write_atomic(self, serialized: str) -> None:
+        temp_file = f"{self.storage_file}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(serialized)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.storage_file)
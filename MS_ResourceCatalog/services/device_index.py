@@ -0,0 +1,71 @@
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from models.device import Device
+
+class DeviceIndex:
+    """Secondary indexes over devices, maintained on every mutation."""
+
+    FIELDS = ('device_type', 'status', 'service', 'zone', 'section')
+
+    def __init__(self):
+        self.indexes: Dict[str, Dict[str, Set[str]]] = {field: defaultdict(set) for field in self.FIELDS}
+        # Per device, the indexed values of each field in FIELDS order; tuples keep this compact
+        self.keys: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+
+    @staticmethod
+    def _keys_for(device: Device) -> Tuple[Tuple[str, ...], ...]:
+        location = device.location or {}
+        return (
+            (device.device_type,),
+            (device.status,),
+            tuple(dict.fromkeys(device.associated_services)),
+            (location['zone'],) if location.get('zone') is not None else (),
+            (location['section'],) if location.get('section') is not None else ()
+        )
+
+    def update(self, device: Device) -> None:
+        """Index a new device or re-index a changed one."""
+        new_keys = self._keys_for(device)
+        old_keys = self.keys.get(device.device_id)
+        if old_keys == new_keys:
+            return
+
+        if old_keys:
+            self._discard(device.device_id, old_keys)
+        for field, values in zip(self.FIELDS, new_keys):
+            for value in values:
+                self.indexes[field][value].add(device.device_id)
+        self.keys[device.device_id] = new_keys
+
+    def remove(self, device_id: str) -> None:
+        """Drop a device from all indexes."""
+        old_keys = self.keys.pop(device_id, None)
+        if old_keys:
+            self._discard(device_id, old_keys)
+
+    def _discard(self, device_id: str, keys: Tuple[Tuple[str, ...], ...]) -> None:
+        for field, values in zip(self.FIELDS, keys):
+            index = self.indexes[field]
+            for value in values:
+                ids = index.get(value)
+                if ids is not None:
+                    ids.discard(device_id)
+                    if not ids:
+                        del index[value]
+
+    def query(self, **filters: Optional[str]) -> Optional[Set[str]]:
+        """Return the IDs matching all given filters, or None when no filter is set."""
+        candidates = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in self.indexes:
+                raise ValueError(f"Unknown device filter: {field}")
+            candidates.append(self.indexes[field].get(value, set()))
+
+        if not candidates:
+            return None
+
+        candidates.sort(key=len)
+        return set(candidates[0]).intersection(*candidates[1:])
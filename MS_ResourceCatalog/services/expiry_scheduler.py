@@ -0,0 +1,74 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (kind, id), e.g. ('device', 'dev_001')
+ExpiryKey = Tuple[str, str]
+
+class ExpiryScheduler:
+    """Fires a callback as soon as a key's deadline passes without renewal."""
+
+    def __init__(self, expire_callback: Callable[[str, str], None], compact_slack: int = 1024):
+        self.expire_callback = expire_callback
+        self.compact_slack: int = compact_slack
+
+        self.deadlines: Dict[ExpiryKey, float] = {}
+        self.heap: List[Tuple[float, ExpiryKey]] = []
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background expiry thread."""
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def schedule(self, kind: str, key_id: str, deadline: float) -> None:
+        """Set or renew the deadline (epoch seconds) of a key."""
+        key = (kind, key_id)
+        with self.condition:
+            if self.deadlines.get(key) == deadline:
+                return
+            self.deadlines[key] = deadline
+            heapq.heappush(self.heap, (deadline, key))
+
+            if len(self.heap) > 2 * len(self.deadlines) + self.compact_slack:
+                self.heap = [(item_deadline, item_key) for item_key, item_deadline in self.deadlines.items()]
+                heapq.heapify(self.heap)
+
+            # Only wake the thread if this became the earliest deadline
+            if self.heap[0] == (deadline, key):
+                self.condition.notify()
+
+    def cancel(self, kind: str, key_id: str) -> None:
+        """Stop tracking a key."""
+        with self.condition:
+            self.deadlines.pop((kind, key_id), None)
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def _pop_expired(self, now: float) -> List[ExpiryKey]:
+        expired: List[ExpiryKey] = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == deadline:
+                del self.deadlines[key]
+                expired.append(key)
+        return expired
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                expired = self._pop_expired(time.time())
+                if not expired:
+                    timeout = self.heap[0][0] - time.time() if self.heap else None
+                    self.condition.wait(timeout)
+                    continue
+
+            for kind, key_id in expired:
+                try:
+                    self.expire_callback(kind, key_id)
+                except Exception as e:
+                    print(f"Error expiring {kind} {key_id}: {e}")
@@ -0,0 +1,139 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+JournalEntry = Dict[str, Any]
+
+class RegistryJournal:
+    """Append-only write-ahead journal of registry mutations, written in group commits."""
+
+    def __init__(
+        self,
+        journal_file: str,
+        snapshot_callback: Callable[[], int],
+        commit_interval: float = 0.05,
+        compact_threshold: int = 10000
+    ):
+        self.journal_file: str = journal_file
+        self.snapshot_callback = snapshot_callback
+        self.commit_interval: float = commit_interval
+        self.compact_threshold: int = compact_threshold
+        self.entries_since_compaction: int = 0
+
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def read_entries(journal_file: str, after_revision: int = 0) -> List[JournalEntry]:
+        """Read journal entries newer than the given revision, skipping a torn final line."""
+        entries: List[JournalEntry] = []
+        if not os.path.exists(journal_file):
+            return entries
+
+        with open(journal_file, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry.get('rev', 0) > after_revision:
+                    entries.append(entry)
+        return entries
+
+    def _truncate_torn_tail(self) -> int:
+        """Cut off a partially written last entry and return the number of valid entries."""
+        if not os.path.exists(self.journal_file):
+            return 0
+
+        valid_entries = 0
+        valid_length = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                valid_entries += 1
+                valid_length += len(line)
+
+        if valid_length < os.path.getsize(self.journal_file):
+            print(f"Truncating torn entry at the end of {self.journal_file}")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_length)
+        return valid_entries
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        self.entries_since_compaction = self._truncate_torn_tail()
+        self.writer_thread = threading.Thread(target=self._writer_loop)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def append(self, entry: JournalEntry) -> None:
+        """Queue a mutation for the next group commit."""
+        self.queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every entry queued so far has been written."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def _collect_batch(self) -> List[Any]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.commit_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _writer_loop(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            entries = [item for item in batch if not isinstance(item, threading.Event)]
+
+            try:
+                if entries:
+                    self._write_entries(entries)
+                    self.entries_since_compaction += len(entries)
+
+                if self.entries_since_compaction >= self.compact_threshold:
+                    self.compact()
+            except Exception as e:
+                print(f"Error writing registry journal: {e}")
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write_entries(self, entries: List[JournalEntry]) -> None:
+        data = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries)
+        with open(self.journal_file, 'a') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self) -> None:
+        """Snapshot the registry and drop journal entries it covers. Runs on the writer thread."""
+        revision = self.snapshot_callback()
+        remaining = self.read_entries(self.journal_file, after_revision=revision)
+
+        temp_file = f"{self.journal_file}.tmp"
+        with open(temp_file, 'w') as f:
+            for entry in remaining:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.journal_file)
+
+        self.entries_since_compaction = len(remaining)
@@ -0,0 +1,37 @@
+import heapq
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+def paginate(keys: Iterable[str], after: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+    """Return the keys of one page in key order and the cursor of the next page.
+
+    Only the smallest limit + 1 keys after the cursor are kept, so a page
+    costs O(n log limit) instead of sorting the whole registry.
+    """
+    candidates = (key for key in keys if after is None or key > after)
+    if limit is None:
+        return sorted(candidates), None
+
+    page = heapq.nsmallest(limit + 1, candidates)
+    if len(page) > limit:
+        return page[:limit], page[limit - 1]
+    return page, None
+
+def project_member(key: str, item: Dict[str, Any], fields: Sequence[str]) -> str:
+    """Encode '"key": {...}' with only the requested fields of item."""
+    return json.dumps({key: {field: item[field] for field in fields if field in item}})[1:-1]
+
+def json_object_chunks(members: Iterable[str], chunk_size: int = 500) -> Iterator[bytes]:
+    """Stream pre-encoded '"key": value' members as one JSON object, chunk_size members at a time."""
+    yield b'{'
+    separator = ''
+    batch: List[str] = []
+    for member in members:
+        batch.append(member)
+        if len(batch) >= chunk_size:
+            yield (separator + ','.join(batch)).encode('utf-8')
+            separator = ','
+            batch = []
+    if batch:
+        yield (separator + ','.join(batch)).encode('utf-8')
+    yield b'}'
@@ -1,28 +1,168 @@
 import json
 import os
+import queue
 import time
 from datetime import datetime
 import threading
-from typing import Dict, List, Optional, Any, Union, cast
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Sequence, Set, Tuple, Union, cast
 
 from models.service import Service, ServiceDict
 from models.device import Device, DeviceDict
+from services.journal import RegistryJournal, JournalEntry
+from services.snapshot_persister import SnapshotPersister, SnapshotChanges
+from services.device_index import DeviceIndex
+from services.expiry_scheduler import ExpiryScheduler
+from services.change_feed import ChangeFeed, Change
+from services.json_listing import paginate, project_member, json_object_chunks
+
+SERVICE_OPS = ('put_service', 'delete_service')
+
+RegistryEvent = Dict[str, Any]
+
+def _publish_entry(view: Dict[str, Any], fragments: Dict[str, str], key: str, data: Any, fragment: str) -> None:
+    """Publish one entry into a read view, fragment first."""
+    fragments[key] = fragment
+    view[key] = data
+
+def _withdraw_entry(view: Dict[str, Any], fragments: Dict[str, str], key: str) -> None:
+    """Remove one entry from a read view, view first."""
+    view.pop(key, None)
+    fragments.pop(key, None)
+
+class DeviceShard:
+    """One hash partition of the device registry, with lock-free read views (see docs/design.md)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.devices: Dict[str, Device] = {}
+        self.view: Dict[str, DeviceDict] = {}
+        self.fragments: Dict[str, str] = {}
+
+    def publish(self, device_ids: List[str]) -> Dict[str, Optional[DeviceDict]]:
+        """Publish the current state of the given devices.
+
+        Caller must hold the shard lock. Returns the states they replaced.
+        """
+        previous: Dict[str, Optional[DeviceDict]] = {}
+        for device_id in device_ids:
+            if device_id not in previous:
+                previous[device_id] = self.view.get(device_id)
+            device = self.devices.get(device_id)
+            if device:
+                _publish_entry(self.view, self.fragments, device_id, device.to_dict(), device.to_json_fragment())
+            else:
+                _withdraw_entry(self.view, self.fragments, device_id)
+        return previous
+
+    def rebuild(self) -> None:
+        """Publish a fresh view of every device in the shard."""
+        self.view = {device_id: device.to_dict() for device_id, device in self.devices.items()}
+        self.fragments = {device_id: device.to_json_fragment() for device_id, device in self.devices.items()}
 
 class RegistryService:
-    def __init__(self, storage_file: str = 'registry_data.json'):
+    def __init__(
+        self,
+        storage_file: str = 'registry_data.json',
+        persistence_mode: str = 'journal',
+        journal_commit_interval: float = 0.05,
+        journal_compact_threshold: int = 10000,
+        snapshot_flush_interval: float = 0.5,
+        snapshot_max_pending: int = 1000,
+        device_shards: int = 64,
+        entry_timeout: int = 900,
+        change_feed_size: int = 10000
+    ):
         self.storage_file: str = storage_file
-        self.services: Dict[str, Service] = {}
-        self.devices: Dict[str, Device] = {}
+        self.journal_file: str = f"{storage_file}.journal"
+        self.persistence_mode: str = persistence_mode
         self.last_updated: str = datetime.now().isoformat()
+        self.revision: int = 0
+        self.entry_timeout: int = entry_timeout
         
-        self.lock = threading.Lock()
+        # Services and devices are separate lock domains; devices are further
+        # split into hash shards. Reads go to the published views without locking.
+        self.services: Dict[str, Service] = {}
+        self._services_view: Dict[str, ServiceDict] = {}
+        self._services_fragments: Dict[str, str] = {}
+        self.services_lock = threading.Lock()
+        self.shards: List[DeviceShard] = [DeviceShard() for _ in range(max(device_shards, 1))]
+        self.device_index = DeviceIndex()
+        self.index_lock = threading.Lock()
+        
+        # Orders revisions, journal appends and dirty tracking across domains
+        self.revision_lock = threading.Lock()
+        
+        # Status transitions are delivered to listeners from a dispatcher thread,
+        # never while a registry lock is held
+        self.listeners: List[Callable[[RegistryEvent], None]] = []
+        self.event_queue: "queue.Queue[RegistryEvent]" = queue.Queue()
+        self.expiry = ExpiryScheduler(self._expire)
         
         self.load_data()
         
-        self.start_cleanup_timer()
+        # Last revision that touched each domain, used for conditional GETs
+        self.services_revision: int = self.revision
+        self.devices_revision: int = self.revision
+        self.change_feed = ChangeFeed(self.revision, max_changes=change_feed_size)
+        
+        # Everything loaded from disk goes into the persister's first snapshot
+        self._dirty_services: Set[str] = set(self.services)
+        self._dirty_devices: Set[str] = {device_id for shard in self.shards for device_id in shard.devices}
+        self.persister = SnapshotPersister(
+            storage_file,
+            self._capture_changes,
+            flush_interval=snapshot_flush_interval,
+            max_pending=snapshot_max_pending,
+            auto_flush=persistence_mode != 'journal'
+        )
+        self.persister.start()
+        
+        self.journal: Optional[RegistryJournal] = None
+        if persistence_mode == 'journal':
+            self.journal = RegistryJournal(
+                self.journal_file,
+                self.write_snapshot,
+                commit_interval=journal_commit_interval,
+                compact_threshold=journal_compact_threshold
+            )
+            self.journal.start()
+        
+        self._start_expiry()
+        
+        event_thread = threading.Thread(target=self._dispatch_events)
+        event_thread.daemon = True
+        event_thread.start()
+
+    def _shard_for(self, device_id: str) -> DeviceShard:
+        return self.shards[hash(device_id) % len(self.shards)]
 
     def load_data(self) -> None:
+        """Load the registry snapshot and replay journal entries recorded after it."""
+        self._load_snapshot()
+        
+        try:
+            entries = RegistryJournal.read_entries(self.journal_file, after_revision=self.revision)
+            for entry in entries:
+                self._apply_entry(entry)
+            if entries:
+                print(f"Recovered {len(entries)} registry changes from journal")
+        except Exception as e:
+            print(f"Error replaying registry journal: {e}")
+        
+        self._services_view = {service_id: service.to_dict() for service_id, service in self.services.items()}
+        self._services_fragments = {service_id: service.to_json_fragment() for service_id, service in self.services.items()}
+        self.device_index = DeviceIndex()
+        for shard in self.shards:
+            shard.rebuild()
+            for device in shard.devices.values():
+                self.device_index.update(device)
+
+    def _load_snapshot(self) -> None:
         """Load registry data from storage file."""
+        self.services = {}
+        for shard in self.shards:
+            shard.devices = {}
+        
         if os.path.exists(self.storage_file):
             try:
                 with open(self.storage_file, 'r') as f:
@@ -34,173 +174,579 @@ class RegistryService:
                     
                     devices_data = data.get('devices', {})
                     for device_id, device_data in devices_data.items():
-                        self.devices[device_id] = Device.from_dict(device_data)
+                        self._shard_for(device_id).devices[device_id] = Device.from_dict(device_data)
                     
                     self.last_updated = data.get('last_updated', datetime.now().isoformat())
+                    self.revision = data.get('revision', 0)
             except Exception as e:
                 print(f"Error loading registry data: {e}")
                 self.services = {}
-                self.devices = {}
+                for shard in self.shards:
+                    shard.devices = {}
                 self.last_updated = datetime.now().isoformat()
         else:
-            self.services = {}
-            self.devices = {}
             self.last_updated = datetime.now().isoformat()
 
-    def save_data(self) -> None:
-        """Save registry data to storage file."""
-        with self.lock:
-            data = {
-                'services': {service_id: service.to_dict() for service_id, service in self.services.items()},
-                'devices': {device_id: device.to_dict() for device_id, device in self.devices.items()},
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
+    def _apply_entry(self, entry: JournalEntry) -> None:
+        """Apply a single journaled mutation during recovery."""
+        op = entry.get('op')
+        
+        if op == 'put_service':
+            service = Service.from_dict(entry['data'])
+            self.services[service.service_id] = service
+        elif op == 'delete_service':
+            self.services.pop(entry['id'], None)
+        elif op == 'put_device':
+            device = Device.from_dict(entry['data'])
+            self._shard_for(device.device_id).devices[device.device_id] = device
+        elif op == 'delete_device':
+            self._shard_for(entry['id']).devices.pop(entry['id'], None)
+        elif op in ('device_measurements', 'device_status'):
+            device = self._shard_for(entry['id']).devices.get(entry['id'])
+            if device:
+                if op == 'device_measurements':
+                    device.measurements = {**device.measurements, **entry['measurements']}
+                else:
+                    device.status = entry['status']
+                device.timestamp = entry['timestamp']
+                device.last_updated = entry['last_updated']
+        
+        self.revision = max(self.revision, entry.get('rev', 0))
+
+    @staticmethod
+    def _entry_target(entry: JournalEntry) -> str:
+        if entry['op'] == 'put_service':
+            return entry['data']['service_id']
+        if entry['op'] == 'put_device':
+            return entry['data']['device_id']
+        return entry['id']
+
+    def _publish_service(self, service_id: str) -> None:
+        """Publish the current state of one service. Caller must hold the services lock."""
+        service = self.services.get(service_id)
+        if service:
+            _publish_entry(self._services_view, self._services_fragments, service_id, service.to_dict(), service.to_json_fragment())
+        else:
+            _withdraw_entry(self._services_view, self._services_fragments, service_id)
+
+    def _publish_devices(self, shard: DeviceShard, entries: List[JournalEntry]) -> Dict[str, str]:
+        """Publish devices of one shard and keep the secondary indexes in step.
+        
+        Caller must hold the shard lock. Returns the previous status of
+        every device whose status changed.
+        """
+        targets = [self._entry_target(entry) for entry in entries]
+        previous = shard.publish(targets)
+        
+        # Measurement updates don't touch indexed fields
+        reindex = {target for entry, target in zip(entries, targets) if entry['op'] != 'device_measurements'}
+        if not reindex:
+            return {}
+        
+        changed: Dict[str, str] = {}
+        with self.index_lock:
+            for device_id in reindex:
+                device = shard.devices.get(device_id)
+                if device:
+                    self.device_index.update(device)
+                else:
+                    self.device_index.remove(device_id)
+                
+                before = previous.get(device_id)
+                if before and device and before['status'] != device.status:
+                    changed[device_id] = before['status']
+        return changed
+
+    def _schedule_expiry(self, kind: str, entity: Optional[Union[Service, Device]], entity_id: str) -> None:
+        """Renew an entry's expiry deadline after a heartbeat, or stop tracking it."""
+        if entity is None or (kind == 'device' and cast(Device, entity).status == 'inactive'):
+            self.expiry.cancel(kind, entity_id)
+        else:
+            self.expiry.schedule(kind, entity_id, entity.timestamp + self.entry_timeout)
+
+    def _start_expiry(self) -> None:
+        """Track the deadlines of everything loaded from disk and start the expiry thread."""
+        for service_id, service in self.services.items():
+            self._schedule_expiry('service', service, service_id)
+        for shard in self.shards:
+            for device_id, device in shard.devices.items():
+                self._schedule_expiry('device', device, device_id)
+        self.expiry.start()
+
+    def _record(self, entry: JournalEntry) -> None:
+        """Publish a mutation to readers, assign it a revision and persist it.
+        
+        Caller must hold the lock of the domain the entry belongs to.
+        """
+        self._record_many([entry])
+
+    def _record_many(self, entries: List[JournalEntry]) -> None:
+        """Publish mutations of one domain together and persist them as one batch.
+        
+        All entries must belong to the same domain (the services, or a single
+        device shard) and the caller must hold its lock.
+        """
+        if not entries:
+            return
+        
+        kind = 'service' if entries[0]['op'] in SERVICE_OPS else 'device'
+        targets = [self._entry_target(entry) for entry in entries]
+        events: Dict[int, RegistryEvent] = {}
+        
+        if kind == 'service':
+            for position, (entry, target) in enumerate(zip(entries, targets)):
+                self._publish_service(target)
+                self._schedule_expiry('service', self.services.get(target), target)
+                if entry['op'] == 'delete_service' and entry.get('reason') == 'expired':
+                    events[position] = {'event': 'service_expired', 'service_id': target}
+            view = self._services_view
+        else:
+            shard = self._shard_for(targets[0])
+            changed = self._publish_devices(shard, entries)
+            for target in set(targets):
+                self._schedule_expiry('device', shard.devices.get(target), target)
             
+            # One event per device, on its last entry, for the net status change
+            last_positions = {target: position for position, target in enumerate(targets)}
+            for device_id, previous_status in changed.items():
+                position = last_positions[device_id]
+                events[position] = {
+                    'event': 'device_status',
+                    'device_id': device_id,
+                    'previous_status': previous_status,
+                    'status': shard.devices[device_id].status,
+                    'reason': entries[position].get('reason', 'update')
+                }
+            view = shard.view
+        
+        with self.revision_lock:
             self.last_updated = datetime.now().isoformat()
+            
+            for position, (entry, target) in enumerate(zip(entries, targets)):
+                self.revision += 1
+                entry['rev'] = self.revision
+                data = view.get(target)
+                
+                self.change_feed.append({
+                    'revision': self.revision,
+                    'kind': kind,
+                    'id': target,
+                    'op': 'put' if data is not None else 'delete',
+                    'data': data
+                })
+                
+                if self.journal:
+                    self.journal.append(entry)
+                
+                # Queued under the revision lock so listeners see events in revision order
+                event = events.get(position)
+                if event:
+                    event['revision'] = self.revision
+                    event['timestamp'] = self.last_updated
+                    self.event_queue.put(event)
+            
+            if kind == 'service':
+                self._dirty_services.update(targets)
+                self.services_revision = self.revision
+            else:
+                self._dirty_devices.update(targets)
+                self.devices_revision = self.revision
+            
+            if not self.journal:
+                self.persister.mark_dirty()
 
-    def start_cleanup_timer(self) -> None:
-        """Start background thread for cleaning up stale entries."""
-        cleanup_thread = threading.Thread(target=self._cleanup_timer)
-        cleanup_thread.daemon = True
-        cleanup_thread.start()
+    def _capture_changes(self) -> SnapshotChanges:
+        """Hand the entries changed since the last capture to the persister.
+        
+        The changed entries are read from the published views, which are
+        never mutated in place, so no domain lock is needed. A view may
+        already reflect a revision newer than the one returned; replaying
+        the journal on top of it is idempotent.
+        """
+        with self.revision_lock:
+            dirty_services, self._dirty_services = self._dirty_services, set()
+            dirty_devices, self._dirty_devices = self._dirty_devices, set()
+            revision = self.revision
+            last_updated = self.last_updated
+        
+        services_view = self._services_view
+        service_changes = {service_id: services_view.get(service_id) for service_id in dirty_services}
+        device_changes = {device_id: self._shard_for(device_id).view.get(device_id) for device_id in dirty_devices}
+        return revision, last_updated, service_changes, device_changes
+
+    def write_snapshot(self) -> int:
+        """Write a full snapshot and return the revision it covers."""
+        return self.persister.flush()
+
+    def save_data(self) -> None:
+        """Save registry data to storage file."""
+        if self.journal:
+            self.journal.flush()
+        self.write_snapshot()
 
-    def _cleanup_timer(self) -> None:
-        """Timer function for periodic cleanup of stale entries."""
+    def close(self) -> None:
+        """Flush pending journal entries and snapshot changes so nothing is lost on shutdown."""
+        if self.journal:
+            self.journal.flush(timeout=5)
+        else:
+            self.persister.flush()
+
+    def get_changes(self, since: int, timeout: float = 0, kind: Optional[str] = None) -> Tuple[int, Optional[List[Change]]]:
+        """Get changes after a revision, waiting up to timeout seconds for one to happen."""
+        return self.change_feed.since(since, timeout=timeout, kind=kind)
+
+    def add_listener(self, listener: Callable[[RegistryEvent], None]) -> None:
+        """Register a callback for status transition events."""
+        self.listeners.append(listener)
+
+    def _dispatch_events(self) -> None:
+        """Deliver queued events to listeners."""
         while True:
-            time.sleep(300)  # Check every 5 minutes
-            self._cleanup_stale_entries()
+            event = self.event_queue.get()
+            for listener in list(self.listeners):
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"Error in registry event listener: {e}")
 
-    def _cleanup_stale_entries(self) -> None:
-        """Remove or mark inactive services and devices that haven't been updated within timeout period."""
+    def _expire(self, kind: str, entity_id: str) -> None:
+        """Handle an expired deadline: drop the service or mark the device inactive."""
         current_time = int(time.time())
         
-        with self.lock:
-            services_to_remove: List[str] = []
-            for service_id, service in self.services.items():
-                if current_time - service.timestamp > 900:  # 15 minutes timeout
-                    services_to_remove.append(service_id)
-            
-            for service_id in services_to_remove:
-                del self.services[service_id]
-            
-            for device_id, device in self.devices.items():
-                if current_time - device.timestamp > 900:  # 15 minutes timeout
-                    device.status = "inactive"
-            
-            if services_to_remove:
-                self.save_data()
+        if kind == 'service':
+            with self.services_lock:
+                service = self.services.get(entity_id)
+                if service and current_time - service.timestamp >= self.entry_timeout:
+                    del self.services[entity_id]
+                    self._record({'op': 'delete_service', 'id': entity_id, 'reason': 'expired'})
+            return
+        
+        shard = self._shard_for(entity_id)
+        with shard.lock:
+            device = shard.devices.get(entity_id)
+            if device and device.status != "inactive" and current_time - device.timestamp >= self.entry_timeout:
+                device.status = "inactive"
+                self._record({
+                    'op': 'device_status',
+                    'id': entity_id,
+                    'status': device.status,
+                    'timestamp': device.timestamp,
+                    'last_updated': device.last_updated,
+                    'reason': 'expired'
+                })
 
     def register_service(self, service_data: Dict[str, Any]) -> ServiceDict:
         """Register a new service in the catalog."""
-        with self.lock:
+        with self.services_lock:
             service = Service.from_dict(service_data)
             self.services[service.service_id] = service
-            self.save_data()
-            return service.to_dict()
+            self._record({'op': 'put_service', 'data': service.to_dict()})
+            return self._services_view[service.service_id]
 
     def update_service(self, service_id: str, service_data: Dict[str, Any]) -> Optional[ServiceDict]:
         """Update an existing service in the catalog."""
-        with self.lock:
+        with self.services_lock:
             if service_id not in self.services:
                 return None
             
             service = Service.from_dict(service_data)
             service.service_id = service_id
             self.services[service_id] = service
-            self.save_data()
-            return service.to_dict()
+            self._record({'op': 'put_service', 'data': service.to_dict()})
+            return self._services_view[service_id]
 
     def get_service(self, service_id: str) -> Optional[ServiceDict]:
         """Get a service by its ID."""
-        with self.lock:
-            service = self.services.get(service_id)
-            if service:
-                return service.to_dict()
-            return None
+        return self._services_view.get(service_id)
 
     def get_all_services(self) -> Dict[str, ServiceDict]:
         """Get all registered services."""
-        with self.lock:
-            return {service_id: service.to_dict() for service_id, service in self.services.items()}
+        return self._services_view.copy()
+
+    def get_services_json(self) -> str:
+        """Get all registered services as a JSON object built from cached fragments."""
+        return b''.join(self.list_services()[0]).decode('utf-8')
+
+    def list_services(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], Optional[str]]:
+        """Stream services as JSON chunks, optionally paged by service ID and projected to some fields.
+        
+        Returns the chunks and the cursor of the next page, or None on the last page.
+        """
+        if after is None and limit is None:
+            service_ids: Iterable[str] = sorted(list(self._services_view))
+            next_cursor = None
+        else:
+            service_ids, next_cursor = paginate(list(self._services_view), after, limit)
+        
+        view, fragments = self._services_view, self._services_fragments
+        members: List[str] = []
+        for service_id in service_ids:
+            service = view.get(service_id)
+            if not service:
+                continue
+            member = fragments.get(service_id) if fields is None else project_member(service_id, service, fields)
+            if member:
+                members.append(member)
+        return json_object_chunks(members), next_cursor
 
     def delete_service(self, service_id: str) -> bool:
         """Delete a service by its ID."""
-        with self.lock:
+        with self.services_lock:
             if service_id in self.services:
                 del self.services[service_id]
-                self.save_data()
+                self._record({'op': 'delete_service', 'id': service_id})
                 return True
             return False
 
     def register_device(self, device_data: Dict[str, Any]) -> DeviceDict:
         """Register a new device in the catalog."""
-        with self.lock:
-            device = Device.from_dict(device_data)
-            self.devices[device.device_id] = device
-            self.save_data()
-            return device.to_dict()
+        device = Device.from_dict(device_data)
+        shard = self._shard_for(device.device_id)
+        with shard.lock:
+            shard.devices[device.device_id] = device
+            self._record({'op': 'put_device', 'data': device.to_dict()})
+            return shard.view[device.device_id]
 
     def update_device(self, device_id: str, device_data: Dict[str, Any]) -> Optional[DeviceDict]:
         """Update an existing device in the catalog."""
-        with self.lock:
-            if device_id not in self.devices:
+        shard = self._shard_for(device_id)
+        with shard.lock:
+            if device_id not in shard.devices:
                 return None
             
             device = Device.from_dict(device_data)
             device.device_id = device_id
-            self.devices[device_id] = device
-            self.save_data()
-            return device.to_dict()
+            shard.devices[device_id] = device
+            self._record({'op': 'put_device', 'data': device.to_dict()})
+            return shard.view[device_id]
 
     def update_device_measurements(self, device_id: str, measurements: Dict[str, Any]) -> Optional[DeviceDict]:
         """Update measurements for a device."""
-        with self.lock:
-            if device_id not in self.devices:
+        shard = self._shard_for(device_id)
+        with shard.lock:
+            if device_id not in shard.devices:
                 return None
             
-            device = self.devices[device_id]
+            device = shard.devices[device_id]
             device.update_measurements(measurements)
-            self.save_data()
-            return device.to_dict()
+            self._record({
+                'op': 'device_measurements',
+                'id': device_id,
+                'measurements': measurements,
+                'timestamp': device.timestamp,
+                'last_updated': device.last_updated
+            })
+            return shard.view[device_id]
 
     def update_device_status(self, device_id: str, status: str) -> Optional[DeviceDict]:
         """Update status for a device."""
-        with self.lock:
-            if device_id not in self.devices:
+        shard = self._shard_for(device_id)
+        with shard.lock:
+            if device_id not in shard.devices:
                 return None
             
-            device = self.devices[device_id]
+            device = shard.devices[device_id]
             device.update_status(status)
-            self.save_data()
-            return device.to_dict()
+            self._record({
+                'op': 'device_status',
+                'id': device_id,
+                'status': status,
+                'timestamp': device.timestamp,
+                'last_updated': device.last_updated
+            })
+            return shard.view[device_id]
+
+    def bulk_update_devices(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply measurement and/or status updates for many devices.
+        
+        Updates are grouped by shard so each shard lock is taken once and
+        each shard's changes are published and persisted as one batch.
+        Returns one result per update, in request order.
+        """
+        results: List[Dict[str, Any]] = [{} for _ in updates]
+        by_shard: Dict[int, List[int]] = {}
+        
+        for position, update in enumerate(updates):
+            device_id = update.get('device_id') if isinstance(update, dict) else None
+            error = None
+            if not device_id or not isinstance(device_id, str):
+                error = "device_id is required"
+            elif update.get('measurements') is None and update.get('status') is None:
+                error = "measurements or status is required"
+            elif update.get('measurements') is not None and not isinstance(update['measurements'], dict):
+                error = "measurements must be an object"
+            elif update.get('status') is not None and not isinstance(update['status'], str):
+                error = "status must be a string"
+            
+            if error:
+                results[position] = {'device_id': device_id, 'success': False, 'error': error}
+            else:
+                by_shard.setdefault(hash(device_id) % len(self.shards), []).append(position)
+        
+        for shard_number, positions in by_shard.items():
+            shard = self.shards[shard_number]
+            with shard.lock:
+                entries: List[JournalEntry] = []
+                for position in positions:
+                    update = updates[position]
+                    device_id = update['device_id']
+                    device = shard.devices.get(device_id)
+                    if not device:
+                        results[position] = {'device_id': device_id, 'success': False, 'error': f"Device with ID {device_id} not found"}
+                        continue
+                    
+                    if update.get('measurements') is not None:
+                        device.update_measurements(update['measurements'])
+                        entries.append({
+                            'op': 'device_measurements',
+                            'id': device_id,
+                            'measurements': update['measurements'],
+                            'timestamp': device.timestamp,
+                            'last_updated': device.last_updated
+                        })
+                    if update.get('status') is not None:
+                        device.update_status(update['status'])
+                        entries.append({
+                            'op': 'device_status',
+                            'id': device_id,
+                            'status': update['status'],
+                            'timestamp': device.timestamp,
+                            'last_updated': device.last_updated
+                        })
+                    results[position] = {'device_id': device_id, 'success': True}
+                
+                self._record_many(entries)
+        
+        return results
 
     def get_device(self, device_id: str) -> Optional[DeviceDict]:
         """Get a device by its ID."""
-        with self.lock:
-            device = self.devices.get(device_id)
-            if device:
-                return device.to_dict()
-            return None
+        return self._shard_for(device_id).view.get(device_id)
 
     def get_all_devices(self) -> Dict[str, DeviceDict]:
         """Get all registered devices."""
-        with self.lock:
-            return {device_id: device.to_dict() for device_id, device in self.devices.items()}
+        devices: Dict[str, DeviceDict] = {}
+        for shard in self.shards:
+            devices.update(shard.view)
+        return devices
 
     def get_devices_by_type(self, device_type: str) -> Dict[str, DeviceDict]:
         """Get devices filtered by type."""
-        with self.lock:
-            return {device_id: device.to_dict() for device_id, device in self.devices.items() 
-                    if device.device_type == device_type}
+        return self.find_devices(device_type=device_type)
+
+    def _find_device_ids(self, **filters: Optional[str]) -> Optional[Set[str]]:
+        """Look up the IDs matching all given filters, or None when no filter is set."""
+        with self.index_lock:
+            return self.device_index.query(**filters)
+
+    def find_devices(
+        self,
+        device_type: Optional[str] = None,
+        status: Optional[str] = None,
+        service: Optional[str] = None,
+        zone: Optional[str] = None,
+        section: Optional[str] = None
+    ) -> Dict[str, DeviceDict]:
+        """Get devices matching all given filters using the secondary indexes."""
+        device_ids = self._find_device_ids(
+            device_type=device_type,
+            status=status,
+            service=service,
+            zone=zone,
+            section=section
+        )
+        if device_ids is None:
+            return self.get_all_devices()
+        
+        devices: Dict[str, DeviceDict] = {}
+        for device_id in device_ids:
+            device = self._shard_for(device_id).view.get(device_id)
+            if device:
+                devices[device_id] = device
+        return devices
+
+    def get_devices_json(
+        self,
+        device_type: Optional[str] = None,
+        status: Optional[str] = None,
+        service: Optional[str] = None,
+        zone: Optional[str] = None,
+        section: Optional[str] = None
+    ) -> str:
+        """Get matching devices as a JSON object built from cached fragments."""
+        chunks, _ = self.list_devices(
+            device_type=device_type,
+            status=status,
+            service=service,
+            zone=zone,
+            section=section
+        )
+        return b''.join(chunks).decode('utf-8')
+
+    def list_devices(
+        self,
+        device_type: Optional[str] = None,
+        status: Optional[str] = None,
+        service: Optional[str] = None,
+        zone: Optional[str] = None,
+        section: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], Optional[str]]:
+        """Stream matching devices as JSON chunks, optionally paged by device ID and projected to some fields.
+        
+        Returns the chunks and the cursor of the next page, or None on the last page.
+        """
+        device_ids: Optional[Iterable[str]] = self._find_device_ids(
+            device_type=device_type,
+            status=status,
+            service=service,
+            zone=zone,
+            section=section
+        )
+        
+        next_cursor = None
+        if after is not None or limit is not None:
+            if device_ids is None:
+                device_ids = (device_id for shard in self.shards for device_id in list(shard.view))
+            device_ids, next_cursor = paginate(device_ids, after, limit)
+        
+        return json_object_chunks(self._device_members(device_ids, fields)), next_cursor
+
+    def _device_members(self, device_ids: Optional[Iterable[str]], fields: Optional[Sequence[str]]) -> Iterator[str]:
+        """Yield the encoded '"device_id": {...}' members for the given devices, or for all of them."""
+        if device_ids is None:
+            # Whole registry: snapshot one shard at a time so memory stays flat while streaming
+            for shard in self.shards:
+                if fields is None:
+                    yield from list(shard.fragments.values())
+                else:
+                    for device_id, device in list(shard.view.items()):
+                        yield project_member(device_id, device, fields)
+            return
+        
+        for device_id in device_ids:
+            shard = self._shard_for(device_id)
+            if fields is None:
+                member = shard.fragments.get(device_id)
+            else:
+                device = shard.view.get(device_id)
+                member = project_member(device_id, device, fields) if device else None
+            if member:
+                yield member
 
     def delete_device(self, device_id: str) -> bool:
         """Delete a device by its ID."""
-        with self.lock:
-            if device_id in self.devices:
-                del self.devices[device_id]
-                self.save_data()
+        shard = self._shard_for(device_id)
+        with shard.lock:
+            if device_id in shard.devices:
+                del shard.devices[device_id]
+                self._record({'op': 'delete_device', 'id': device_id})
                 return True
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# (revision, last_updated, service changes, device changes); a change of None means deleted
+SnapshotChanges = Tuple[int, str, Dict[str, Optional[Dict[str, Any]]], Dict[str, Optional[Dict[str, Any]]]]
+
+class SnapshotPersister:
+    """Writes registry snapshots in the background, off the request path."""
+
+    def __init__(
+        self,
+        storage_file: str,
+        capture_callback: Callable[[], SnapshotChanges],
+        flush_interval: float = 0.5,
+        max_pending: int = 1000,
+        auto_flush: bool = True
+    ):
+        self.storage_file: str = storage_file
+        self.capture_callback = capture_callback
+        self.flush_interval: float = flush_interval
+        self.max_pending: int = max_pending
+        self.auto_flush: bool = auto_flush
+
+        self.services: Dict[str, Dict[str, Any]] = {}
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.pending: int = 0
+        self.last_flush: float = 0.0
+
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.flush_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background flush thread when auto flushing is enabled."""
+        if not self.auto_flush:
+            return
+        self.flush_thread = threading.Thread(target=self._flush_loop)
+        self.flush_thread.daemon = True
+        self.flush_thread.start()
+
+    def mark_dirty(self) -> None:
+        """Record that the registry changed. Cheap enough to call under the registry lock."""
+        with self.condition:
+            self.pending += 1
+            if self.pending == 1 or self.pending >= self.max_pending:
+                self.condition.notify()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self.condition:
+                while self.pending == 0:
+                    self.condition.wait()
+
+                deadline = self.last_flush + self.flush_interval
+                while self.pending < self.max_pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing registry snapshot: {e}")
+
+    def flush(self) -> int:
+        """Write a snapshot of the current registry state and return its revision."""
+        with self.write_lock:
+            with self.condition:
+                self.pending = 0
+            revision, last_updated, service_changes, device_changes = self.capture_callback()
+
+            self._merge(self.services, service_changes)
+            self._merge(self.devices, device_changes)
+
+            serialized = json.dumps({
+                'services': self.services,
+                'devices': self.devices,
+                'last_updated': last_updated,
+                'revision': revision
+            }, separators=(',', ':'))
+            self._write_atomic(serialized)
+
+            self.last_flush = time.monotonic()
+            return revision
+
+    @staticmethod
+    def _merge(target: Dict[str, Dict[str, Any]], changes: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        for key, value in changes.items():
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+
+    def _write_atomic(self, serialized: str) -> None:
+        temp_file = f"{self.storage_file}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(serialized)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.storage_file)
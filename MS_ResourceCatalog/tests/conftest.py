@@ -0,0 +1,36 @@
+import os
+import sys
+
+import cherrypy
+import pytest
+from cherrypy.lib import httputil
+
+# Tests import the service's modules the way main.py does, from the service directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def registry(tmp_path):
+    from services.registry_service import RegistryService
+
+    registry = RegistryService(str(tmp_path / "registry_data.json"), journal_commit_interval=0.01)
+    yield registry
+    registry.close()
+
+@pytest.fixture
+def controller(registry, tmp_path):
+    from controllers.catalog_controller import CatalogController
+    from services.config_store import ConfigStore
+
+    return CatalogController(registry, ConfigStore(str(tmp_path / "config_data.json")))
+
+@pytest.fixture
+def http():
+    # A fresh CherryPy request/response pair so handlers can be called directly
+    def start(headers=None):
+        request = cherrypy._cprequest.Request(httputil.Host("127.0.0.1", 8080), httputil.Host("127.0.0.1", 50000))
+        request.headers = httputil.HeaderMap(headers or {})
+        cherrypy.serving.load(request, cherrypy._cprequest.Response())
+        return cherrypy.serving.response
+
+    yield start
+    cherrypy.serving.clear()
@@ -0,0 +1,69 @@
+import cherrypy
+
+from controllers.catalog_controller import MAX_BULK_UPDATES
+
+def register(registry, count):
+    for i in range(count):
+        registry.register_device({"device_id": f"device_{i}", "name": f"Sensor {i}", "device_type": "pressure"})
+
+def test_results_follow_request_order(registry):
+    register(registry, 40)
+    updates = [
+        {"device_id": "device_7", "measurements": {"pressure": 61.0}},
+        {"device_id": "missing", "status": "offline"},
+        {"measurements": {"pressure": 1.0}},
+        {"device_id": "device_3"},
+        {"device_id": "device_12", "measurements": [1, 2]},
+        {"device_id": "device_20", "status": 5},
+        "device_21",
+        {"device_id": "device_31", "measurements": {"temperature": 20.5}, "status": "maintenance"}
+    ]
+    
+    results = registry.bulk_update_devices(updates)
+    
+    assert [result["success"] for result in results] == [True, False, False, False, False, False, False, True]
+    assert [result["device_id"] for result in results] == [
+        "device_7", "missing", None, "device_3", "device_12", "device_20", None, "device_31"
+    ]
+    assert results[1]["error"] == "Device with ID missing not found"
+    assert results[3]["error"] == "measurements or status is required"
+    assert registry.get_device("device_7")["measurements"] == {"pressure": 61.0}
+    assert registry.get_device("device_31")["status"] == "maintenance"
+    assert registry.get_device("device_31")["measurements"] == {"temperature": 20.5}
+
+def test_failed_items_do_not_block_the_rest(registry):
+    register(registry, 2)
+    revision = registry.revision
+    
+    results = registry.bulk_update_devices([
+        {"device_id": "missing", "status": "offline"},
+        {"device_id": "device_0", "status": "offline"},
+        {"device_id": "device_1", "measurements": {"pressure": 70.0}}
+    ])
+    
+    assert [result["success"] for result in results] == [False, True, True]
+    assert registry.revision == revision + 2
+
+def call(controller, http, body):
+    http()
+    cherrypy.serving.request.json = body
+    return controller.bulk_update_devices()
+
+def test_controller_counts_results(controller, registry, http):
+    register(registry, 1)
+    
+    response = call(controller, http, {"updates": [
+        {"device_id": "device_0", "status": "offline"},
+        {"device_id": "missing", "status": "offline"}
+    ]})
+    
+    assert (response["succeeded"], response["failed"]) == (1, 1)
+    assert len(response["results"]) == 2
+
+def test_controller_rejects_empty_and_oversized_requests(controller, http):
+    assert "error" in call(controller, http, [])
+    assert cherrypy.serving.response.status == 400
+    
+    updates = [{"device_id": f"device_{i}", "status": "offline"} for i in range(MAX_BULK_UPDATES + 1)]
+    assert "error" in call(controller, http, updates)
+    assert cherrypy.serving.response.status == 413
@@ -0,0 +1,58 @@
+import json
+
+import cherrypy
+import pytest
+from cherrypy import _cpdispatch
+
+SERVICE = {"service_id": "control_center", "name": "control_center", "description": "", "endpoints": {}}
+
+def test_service_lookup_sets_an_etag(controller, registry, http):
+    registry.register_service(SERVICE)
+    response = http()
+
+    assert controller.service("control_center")["service_id"] == "control_center"
+    assert response.headers["ETag"] == f'"{registry.services_revision}"'
+
+def test_service_lookup_answers_304_while_unchanged(controller, registry, http):
+    registry.register_service(SERVICE)
+    etag = f'"{registry.services_revision}"'
+    http({"If-None-Match": etag})
+
+    with pytest.raises(cherrypy.HTTPRedirect) as redirect:
+        controller.service("control_center")
+    assert redirect.value.status == 304
+
+def test_service_lookup_answers_again_after_a_change(controller, registry, http):
+    registry.register_service(SERVICE)
+    etag = f'"{registry.services_revision}"'
+    registry.update_service("control_center", dict(SERVICE, description="moved"))
+    http({"If-None-Match": etag})
+
+    assert controller.service("control_center")["description"] == "moved"
+
+def test_unknown_service_is_404(controller, http):
+    response = http()
+
+    assert "error" in controller.service("missing")
+    assert response.status == 404
+
+def test_service_metadata_is_kept(controller, registry, http):
+    registry.register_service(dict(SERVICE, metadata={"instance_count": 2}))
+    http()
+
+    assert controller.service("control_center")["metadata"] == {"instance_count": 2}
+
+@pytest.mark.parametrize("handler", ["services", "devices"])
+def test_list_handlers_take_no_path_segments(controller, handler):
+    with pytest.raises(cherrypy.HTTPError) as error:
+        _cpdispatch.test_callable_spec(getattr(controller, handler), ("analytics",), {})
+    assert error.value.status == 404
+
+def test_list_options_still_come_from_the_query(controller, registry, http):
+    registry.register_service({"service_id": "analytics", "name": "analytics"})
+    registry.register_service({"service_id": "control_center", "name": "control_center"})
+    http()
+    
+    body = b"".join(controller.services(limit="1"))
+    assert list(json.loads(body)) == ["analytics"]
+    assert cherrypy.serving.response.headers["X-Next-Cursor"] == "analytics"
@@ -0,0 +1,59 @@
+import pytest
+
+from models.device import Device
+from services.device_index import DeviceIndex
+
+def make_device(device_id, device_type="pressure", status="active", services=("analytics",), zone="zone_1", section="section_1"):
+    return Device(
+        device_id,
+        device_id,
+        device_type,
+        location={"zone": zone, "section": section},
+        status=status,
+        associated_services=list(services)
+    )
+
+@pytest.fixture
+def index():
+    index = DeviceIndex()
+    index.update(make_device("a"))
+    index.update(make_device("b", device_type="temperature"))
+    index.update(make_device("c", zone="zone_2", services=("analytics", "control_center")))
+    index.update(make_device("d", status="offline", services=("control_center",)))
+    return index
+
+def test_filters_intersect(index):
+    assert index.query(device_type="pressure", zone="zone_1") == {"a", "d"}
+    assert index.query(service="control_center", status="active") == {"c"}
+    assert index.query(device_type="temperature", zone="zone_2") == set()
+    assert index.query(zone="zone_9") == set()
+
+def test_no_filter_means_no_restriction(index):
+    assert index.query() is None
+    assert index.query(zone=None, status=None) is None
+
+def test_unknown_filter_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.query(colour="red")
+
+def test_query_result_does_not_alias_the_index(index):
+    index.query(zone="zone_2").add("x")
+    assert index.query(zone="zone_2") == {"c"}
+
+def test_reindexing_moves_a_device(index):
+    index.update(make_device("a", status="offline", zone="zone_2"))
+    assert index.query(status="offline") == {"a", "d"}
+    assert index.query(zone="zone_1") == {"b", "d"}
+    assert index.query(zone="zone_2", status="offline") == {"a"}
+
+def test_removed_devices_leave_no_empty_buckets(index):
+    index.remove("c")
+    index.remove("missing")
+    assert index.query(zone="zone_2") == set()
+    assert "zone_2" not in index.indexes["zone"]
+    assert "c" not in index.keys
+
+def test_duplicate_services_are_indexed_once(index):
+    index.update(make_device("e", services=("analytics", "analytics")))
+    index.remove("e")
+    assert index.query(service="analytics") == {"a", "b", "c"}
@@ -0,0 +1,64 @@
+import json
+import os
+
+from services.journal import RegistryJournal
+from services.registry_service import RegistryService
+
+def device(i):
+    return {"device_id": f"device_{i}", "name": f"Sensor {i}", "device_type": "pressure"}
+
+def open_registry(storage_file, **options):
+    return RegistryService(str(storage_file), journal_commit_interval=0.01, **options)
+
+def journal_lines(storage_file):
+    with open(f"{storage_file}.journal") as f:
+        return f.readlines()
+
+def test_restart_replays_the_journal(tmp_path):
+    storage_file = tmp_path / "registry_data.json"
+    registry = open_registry(storage_file)
+    for i in range(3):
+        registry.register_device(device(i))
+    registry.update_device_measurements("device_1", {"pressure": 60.0})
+    registry.delete_device("device_2")
+    registry.close()
+    
+    # close() only flushes the journal, so the restart has nothing but the journal
+    assert not os.path.exists(storage_file)
+    recovered = open_registry(storage_file)
+    assert set(recovered.get_all_devices()) == {"device_0", "device_1"}
+    assert recovered.get_device("device_1")["measurements"] == {"pressure": 60.0}
+    assert recovered.revision == registry.revision
+    recovered.close()
+
+def test_torn_last_entry_is_dropped(tmp_path):
+    storage_file = tmp_path / "registry_data.json"
+    registry = open_registry(storage_file)
+    registry.register_device(device(0))
+    registry.close()
+    with open(f"{storage_file}.journal", "a") as f:
+        f.write('{"op":"put_device","data":{"device_id":"dev')
+    
+    assert len(RegistryJournal.read_entries(f"{storage_file}.journal")) == 1
+    recovered = open_registry(storage_file)
+    assert set(recovered.get_all_devices()) == {"device_0"}
+    recovered.close()
+    assert all(line.endswith("\n") for line in journal_lines(storage_file))
+
+def test_compaction_snapshots_and_drops_covered_entries(tmp_path):
+    storage_file = tmp_path / "registry_data.json"
+    registry = open_registry(storage_file, journal_compact_threshold=5)
+    for i in range(12):
+        registry.register_device(device(i))
+        registry.journal.flush()
+    registry.close()
+    
+    with open(storage_file) as f:
+        snapshot = json.load(f)
+    remaining = [json.loads(line) for line in journal_lines(storage_file)]
+    assert len(remaining) < 5
+    assert all(entry["rev"] > snapshot["revision"] for entry in remaining)
+    
+    recovered = open_registry(storage_file)
+    assert len(recovered.get_all_devices()) == 12
+    recovered.close()
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from services.json_listing import json_object_chunks, paginate, project_member
+
+KEYS = [f"device_{i:02d}" for i in range(10)][::-1]
+
+def test_pages_are_in_key_order_with_a_cursor():
+    assert paginate(KEYS, limit=3) == (["device_00", "device_01", "device_02"], "device_02")
+    assert paginate(KEYS, after="device_02", limit=3) == (["device_03", "device_04", "device_05"], "device_05")
+
+def test_last_page_has_no_cursor():
+    assert paginate(KEYS, after="device_06", limit=3) == (["device_07", "device_08", "device_09"], None)
+    assert paginate(KEYS, after="device_09", limit=3) == ([], None)
+
+def test_without_limit_everything_after_the_cursor_is_returned():
+    assert paginate(KEYS, after="device_07") == (["device_08", "device_09"], None)
+    assert paginate(KEYS) == (sorted(KEYS), None)
+
+def test_cursor_need_not_be_an_existing_key():
+    assert paginate(KEYS, after="device_045", limit=2) == (["device_05", "device_06"], "device_06")
+
+@pytest.mark.parametrize("count", [0, 1, 3, 4, 7])
+def test_chunks_form_one_json_object(count):
+    members = [project_member(f"k{i}", {"value": i}, ["value"]) for i in range(count)]
+    chunks = list(json_object_chunks(members, chunk_size=3))
+    assert json.loads(b"".join(chunks)) == {f"k{i}": {"value": i} for i in range(count)}
+
+def test_projection_skips_missing_fields():
+    assert json.loads("{" + project_member("a", {"status": "active"}, ["status", "name"]) + "}") == {"a": {"status": "active"}}
+
+def test_walking_every_page_returns_each_device_once(registry):
+    for i in range(25):
+        registry.register_device({
+            "device_id": f"device_{i:02d}",
+            "name": f"Sensor {i}",
+            "device_type": "pressure" if i % 2 else "temperature"
+        })
+    
+    seen, after = [], None
+    while True:
+        chunks, after = registry.list_devices(device_type="pressure", fields=["status"], after=after, limit=4)
+        page = json.loads(b"".join(chunks))
+        assert all(device == {"status": "active"} for device in page.values())
+        seen.extend(page)
+        if after is None:
+            break
+    
+    assert seen == [f"device_{i:02d}" for i in range(1, 25, 2)]
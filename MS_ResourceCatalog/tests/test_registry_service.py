@@ -0,0 +1,68 @@
+import json
+import threading
+
+def device(i, **fields):
+    return dict({
+        "device_id": f"device_{i}",
+        "name": f"Sensor {i}",
+        "device_type": "pressure",
+        "location": {"zone": f"zone_{i % 2}", "section": f"section_{i % 2}"},
+        "associated_services": [f"analytics_{i % 2}"]
+    }, **fields)
+
+def test_published_dicts_are_never_modified(registry):
+    registry.register_device(device(1))
+    registry.register_service({"service_id": "analytics", "name": "analytics"})
+    shard = registry._shard_for("device_1")
+    published, fragment = shard.view["device_1"], shard.fragments["device_1"]
+    service = registry.get_service("analytics")
+    
+    registry.update_device_measurements("device_1", {"pressure": 60.0})
+    registry.register_service({"service_id": "analytics", "name": "analytics v2"})
+    
+    # Updates replace the entry in the view, a dict handed to a reader stays as it was
+    assert published["measurements"] == {}
+    assert "60.0" not in fragment
+    assert shard.view["device_1"]["measurements"] == {"pressure": 60.0}
+    assert "60.0" in shard.fragments["device_1"]
+    assert service["name"] == "analytics"
+    assert registry.get_service("analytics")["name"] == "analytics v2"
+
+def test_listings_run_while_devices_come_and_go(registry):
+    for i in range(200):
+        registry.register_device(device(i))
+    stop = threading.Event()
+    
+    def churn():
+        i = 200
+        while not stop.is_set():
+            registry.register_device(device(i))
+            registry.delete_device(f"device_{i - 100}")
+            i += 1
+    
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        for _ in range(200):
+            json.loads(registry.get_devices_json())
+            json.loads(registry.get_services_json())
+            registry.get_all_devices()
+    finally:
+        stop.set()
+        writer.join()
+
+def test_fragments_match_the_views(registry):
+    for i in range(20):
+        registry.register_device(device(i))
+    registry.update_device_measurements("device_3", {"temperature": 21.5})
+    registry.delete_device("device_4")
+    
+    assert json.loads(registry.get_devices_json()) == registry.get_all_devices()
+    assert "device_4" not in registry.get_all_devices()
+
+def test_repeated_strings_are_shared(registry):
+    first = registry.register_device(device(1))
+    second = registry.register_device(device(3))
+    
+    assert first["location"]["zone"] is second["location"]["zone"]
+    assert first["associated_services"][0] is second["associated_services"][0]
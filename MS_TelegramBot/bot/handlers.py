@@ -2,7 +2,8 @@ import logging
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from services.resource_service import ResourceService
 
 router = Router()
 logger = logging.getLogger("TelegramBot.Handlers")
@@ -66,12 +67,23 @@ async def cmd_unsubscribe(message: Message):
         await message.answer("ℹ️ You are not subscribed to alerts.")
 
 @router.message(Command("status"))
-async def cmd_status(message: Message):
+async def cmd_status(message: Message, resource_service: Optional[ResourceService] = None):
     """Handle the /status command"""
-    # Here you would typically fetch status from other services
+    # The Control Center is resolved through the Resource Catalog, served from cache while fresh;
+    # when it is scaled out, every instance reports the pipelines it owns
+    statuses = await resource_service.call_service("control_center", "status") if resource_service else []
+    if not statuses:
+        await message.answer(
+            "📊 <b>System Status</b>\n\n"
+            "⚠️ Control Center unavailable, status unknown"
+        )
+        return
+    
+    pipelines = sum(len(status.get("pipelines") or {}) for status in statuses)
     await message.answer(
         "📊 <b>System Status</b>\n\n"
-        "🟢 All systems operational\n"
+        f"🟢 Control Center reachable ({len(statuses)} instance{'s' if len(statuses) > 1 else ''})\n"
+        f"🔧 Pipelines monitored: {pipelines}\n"
         "🔄 Last update: just now"
     )
 
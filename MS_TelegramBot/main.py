@@ -71,6 +71,7 @@ async def main():
     
     # Initialize services
     resource_service = ResourceService(resource_catalog_url)
+    dp["resource_service"] = resource_service
     
     # Start the API server (using get_running_loop for Python 3.13 compatibility)
     loop = asyncio.get_running_loop()
@@ -85,7 +86,10 @@ async def main():
     
     # Start the bot
     logger.info("Starting bot")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await resource_service.close()
 
 if __name__ == "__main__":
     try:
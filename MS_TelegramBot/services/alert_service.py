@@ -3,6 +3,7 @@ import asyncio
 from typing import Dict, Any, Optional
 from aiogram import Bot
 from aiogram.enums import ParseMode
+from utils.message_formatter import format_prediction_alert
 
 class AlertService:
     def __init__(self, bot: Bot):
@@ -26,7 +27,7 @@ class AlertService:
             return True
         return False
     
-    async def send_alert(self, message: str, data: Optional[Dict[str, Any]] = None):
+    async def send_alert(self, message: str, data: Optional[Dict[str, Any]] = None, parse_mode: str = ParseMode.HTML):
         """Send an alert message to all admin chats"""
         if not self.admin_chat_ids:
             self.logger.warning("No admin chat IDs configured, alert not sent")
@@ -43,7 +44,7 @@ class AlertService:
                 await self.bot.send_message(
                     chat_id=chat_id,
                     text=formatted_message,
-                    parse_mode=ParseMode.HTML
+                    parse_mode=parse_mode
                 )
                 self.logger.info(f"Alert sent to chat {chat_id}")
             except Exception as e:
@@ -53,8 +54,20 @@ class AlertService:
         """Handle notifications from the Analytics service"""
         alert_type = data.get("type", "unknown")
         message = data.get("message", "No message provided")
+        forecast = data.get("data") if isinstance(data.get("data"), dict) else {}
         
-        if alert_type == "anomaly":
+        if alert_type.endswith("prediction") and forecast.get("time_to_threshold") is not None:
+            await self.send_alert(
+                format_prediction_alert(
+                    forecast.get("sensor_type", alert_type.split("_")[0]),
+                    forecast.get("current_value") or 0.0,
+                    forecast.get("predicted_max", 0.0),
+                    forecast.get("threshold", 0.0),
+                    forecast["time_to_threshold"]
+                ),
+                parse_mode=ParseMode.MARKDOWN
+            )
+        elif alert_type == "anomaly":
             await self.send_alert(f"⚠️ <b>Anomaly Detected</b>: {message}", data)
         elif alert_type == "threshold":
             await self.send_alert(f"🔴 <b>Threshold Alert</b>: {message}", data)
@@ -1,13 +1,37 @@
+import asyncio
 import logging
+import time
 import aiohttp
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Set
 
 class ResourceService:
-    def __init__(self, catalog_url: Optional[str] = None):
+    def __init__(self, catalog_url: Optional[str] = None, cache_ttl: float = 30, stale_ttl: float = 300):
         self.catalog_url = catalog_url
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
         self.logger = logging.getLogger("TelegramBot.ResourceService")
         
+        # One session for all catalog requests so connections are reused
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.refreshing: Set[str] = set()
+        # The event loop only keeps weak references to tasks, so hold on to running refreshes
+        self.refresh_tasks: Set[asyncio.Task] = set()
+        
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+        return self.session
+        
+    async def close(self) -> None:
+        """Cancel pending refreshes and close the shared HTTP session"""
+        for task in list(self.refresh_tasks):
+            task.cancel()
+        if self.session and not self.session.closed:
+            await self.session.close()
+            
     async def register_with_catalog(self, service_data: Dict[str, Any]) -> bool:
         """Register the service with the Resource Catalog"""
         if not self.catalog_url:
@@ -15,48 +39,142 @@ class ResourceService:
             return False
             
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.catalog_url}/api/services",
-                    json=service_data
-                ) as response:
-                    if response.status == 200 or response.status == 201:
-                        data = await response.json()
-                        self.logger.info(f"Successfully registered with Resource Catalog, ID: {data.get('id')}")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(f"Failed to register with Resource Catalog: {error_text}")
-                        return False
+            async with self._get_session().post(
+                f"{self.catalog_url}/api/services",
+                json=service_data
+            ) as response:
+                if response.status == 200 or response.status == 201:
+                    data = await response.json()
+                    self.logger.info(f"Successfully registered with Resource Catalog, ID: {data.get('id')}")
+                    return True
+                else:
+                    error_text = await response.text()
+                    self.logger.error(f"Failed to register with Resource Catalog: {error_text}")
+                    return False
         except Exception as e:
             self.logger.error(f"Exception during registration with Resource Catalog: {str(e)}")
             return False
             
     async def get_service(self, service_name: str) -> Optional[Dict[str, Any]]:
+        """Get service information, served from cache while fresh and refreshed in the background once stale"""
+        entry = self.cache.get(service_name)
+        if entry:
+            age = time.monotonic() - entry["fetched_at"]
+            if age < self.cache_ttl:
+                return entry["value"]
+            if age < self.stale_ttl:
+                if service_name not in self.refreshing:
+                    self.refreshing.add(service_name)
+                    task = asyncio.create_task(self._refresh(service_name))
+                    self.refresh_tasks.add(task)
+                    task.add_done_callback(self.refresh_tasks.discard)
+                return entry["value"]
+                
+        return await self._fetch_service(service_name)
+        
+    def invalidate(self, service_name: Optional[str] = None) -> None:
+        """Drop a cached service, e.g. after failing to connect to its endpoint"""
+        if service_name is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(service_name, None)
+            
+    async def _refresh(self, service_name: str) -> None:
+        try:
+            await self._fetch_service(service_name)
+        finally:
+            self.refreshing.discard(service_name)
+            
+    async def get_instances(self, service_name: str) -> List[Dict[str, Any]]:
+        """Get a service's record, or one per instance when it is registered as a partitioned group"""
+        service = await self.get_service(service_name)
+        metadata = (service or {}).get("metadata") or {}
+        if not metadata.get("instance_count"):
+            return [service] if service else []
+            
+        instances = []
+        for index in range(metadata["instance_count"]):
+            instance = await self.get_service(f"{metadata['instance_prefix']}{index}")
+            if instance:
+                instances.append(instance)
+        return instances
+        
+    async def call_service(self, service_name: str, endpoint_name: str) -> List[Dict[str, Any]]:
+        """GET one of a service's registered endpoints on each of its instances
+        
+        An instance whose cached address fails is looked up again once.
+        """
+        results = []
+        for instance in await self.get_instances(service_name):
+            result = await self._call_instance(instance, endpoint_name)
+            if result is not None:
+                results.append(result)
+        return results
+        
+    async def _call_instance(self, instance: Dict[str, Any], endpoint_name: str) -> Optional[Dict[str, Any]]:
+        service_id = instance.get("service_id", "")
+        for attempt in range(2):
+            endpoint = (instance.get("endpoints") or {}).get(endpoint_name) or {}
+            url = endpoint.get("url")
+            if not url:
+                self.logger.warning(f"No {endpoint_name} endpoint registered for {service_id}")
+                return None
+                
+            try:
+                async with self._get_session().get(url) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    error_text = await response.text()
+                    self.logger.error(f"{service_id} answered {response.status} on {endpoint_name}: {error_text}")
+                    return None
+            except aiohttp.ClientConnectionError as e:
+                if attempt == 1:
+                    self.logger.error(f"Could not reach {service_id}: {str(e)}")
+                    return None
+                # The cached address may be outdated: drop it and look the instance up once more
+                self.invalidate(service_id)
+                instance = await self.get_service(service_id)
+                if not instance:
+                    return None
+        return None
+        
+    async def _fetch_service(self, service_name: str) -> Optional[Dict[str, Any]]:
         """Get service information from the Resource Catalog"""
         if not self.catalog_url:
             self.logger.warning("Resource Catalog URL not configured, service lookup skipped")
             return None
             
+        entry = self.cache.get(service_name)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+            
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.catalog_url}/api/services",
-                    params={"name": service_name}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        services = data.get("services", [])
-                        if services:
-                            self.logger.info(f"Found service: {service_name}")
-                            return services[0]
-                        else:
-                            self.logger.warning(f"Service not found: {service_name}")
-                            return None
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(f"Failed to get service from Resource Catalog: {error_text}")
-                        return None
+            async with self._get_session().get(
+                f"{self.catalog_url}/service/{service_name}",
+                headers=headers
+            ) as response:
+                if response.status == 304 and entry:
+                    value = entry["value"]
+                elif response.status == 200:
+                    value = await response.json()
+                    self.logger.info(f"Found service: {service_name}")
+                elif response.status == 404:
+                    self.logger.warning(f"Service not found: {service_name}")
+                    self.invalidate(service_name)
+                    return None
+                else:
+                    error_text = await response.text()
+                    self.logger.error(f"Failed to get service from Resource Catalog: {error_text}")
+                    return None
+                    
+                self.cache[service_name] = {
+                    "value": value,
+                    "etag": response.headers.get("ETag"),
+                    "fetched_at": time.monotonic()
+                }
+                return value
         except Exception as e:
             self.logger.error(f"Exception during service lookup from Resource Catalog: {str(e)}")
-            return None 
\ No newline at end of file
+            # Catalog unreachable: fall back to the last known answer
+            return entry["value"] if entry else None
\ No newline at end of file
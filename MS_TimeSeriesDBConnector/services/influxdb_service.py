@@ -38,7 +38,7 @@ class InfluxDBService:
         Write data point to InfluxDB
         
         Args:
-            point (dict): Data point in InfluxDB format
+            point (dict or list): Data point in InfluxDB format, or a list of points written in one request
         
         Returns:
             bool: Success status
@@ -22,6 +22,7 @@ class MQTTListener:
         self.client_id = os.getenv('MQTT_CLIENT_ID', 'timeseries_db_connector')
         self.temp_topic = os.getenv('MQTT_TEMP_TOPIC', '/sensor/temperature')
         self.pressure_topic = os.getenv('MQTT_PRESSURE_TOPIC', '/sensor/pressure')
+        self.batch_topic = os.getenv('MQTT_BATCH_TOPIC', '/sensor/batch')
         
         # Initialize MQTT client with protocol v5 for Python 3.13.1 compatibility
         self.client = mqtt.Client(
@@ -62,11 +63,14 @@ class MQTTListener:
         """
         if rc == 0:
             logger.info("Successfully connected to MQTT broker")
-            # Subscribe to topics
-            self.client.subscribe(self.temp_topic)
-            logger.info(f"Subscribed to {self.temp_topic}")
-            self.client.subscribe(self.pressure_topic)
-            logger.info(f"Subscribed to {self.pressure_topic}")
+            # Subscribe to topics; the wildcard also covers the partitioned
+            # topics (<topic>/<partition>) used when the Control Center is scaled out
+            self.client.subscribe(f"{self.temp_topic}/#")
+            logger.info(f"Subscribed to {self.temp_topic}/#")
+            self.client.subscribe(f"{self.pressure_topic}/#")
+            logger.info(f"Subscribed to {self.pressure_topic}/#")
+            self.client.subscribe(f"{self.batch_topic}/#")
+            logger.info(f"Subscribed to {self.batch_topic}/#")
         else:
             logger.error(f"Failed to connect to MQTT broker with code {rc}")
             
@@ -79,6 +83,17 @@ class MQTTListener:
         try:
             logger.info(f"Received message on topic {msg.topic}")
             
+            if msg.topic == self.batch_topic or msg.topic.startswith(f"{self.batch_topic}/"):
+                # Several samples of both metrics in one message
+                points = DataConverter.batch_to_influxdb(msg.payload)
+                if not points:
+                    logger.error("Failed to convert sensor batch to InfluxDB format")
+                elif self.influxdb_service.write_point(points):
+                    logger.info(f"Successfully stored {len(points)} points from {points[0]['tags']['sensor_id']}")
+                else:
+                    logger.error("Failed to store data in InfluxDB")
+                return
+            
             # Convert MQTT message to InfluxDB format
             point = DataConverter.mqtt_to_influxdb(msg.topic, msg.payload)
             
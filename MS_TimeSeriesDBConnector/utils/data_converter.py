@@ -1,6 +1,7 @@
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+from utils.sensor_batch import batch_samples, decode_batch
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -62,6 +63,39 @@ class DataConverter:
             logger.error(f"Error converting MQTT data to InfluxDB format: {e}")
             return None
     
+    @staticmethod
+    def batch_to_influxdb(payload):
+        """
+        Convert a batched sensor message to InfluxDB points
+        
+        Args:
+            payload (bytes): Compact JSON or packed binary batch from /sensor/batch
+            
+        Returns:
+            list: One temperature and one pressure point per sample, empty on error
+        """
+        try:
+            batch = decode_batch(payload)
+            points = []
+            for sample_ts, temperature, pressure in batch_samples(batch):
+                timestamp = datetime.fromtimestamp(sample_ts, tz=timezone.utc).isoformat(timespec='milliseconds')
+                for measurement, value in (('temperature', temperature), ('pressure', pressure)):
+                    points.append({
+                        "measurement": measurement,
+                        "tags": {
+                            "sensor_id": batch['device_id'],
+                            "pipeline_id": batch['pipeline_id'] or 'unknown'
+                        },
+                        "time": timestamp,
+                        "fields": {
+                            "value": float(value)
+                        }
+                    })
+            return points
+        except Exception as e:
+            logger.error(f"Error converting sensor batch to InfluxDB format: {e}")
+            return []
+    
     @staticmethod
     def influxdb_to_json(query_result):
         """
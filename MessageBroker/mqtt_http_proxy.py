@@ -30,11 +30,13 @@ from dotenv import load_dotenv
 # Import the test data generator
 try:
     from test_data_generator import TestDataGenerator
+    from sensor_batch import batch_samples, decode_batch
 except ImportError:
     # If running from a different directory, adjust the import
     import sys
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from test_data_generator import TestDataGenerator
+    from sensor_batch import batch_samples, decode_batch
 
 load_dotenv()
 
@@ -81,8 +83,10 @@ class MQTTHandler:
             print("Connected to MQTT broker")
             self.connected = True
             # Subscribe to topics
-            client.subscribe("/sensor/temperature")
-            client.subscribe("/sensor/pressure")
+            # The wildcards also cover partitioned sensor topics (<topic>/<partition>)
+            client.subscribe("/sensor/temperature/#")
+            client.subscribe("/sensor/pressure/#")
+            client.subscribe("/sensor/batch/#")
             client.subscribe("/actuator/valve")
             print("Subscribed to sensor and actuator topics")
         else:
@@ -92,11 +96,17 @@ class MQTTHandler:
     def on_message(self, client, userdata, msg):
         try:
             topic = msg.topic
+            if topic.endswith("/backfill"):
+                # Readings replayed after an outage are history, not the latest values
+                return
+            if topic.startswith("/sensor/batch"):
+                self._store_batch(msg.payload)
+                return
             payload = json.loads(msg.payload.decode())
             
-            if topic == "/sensor/temperature":
+            if topic.startswith("/sensor/temperature"):
                 self.data_store.temperature = payload
-            elif topic == "/sensor/pressure":
+            elif topic.startswith("/sensor/pressure"):
                 self.data_store.pressure = payload
             elif topic == "/actuator/valve":
                 valve_id = payload.get("id", "unknown")
@@ -107,6 +117,22 @@ class MQTTHandler:
         except Exception as e:
             print(f"Error processing message: {e}")
     
+    def _store_batch(self, payload):
+        """Keep the last sample of a batched message (JSON or binary) as the latest readings"""
+        batch = decode_batch(payload)
+        samples = batch_samples(batch)
+        if not samples:
+            return
+        sample_ts, temperature, pressure = samples[-1]
+        reading = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sample_ts)),
+            "device_id": batch["device_id"],
+            "pipeline_id": batch["pipeline_id"]
+        }
+        self.data_store.temperature = dict(reading, value=temperature, unit="Celsius")
+        self.data_store.pressure = dict(reading, value=pressure, unit="PSI")
+        self.data_store.last_update = time.time()
+    
     def publish_valve_status(self, valve_id, status):
         """Publish valve status change to MQTT broker"""
         try: